@@ -0,0 +1,3 @@
+# analysis
+# Streamlit-free analysis kernels shared by the pages and the batch jobs.
+# Everything here is importable from worker processes (no st.* calls).
@@ -0,0 +1,20 @@
+# analysis/aggregation.py
+# Per-area aggregates of the energy data for the map page.
+import pandas as pd
+
+
+def mean_values_by_area(production_df: pd.DataFrame, group: str, start_date, end_date) -> pd.DataFrame:
+    """
+    Mean quantityKwh per priceArea for one group between two (naive, UTC)
+    dates; the dates may come in either order. Columns: priceArea, quantityKwh.
+    """
+    start = pd.Timestamp(start_date).tz_localize("UTC")
+    end = pd.Timestamp(end_date).tz_localize("UTC")
+    if start > end:
+        start, end = end, start
+
+    df = production_df[
+        (production_df["energyGroup"].str.lower() == group.lower())
+        & production_df["startTime"].between(start, end)
+    ]
+    return df.groupby("priceArea")["quantityKwh"].mean().reset_index()
@@ -0,0 +1,26 @@
+# analysis/correlation.py
+# Lagged sliding-window correlation between weather and energy series.
+import pandas as pd
+
+
+def hourly_mean(values: pd.Series, times: pd.Series) -> pd.Series:
+    """Mean per timestamp as a sorted UTC-indexed series with unique hours."""
+    series = values.astype(float).groupby(pd.to_datetime(times, utc=True)).mean().sort_index()
+    return series[~series.index.duplicated(keep="first")]
+
+
+def align_energy_weather(energy_df: pd.DataFrame, meteo_df: pd.DataFrame, group: str, variable: str,
+                         time_col: str = "time") -> pd.DataFrame:
+    """
+    Hourly energy of one group (mean over areas) joined with one weather
+    variable on their common hours. Columns: meteo, energy.
+    """
+    energy = energy_df[energy_df["energyGroup"] == group]
+    ts_energy = hourly_mean(energy["quantityKwh"], energy["startTime"])
+    ts_meteo = hourly_mean(meteo_df[variable], meteo_df[time_col])
+    return pd.concat([ts_meteo.rename("meteo"), ts_energy.rename("energy")], axis=1).dropna()
+
+
+def sliding_window_corr(x: pd.Series, y: pd.Series, window: int = 24, lag: int = 0) -> pd.Series:
+    """Rolling correlation between two aligned series, x shifted by lag hours."""
+    return x.shift(lag).rolling(window).corr(y)
@@ -0,0 +1,126 @@
+# analysis/fast_forecast.py
+# Forecast engines for long seasonal periods.
+#
+# A SARIMAX with s = 168 or 8766 carries a state vector of that length, so it
+# cannot be fitted on hourly data in reasonable time. Here seasonality is
+# modelled instead by Fourier regressors (daily, weekly, yearly) on top of a
+# low-order ARIMA, plus two cheap baselines. Every engine returns
+# (mean, conf_int, fit seconds) in the same layout as forecasting.forecast().
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from analysis.forecasting import fit_sarimax, future_exog
+
+# name: (period in hours, number of sin/cos pairs)
+FOURIER_PERIODS: dict[str, tuple[int, int]] = {"daily": (24, 4), "weekly": (168, 3), "yearly": (8766, 2)}
+
+
+def fourier_terms(index: pd.DatetimeIndex, periods: dict[str, tuple[int, int]] = FOURIER_PERIODS) -> pd.DataFrame:
+    """
+    Sin/cos columns for the given periods. Phases are counted from the Unix
+    epoch, so training and forecast hours get consistent values.
+    """
+    hours = pd.DatetimeIndex(index).as_unit("ns").asi8 / 3.6e12
+    columns = {}
+    for name, (period, harmonics) in periods.items():
+        for k in range(1, harmonics + 1):
+            angle = 2 * np.pi * k * hours / period
+            columns[f"{name}_sin{k}"] = np.sin(angle)
+            columns[f"{name}_cos{k}"] = np.cos(angle)
+    return pd.DataFrame(columns, index=index)
+
+
+def _design(index: pd.DatetimeIndex, X: pd.DataFrame | None, periods: dict[str, tuple[int, int]]) -> pd.DataFrame:
+    terms = fourier_terms(index, periods)
+    terms.insert(0, "const", 1.0)
+    return terms if X is None else pd.concat([terms, X.set_axis(index)], axis=1)
+
+
+def _interval(mean: pd.Series, sigma: float | np.ndarray, alpha: float) -> pd.DataFrame:
+    from scipy.stats import norm
+
+    z = norm.ppf(1 - alpha / 2)
+    return pd.DataFrame({"lower": mean - z * sigma, "upper": mean + z * sigma}, index=mean.index)
+
+
+def _require_hours(y: pd.Series, minimum: int, engine: str) -> None:
+    if len(y) < minimum:
+        raise ValueError(f"{engine} needs at least {minimum} training hours, got {len(y)}. "
+                         "Choose a longer training period.")
+
+
+def _future_index(y: pd.Series, horizon: int) -> pd.DatetimeIndex:
+    return pd.date_range(y.index[-1] + pd.Timedelta(hours=1), periods=horizon, freq="h", tz="UTC")
+
+
+def fourier_arima(y: pd.Series, X: pd.DataFrame | None, horizon: int, alpha: float = 0.05,
+                  order: tuple[int, int, int] = (1, 0, 1), periods: dict[str, tuple[int, int]] = FOURIER_PERIODS
+                  ) -> tuple[pd.Series, pd.DataFrame, float]:
+    """
+    Two-stage dynamic harmonic regression: least squares on Fourier terms (and
+    any weather exog), then a low-order ARIMA on the residuals. Periods longer
+    than the training series are dropped, as they cannot be estimated.
+    The interval reflects the ARIMA error only, not the regression coefficients.
+    """
+    start = time.perf_counter()
+    periods = {k: v for k, v in periods.items() if v[0] <= len(y)}
+    design = _design(y.index, X, periods)
+    coef, *_ = np.linalg.lstsq(design.to_numpy(), y.to_numpy(), rcond=None)
+    resid = y - design.to_numpy() @ coef
+    results, _ = fit_sarimax(resid, None, order, (0, 0, 0, 0))
+
+    index = _future_index(y, horizon)
+    regression = _design(index, future_exog(X, horizon, index[0]), periods).to_numpy() @ coef
+    pred = results.get_forecast(steps=horizon)
+    mean = pd.Series(regression + np.asarray(pred.predicted_mean), index=index)
+    conf_int = pd.DataFrame(regression[:, None] + np.asarray(pred.conf_int(alpha=alpha)),
+                            index=index, columns=["lower", "upper"])
+    return mean, conf_int, time.perf_counter() - start
+
+
+def seasonal_naive(y: pd.Series, X: pd.DataFrame | None, horizon: int, alpha: float = 0.05,
+                   season: int = 168) -> tuple[pd.Series, pd.DataFrame, float]:
+    """
+    Repeat the last season. Interval width grows with the number of seasons ahead.
+    With fewer than two seasons of data the season is shortened to half the
+    series (down to 1, a plain naive forecast); at least 2 hours are needed.
+    """
+    _require_hours(y, 2, "Seasonal naive")
+    start = time.perf_counter()
+    values = y.to_numpy()
+    season = max(1, min(season, len(values) // 2))
+    steps = np.arange(horizon)
+    mean = pd.Series(values[len(values) - season + steps % season], index=_future_index(y, horizon))
+    sigma = np.std(values[season:] - values[:-season]) * np.sqrt(steps // season + 1)
+    return mean, _interval(mean, sigma, alpha), time.perf_counter() - start
+
+
+def exp_smoothing(y: pd.Series, X: pd.DataFrame | None, horizon: int, alpha: float = 0.05,
+                  season: int = 168) -> tuple[pd.Series, pd.DataFrame, float]:
+    """
+    Additive Holt-Winters with a damped trend. The interval uses the one-step
+    residual spread growing with sqrt(h), a deliberate approximation.
+    With fewer than two seasons of data (which Holt-Winters cannot initialise)
+    the seasonal component is left out, i.e. damped-trend Holt smoothing.
+    """
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    _require_hours(y, 2, "Exponential smoothing")
+    start = time.perf_counter()
+    seasonal = {"seasonal": "add", "seasonal_periods": season} if len(y) >= 2 * season else {}
+    model = ExponentialSmoothing(y.to_numpy(), trend="add", damped_trend=True, **seasonal)
+    results = model.fit()
+    mean = pd.Series(results.forecast(horizon), index=_future_index(y, horizon))
+    sigma = np.std(results.resid) * np.sqrt(np.arange(1, horizon + 1))
+    return mean, _interval(mean, sigma, alpha), time.perf_counter() - start
+
+
+ENGINES = {
+    "ARIMA + Fourier seasonality": fourier_arima,
+    "Seasonal naive (weekly)": seasonal_naive,
+    "Exponential smoothing (weekly Holt-Winters)": exp_smoothing,
+}
@@ -0,0 +1,400 @@
+# analysis/forecasting.py
+# SARIMAX data preparation, fitting and forecasting for energy series.
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from numpy.typing import ArrayLike
+
+if TYPE_CHECKING:
+    from statsmodels.tsa.statespace.sarimax import SARIMAXResults
+
+# statsmodels takes over a second to import; it is loaded by the functions
+# that fit or filter, so pages importing this module start fast.
+
+
+def prepare_target(energy_df: pd.DataFrame, group: str, start_date, end_date,
+                   value_col: str = "quantityKwh") -> pd.Series:
+    """Hourly target series of one group between two dates, gaps interpolated."""
+    df = energy_df[energy_df["energyGroup"] == group]
+    start = pd.Timestamp(start_date).tz_localize("UTC")
+    end = pd.Timestamp(end_date).tz_localize("UTC")
+    df = df[(df["startTime"] >= start) & (df["startTime"] <= end)]
+    if df.empty:
+        return pd.Series(dtype=float, name=value_col)
+
+    y = df[["startTime", value_col]].groupby("startTime").mean().sort_index()
+    y.index = pd.to_datetime(y.index, utc=True)
+    y = y[~y.index.duplicated(keep="first")]
+    y = y.asfreq("h")
+    y[value_col] = y[value_col].replace([np.inf, -np.inf], np.nan).interpolate(method="time").ffill().bfill()
+    return y[value_col].astype(float)
+
+
+def prepare_exog(meteo_df: pd.DataFrame | None, y: pd.Series, exog_vars: list[str],
+                 time_col: str = "time") -> tuple[pd.Series, pd.DataFrame | None]:
+    """
+    Align the chosen weather variables with y.
+    Returns (y, X) restricted to hours where both exist; X is None without exog_vars.
+    """
+    if not exog_vars or meteo_df is None or meteo_df.empty:
+        return y, None
+
+    times = pd.to_datetime(meteo_df[time_col], utc=True)
+    X_full = meteo_df[list(exog_vars)].astype(float).groupby(times).mean().sort_index()
+    X_full = X_full[~X_full.index.duplicated(keep="first")]
+
+    X = X_full.reindex(y.index).replace([np.inf, -np.inf], np.nan).ffill().bfill()
+    combined = pd.concat([y, X], axis=1).dropna()
+    return combined[y.name], combined[list(exog_vars)].astype(float)
+
+
+def forecast_memory() -> int:
+    """
+    Conserve-memory flags: no per-hour filter/smoother output, except the forecast
+    covariance that get_forecast() needs for its intervals (plain low_memory drops it too).
+    """
+    from statsmodels.tsa.statespace.kalman_filter import MEMORY_CONSERVE, MEMORY_NO_FORECAST_COV
+
+    return MEMORY_CONSERVE & ~MEMORY_NO_FORECAST_COV
+
+
+def fit_sarimax(y: pd.Series, X: pd.DataFrame | None, order: tuple[int, int, int],
+                seasonal_order: tuple[int, int, int, int], maxiter: int = 200,
+                start_params: ArrayLike | None = None) -> tuple[SARIMAXResults, float]:
+    """
+    Fit a SARIMAX model. Returns (results, fit seconds).
+    Memory conservation keeps the pickled results under 1 MB for a month of
+    hours (~100 MB with full smoother output); forecasts are identical.
+    start_params (e.g. the optimum of an overlapping window) warm-start the
+    optimizer; they are ignored if they do not match the model.
+    """
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    start = time.perf_counter()
+    model = SARIMAX(y, order=order, seasonal_order=seasonal_order,
+                    exog=X, enforce_stationarity=False, enforce_invertibility=False)
+    model.ssm.set_conserve_memory(forecast_memory())
+    if start_params is not None and (len(start_params) != model.k_params or not np.all(np.isfinite(start_params))):
+        start_params = None
+    results = model.fit(start_params=start_params, disp=False, maxiter=maxiter, method="lbfgs")
+    return results, time.perf_counter() - start
+
+
+def update_results(results: SARIMAXResults, y_new: pd.Series,
+                   X_new: pd.DataFrame | None = None) -> tuple[SARIMAXResults, float]:
+    """
+    Bring a fitted model up to date with new observations without refitting:
+    the Kalman filter runs over y_new only, starting from the stored final
+    state, with the parameters fixed. Returns (results, drift), where drift is
+    the RMS of the standardized one-step errors on y_new (about 1 while the
+    model still describes the data).
+    """
+    from statsmodels.tsa.statespace.initialization import Initialization
+
+    fr = results.filter_results
+    model = results.model.clone(y_new, exog=X_new)
+    model.ssm.initialization = Initialization(
+        model.k_states, "known",
+        constant=fr.predicted_state[..., -1],
+        stationary_cov=fr.predicted_state_cov[..., -1],
+    )
+    updated = model.filter(results.params)
+    z = updated.filter_results.standardized_forecasts_error
+    return updated, float(np.sqrt(np.nanmean(z ** 2)))
+
+
+def future_exog(X: pd.DataFrame | None, horizon: int, start: pd.Timestamp) -> pd.DataFrame | None:
+    """Exogenous values for the forecast horizon: the last observed row carried forward."""
+    if X is None:
+        return None
+    index = pd.date_range(start, periods=horizon, freq="h", tz="UTC")
+    return pd.DataFrame(np.repeat(X.iloc[-1:].to_numpy(), horizon, axis=0), index=index, columns=X.columns)
+
+
+def forecast(results: SARIMAXResults, y: pd.Series, X: pd.DataFrame | None, horizon: int,
+             alpha: float = 0.05) -> tuple[pd.Series, pd.DataFrame]:
+    """Point forecast and (1 - alpha) interval, indexed by the forecast hours."""
+    start = y.index[-1] + pd.Timedelta(hours=1)
+    pred = results.get_forecast(steps=horizon, exog=future_exog(X, horizon, start))
+    mean = pred.predicted_mean
+    conf_int = pred.conf_int(alpha=alpha)
+    index = pd.date_range(start, periods=horizon, freq="h", tz="UTC")
+    mean.index = index
+    conf_int.index = index
+    return mean, conf_int
+
+
+# -----------------------------
+# Parallel order search
+# -----------------------------
+class _AbortFit(Exception):
+    pass
+
+
+# Seconds past its timeout after which a candidate fit's worker process is killed
+KILL_GRACE = 5.0
+
+
+def candidate_orders(max_p: int = 2, max_q: int = 2, d_values: tuple[int, ...] = (0, 1), max_P: int = 1,
+                     max_Q: int = 1, D: int = 0, s: int = 24) -> list[tuple[tuple, tuple]]:
+    """Bounded grid of (order, seasonal_order) candidates."""
+    seasonal = [(P, D, Q, s) for P in range(max_P + 1) for Q in range(max_Q + 1)] if s > 0 else [(0, 0, 0, 0)]
+    return [
+        ((p, d, q), seasonal_order)
+        for p in range(max_p + 1)
+        for d in d_values
+        for q in range(max_q + 1)
+        for seasonal_order in seasonal
+    ]
+
+
+def fit_candidate(y: pd.Series, X: pd.DataFrame | None, order: tuple[int, int, int],
+                  seasonal_order: tuple[int, int, int, int], maxiter: int = 200, timeout: float = 120.0,
+                  max_abs_param: float = 1e6) -> dict:
+    """
+    Worker task for the order search. The optimizer callback stops the fit once
+    it runs past timeout seconds or its parameters blow up (diverging fit).
+    The callback only runs between L-BFGS iterations, so order_search() also
+    kills the worker process if the fit is still running KILL_GRACE seconds
+    later. Returns one row of the ranking table.
+    """
+    row = _candidate_row(order, seasonal_order)
+    start = time.perf_counter()
+
+    def check(params):
+        if time.perf_counter() - start > timeout:
+            raise _AbortFit("timeout")
+        if not np.all(np.isfinite(params)) or np.max(np.abs(params)) > max_abs_param:
+            raise _AbortFit("diverged")
+
+    try:
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+        model = SARIMAX(y, order=order, seasonal_order=seasonal_order,
+                        exog=X, enforce_stationarity=False, enforce_invertibility=False)
+        results = model.fit(disp=False, maxiter=maxiter, method="lbfgs", low_memory=True, callback=check)
+        row["aic"], row["bic"] = float(results.aic), float(results.bic)
+        if not (np.isfinite(row["aic"]) and np.isfinite(row["bic"])):
+            row["status"] = "diverged"
+    except _AbortFit as e:
+        row["status"] = str(e)
+    except Exception as e:
+        row["status"] = f"failed: {e}"
+    row["fit_seconds"] = time.perf_counter() - start
+    return row
+
+
+def _candidate_row(order, seasonal_order, status="ok", fit_seconds=np.nan):
+    return {"order": tuple(order), "seasonal_order": tuple(seasonal_order),
+            "aic": np.nan, "bic": np.nan, "fit_seconds": fit_seconds, "status": status}
+
+
+def _process_context():
+    """
+    Start method for the worker processes. Forking a threaded server (Streamlit,
+    the job pool) can copy a lock held by another thread and deadlock the child,
+    so workers come from a fork server that has preloaded this module (cheap to
+    start, no parent threads), or are spawned where there is no fork server.
+    """
+    import multiprocessing as mp
+
+    if "forkserver" not in mp.get_all_start_methods():
+        return mp.get_context("spawn")
+    ctx = mp.get_context("forkserver")
+    ctx.set_forkserver_preload([__name__, "statsmodels.tsa.statespace.sarimax"])
+    return ctx
+
+
+def _task(conn, fn, args):
+    """Child process body of _run_processes(): send back (ok, result or exception)."""
+    try:
+        out = (True, fn(*args))
+    except Exception as e:
+        out = (False, e)
+    try:
+        conn.send(out)
+    except Exception as e:  # unpicklable result or exception
+        conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+    conn.close()
+
+
+def _run_processes(fn, tasks, workers, timeout=None, on_timeout=None, progress=None):
+    """
+    fn(*args) for every args in tasks, each in its own child process with at
+    most workers running at once. Returns the results in task order and
+    re-raises a task's exception. A task still running timeout seconds after
+    it started is killed and gets on_timeout(args) as its result.
+    progress(done, total) is called as tasks complete and every half second
+    while waiting, so a progress callback that raises (a cancelled job) stops
+    the run promptly. Whatever the exit, no child is left running.
+    """
+    from multiprocessing.connection import wait
+
+    ctx = _process_context()
+    results = [None] * len(tasks)
+    queue = list(reversed(list(enumerate(tasks))))
+    running = {}  # connection -> (task index, process, start time)
+    done = 0
+    try:
+        while queue or running:
+            while queue and len(running) < workers:
+                i, args = queue.pop()
+                recv, send = ctx.Pipe(duplex=False)
+                proc = ctx.Process(target=_task, args=(send, fn, args), daemon=True)
+                proc.start()
+                send.close()
+                running[recv] = (i, proc, time.monotonic())
+
+            ready = wait(list(running), timeout=0.5)
+            if not ready and progress is not None:
+                progress(done, len(tasks))
+            for conn in ready:
+                i, proc, _ = running.pop(conn)
+                try:
+                    ok, value = conn.recv()
+                except EOFError:
+                    ok, value = False, RuntimeError(f"worker process exited with code {proc.exitcode}")
+                conn.close()
+                proc.join()
+                if not ok:
+                    raise value
+                results[i] = value
+                done += 1
+                if progress is not None:
+                    progress(done, len(tasks))
+
+            if timeout is not None:
+                now = time.monotonic()
+                for conn, (i, proc, started) in list(running.items()):
+                    if now - started > timeout:
+                        del running[conn]
+                        proc.kill()
+                        proc.join()
+                        conn.close()
+                        results[i] = on_timeout(tasks[i])
+                        done += 1
+                        if progress is not None:
+                            progress(done, len(tasks))
+    finally:
+        for conn, (_, proc, _) in running.items():
+            proc.kill()
+            proc.join()
+            conn.close()
+    return results
+
+
+def order_search(y: pd.Series, X: pd.DataFrame | None, candidates: list[tuple[tuple, tuple]],
+                 workers: int | None = None, maxiter: int = 200, timeout: float = 120.0,
+                 progress: Callable[[int, int], None] | None = None) -> pd.DataFrame:
+    """
+    Fit every candidate in worker processes and rank them by AIC (then BIC).
+    Returns a DataFrame with order, seasonal_order, aic, bic, fit_seconds and status.
+    Each fit is held to timeout seconds (killed KILL_GRACE seconds after it at
+    the latest). progress(done, total) is called after each fit and while
+    waiting; if it raises, the running fits are killed.
+    """
+    import os
+
+    workers = workers or os.cpu_count() or 1
+    tasks = [(y, X, order, seasonal_order, maxiter, timeout) for order, seasonal_order in candidates]
+    # A fit stuck inside one L-BFGS iteration never reaches its own timeout check
+    rows = _run_processes(fit_candidate, tasks, workers, timeout=timeout + KILL_GRACE,
+                          on_timeout=lambda t: _candidate_row(t[2], t[3], "timeout (killed)", t[5] + KILL_GRACE),
+                          progress=progress)
+
+    table = pd.DataFrame(rows)
+    table["ok"] = table["status"] == "ok"
+    table = table.sort_values(["ok", "aic", "bic"], ascending=[False, True, True]).drop(columns="ok")
+    return table.reset_index(drop=True)
+
+
+# -----------------------------
+# Rolling-origin backtesting
+# -----------------------------
+def fold_origins(n: int, folds: int, horizon: int, step: int | None = None) -> list[int]:
+    """
+    Training-end positions of the folds: the last fold ends horizon points
+    before the end of the series, earlier ones step (default horizon) apart.
+    """
+    step = step or horizon
+    last = n - horizon
+    origins = [last - i * step for i in reversed(range(folds))]
+    if origins[0] < 2 * horizon:
+        raise ValueError("Training window too short for this many folds and horizon.")
+    return origins
+
+
+def backtest_fold(base: SARIMAXResults | None, y: pd.Series, X: pd.DataFrame | None, origin: int, horizon: int,
+                  refit: bool = False, order: tuple[int, int, int] | None = None,
+                  seasonal_order: tuple[int, int, int, int] | None = None) -> tuple[np.ndarray, float]:
+    """
+    Worker task: forecast horizon steps from origin. Without refit the base
+    model (fitted up to the first origin) is extended by appending the
+    observations since then with its parameters fixed, i.e. one Kalman filter pass.
+    Returns (errors, seconds).
+    """
+    start = time.perf_counter()
+    y_train, X_train = y.iloc[:origin], None if X is None else X.iloc[:origin]
+    if refit:
+        results, _ = fit_sarimax(y_train, X_train, order, seasonal_order)
+    else:
+        n_base = base.nobs
+        if origin > n_base:
+            results = base.append(y.iloc[n_base:origin], exog=None if X is None else X.iloc[n_base:origin])
+        else:
+            results = base
+    X_test = None if X is None else X.iloc[origin:origin + horizon]
+    pred = results.forecast(steps=horizon, exog=X_test)
+    errors = y.iloc[origin:origin + horizon].to_numpy() - np.asarray(pred)
+    return errors, time.perf_counter() - start
+
+
+def backtest(y: pd.Series, X: pd.DataFrame | None, order: tuple[int, int, int],
+             seasonal_order: tuple[int, int, int, int], folds: int = 5, horizon: int = 24,
+             step: int | None = None, refit: bool = False, workers: int | None = None,
+             progress: Callable[[int, int], None] | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Rolling-origin evaluation. Returns (metrics, fold_costs):
+    metrics has MAE, RMSE and MAPE (%) per horizon step, fold_costs the seconds
+    of every fold (plus the shared base fit as fold 0 when not refitting).
+    X holds observed weather over the test windows, so exogenous forecasts are
+    assumed perfect. progress(done, total) is called after each fold and while
+    waiting; if it raises, the running folds are killed.
+    """
+    import os
+
+    origins = fold_origins(len(y), folds, horizon, step)
+    base = None
+    if not refit:
+        base, base_seconds = fit_sarimax(y.iloc[:origins[0]], None if X is None else X.iloc[:origins[0]],
+                                         order, seasonal_order)
+
+    workers = workers or os.cpu_count() or 1
+    tasks = [(base, y, X, origin, horizon, refit, order, seasonal_order) for origin in origins]
+    outcomes = _run_processes(backtest_fold, tasks, workers, progress=progress)
+
+    errors = np.vstack([e for e, _ in outcomes])
+    actual = np.vstack([y.iloc[o:o + horizon].to_numpy() for o in origins])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ape = np.where(actual != 0, np.abs(errors / actual), np.nan)
+    metrics = pd.DataFrame({
+        "MAE": np.abs(errors).mean(axis=0),
+        "RMSE": np.sqrt((errors ** 2).mean(axis=0)),
+        "MAPE": 100 * np.nanmean(ape, axis=0),
+    }, index=pd.RangeIndex(1, horizon + 1, name="step"))
+    fold_costs = pd.DataFrame({
+        "fold": range(1, folds + 1),
+        "origin": [y.index[o] for o in origins],
+        "task": "refit + forecast" if refit else "append + forecast",
+        "seconds": [s for _, s in outcomes],
+    })
+    if base is not None:
+        base_row = pd.DataFrame({"fold": [0], "origin": [y.index[origins[0]]],
+                                 "task": ["base fit"], "seconds": [base_seconds]})
+        fold_costs = pd.concat([base_row, fold_costs], ignore_index=True)
+    return metrics, fold_costs
@@ -0,0 +1,243 @@
+# analysis/outliers.py
+# Outlier (SPC) and anomaly (LOF) detection on hourly weather/energy data.
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+if TYPE_CHECKING:  # pandas is imported where it is used, it is slow to load
+    import pandas as pd
+
+# Scale factor from MAD to a standard deviation for normal data
+MAD_TO_SIGMA = 1.4826
+
+# The page's DCT cutoff was tuned on one month (31 days) of hourly data
+CUTOFF_REFERENCE_HOURS = 31 * 24
+
+
+def scaled_cutoff(freq_cutoff: int, n_hours: int) -> int:
+    """DCT coefficient count that removes the same slow periods as freq_cutoff does on one month."""
+    return max(1, int(round(freq_cutoff * n_hours / CUTOFF_REFERENCE_HOURS)))
+
+
+def spc_filter(values: ArrayLike, freq_cutoff: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    DCT high-pass of every column of a (time × variables) array in one transform.
+    Returns (satv, median, mad): the seasonally adjusted variation and its
+    per-column median and MAD. These do not depend on k, so they can be cached
+    per (dataset, cutoff) and re-thresholded cheaply.
+    """
+    from scipy.fft import dct, idct
+
+    x = np.asarray(values, dtype=float)
+    if x.ndim == 1:
+        x = x[:, None]
+    coeff = dct(x, norm="ortho", axis=0)
+    coeff[:freq_cutoff] = 0.0
+    satv = idct(coeff, norm="ortho", axis=0)
+
+    median = np.median(satv, axis=0)
+    mad = np.median(np.abs(satv - median), axis=0)
+    return satv, median, mad
+
+
+def spc_limits(median: ArrayLike, mad: ArrayLike, k: float) -> tuple[np.ndarray, np.ndarray]:
+    """Lower and upper SPC limits (median ± k robust sigma) in SATV units."""
+    robust_sigma = MAD_TO_SIGMA * mad
+    return median - k * robust_sigma, median + k * robust_sigma
+
+
+def spc_outliers(satv: np.ndarray, median: ArrayLike, mad: ArrayLike, k: float) -> np.ndarray:
+    """Boolean (time × variables) mask of points outside the SPC limits."""
+    lower, upper = spc_limits(median, mad, k)
+    return (satv > upper) | (satv < lower)
+
+
+def spc_bundle(data: pd.DataFrame, freq_cutoff: int, time_col: str = "time") -> dict:
+    """
+    spc_filter() over every variable of a time-sorted weather frame, with
+    gaps interpolated. Returns a dict with time, columns, values, satv,
+    median and mad, the input of variable_outliers() for any k.
+    """
+    columns = [c for c in data.columns if c != time_col]
+    values = data[columns].astype(float).interpolate(limit_direction="both").to_numpy()
+    satv, median, mad = spc_filter(values, scaled_cutoff(freq_cutoff, len(data)))
+    return {"time": data[time_col].to_numpy(), "columns": columns, "values": values,
+            "satv": satv, "median": median, "mad": mad}
+
+
+def variable_outliers(spc: dict, column: str, k: float = 3) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """
+    SPC outliers of one variable of a spc_bundle(). Returns (outliers, bands, stats):
+    the flagged hours (time, value, SATV), the limits in the variable's own
+    units (its slow trend ± the SATV limits, columns lower/upper) and summary
+    statistics.
+    """
+    import pandas as pd
+
+    i = spc["columns"].index(column)
+    times, values, satv = spc["time"], spc["values"][:, i], spc["satv"][:, i]
+    median, mad = spc["median"][i], spc["mad"][i]
+    lower, upper = spc_limits(median, mad, k)
+    mask = (satv > upper) | (satv < lower)
+
+    outliers = pd.DataFrame({"time": times[mask], column: values[mask], "SATV": satv[mask]})
+    trend = values - satv
+    bands = pd.DataFrame({"lower": trend + lower, "upper": trend + upper}, index=times)
+    stats = {
+        "n_points": len(times),
+        "n_outliers": int(mask.sum()),
+        "proportion_outliers": float(mask.sum()) / len(times),
+        "median_SATV": float(median),
+        "MAD_SATV": float(mad),
+        "robust_sigma": float(MAD_TO_SIGMA * mad),
+        "upper_limit_SATV": float(upper),
+        "lower_limit_SATV": float(lower),
+    }
+    return outliers, bands, stats
+
+
+# -----------------------------
+# Local Outlier Factor
+# -----------------------------
+LOF_FEATURES = [
+    "precipitation (mm)",
+    "wind_speed_10m (m/s)",
+    "wind_gusts_10m (m/s)",
+    "temperature_2m (°C)",
+]
+
+# Above this many rows LOF is fitted on a stratified sample and the rest is scored as novel points
+LOF_MAX_FIT = 50_000
+LOF_SCORE_BATCH = 100_000
+
+
+def standardize(X: ArrayLike) -> np.ndarray:
+    """Zero mean, unit variance per column (constant columns are only centred)."""
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X[:, None]
+    std = X.std(axis=0)
+    std[std == 0] = 1.0
+    return (X - X.mean(axis=0)) / std
+
+
+def stratified_sample(strata: ArrayLike, size: int, seed: int = 0) -> np.ndarray:
+    """Indices of a random sample with each stratum represented in proportion to its size."""
+    strata = np.asarray(strata)
+    n = len(strata)
+    if size >= n:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(n)
+    keys = strata[order]
+    grouped = order[np.argsort(keys, kind="stable")]
+    sorted_keys = strata[grouped]
+
+    uniq, first, counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+    quota = np.maximum(1, np.round(size * counts / n)).astype(int)
+    rank = np.arange(n) - np.repeat(first, counts)
+    keep = rank < np.repeat(quota, counts)
+    return np.sort(grouped[keep])
+
+
+def lof_scores(X: ArrayLike, proportion: float = 0.01, n_neighbors: int = 20, max_fit: int | None = LOF_MAX_FIT,
+               strata: ArrayLike | None = None, algorithm: str = "kd_tree", n_jobs: int = -1,
+               seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    LOF on standardized features with tree-based, parallel neighbour search.
+
+    Up to max_fit rows the model is fitted on everything (same result as a plain
+    fit_predict). Larger inputs are fitted on a sample stratified by strata (e.g.
+    calendar month) and the remaining rows get novelty scores from that model.
+
+    Returns (mask, scores): anomaly mask and negative LOF scores (lower = more anomalous).
+    """
+    from sklearn.neighbors import LocalOutlierFactor
+
+    Z = standardize(X)
+    n = len(Z)
+    if max_fit is None or n <= max_fit:
+        lof = LocalOutlierFactor(n_neighbors=n_neighbors, contamination=proportion,
+                                 algorithm=algorithm, n_jobs=n_jobs)
+        mask = lof.fit_predict(Z) == -1
+        return mask, lof.negative_outlier_factor_
+
+    fit_idx = stratified_sample(strata if strata is not None else np.zeros(n), max_fit, seed)
+    lof = LocalOutlierFactor(n_neighbors=n_neighbors, novelty=True,
+                             algorithm=algorithm, n_jobs=n_jobs)
+    lof.fit(Z[fit_idx])
+
+    rest = np.ones(n, dtype=bool)
+    rest[fit_idx] = False
+    scores = np.empty(n)
+    scores[fit_idx] = lof.negative_outlier_factor_
+    rest_idx = np.flatnonzero(rest)
+    # Score in batches so the neighbour arrays stay small
+    for start in range(0, len(rest_idx), LOF_SCORE_BATCH):
+        batch = rest_idx[start:start + LOF_SCORE_BATCH]
+        scores[batch] = lof.score_samples(Z[batch])
+
+    threshold = np.percentile(scores, 100.0 * proportion)
+    return scores < threshold, scores
+
+
+def anomaly_summary(df: pd.DataFrame, mask: np.ndarray, scores: np.ndarray,
+                    value_cols: str | list[str] = "precipitation (mm)") -> tuple[pd.DataFrame, dict]:
+    """
+    Rows flagged by lof_scores() with their LOF_Score, and summary statistics:
+    counts plus, per value column (the LOF features), its mean over all rows
+    and over the flagged ones.
+    """
+    value_cols = [value_cols] if isinstance(value_cols, str) else list(value_cols)
+    flagged = df[mask].copy()
+    flagged["LOF_Score"] = scores[mask]
+    stats = {
+        "n_points": len(df),
+        "n_anomalies": len(flagged),
+        "proportion_anomalies": round(len(flagged) / len(df), 4),
+    }
+    for col in value_cols:
+        stats[f"mean {col}"] = df[col].mean()
+        stats[f"mean {col}, anomalies"] = flagged[col].mean() if len(flagged) > 0 else None
+    return flagged, stats
+
+
+# -----------------------------
+# Scan of one energy series with both methods
+# -----------------------------
+def scan_series(series: pd.Series, freq_cutoff: int = 10, k: float = 4.0, proportion: float = 0.001,
+                max_fit: int | None = LOF_MAX_FIT) -> pd.DataFrame:
+    """
+    Flag hours of one regular hourly series with DCT-SPC and with LOF on
+    (value, hour-to-hour change). Returns a DataFrame of flagged hours with
+    time, value, method and score (robust z for SPC, negative LOF for LOF).
+    """
+    import pandas as pd
+
+    values = series.to_numpy(dtype=float)
+    columns = ["time", "value", "method", "score"]
+    if len(values) < 2:
+        return pd.DataFrame(columns=columns)
+
+    satv, median, mad = spc_filter(values, scaled_cutoff(freq_cutoff, len(values)))
+    satv, median, mad = satv[:, 0], median[0], mad[0]
+    spc_mask = spc_outliers(satv, median, mad, k)
+    robust_sigma = MAD_TO_SIGMA * mad
+    spc_score = (satv - median) / robust_sigma if robust_sigma > 0 else np.zeros_like(satv)
+
+    features = np.column_stack([values, np.diff(values, prepend=values[0])])
+    lof_mask, lof_score = lof_scores(features, proportion=proportion, max_fit=max_fit,
+                                     strata=series.index.month.to_numpy())
+
+    parts = []
+    for method, mask, score in (("SPC", spc_mask, spc_score), ("LOF", lof_mask, lof_score)):
+        parts.append(pd.DataFrame({
+            "time": series.index[mask],
+            "value": values[mask],
+            "method": method,
+            "score": score[mask],
+        }))
+    return pd.concat(parts, ignore_index=True)
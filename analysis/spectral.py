@@ -0,0 +1,77 @@
+# analysis/spectral.py
+# Vectorized spectrograms and Welch PSDs over a panel of hourly series.
+import numpy as np
+import pandas as pd
+from numpy.typing import ArrayLike
+
+# Hourly samples -> frequencies in cycles per day
+SAMPLES_PER_DAY = 24.0
+
+
+def hourly_panel(df: pd.DataFrame, area: str | None = None, by: str = "energyGroup", year: int | None = None,
+                 time_col: str = "startTime", value_col: str = "quantityKwh") -> pd.DataFrame:
+    """
+    Regular hourly panel: one column per energy group (by="energyGroup", one area)
+    or per price area (by="priceArea", summed over groups). Missing hours are
+    interpolated in time instead of being set to zero.
+    """
+    mask = pd.Series(True, index=df.index)
+    if area is not None:
+        mask &= df["priceArea"] == area
+    if year is not None:
+        mask &= df[time_col].dt.year == year
+    sub = df.loc[mask, [time_col, by, value_col]]
+    if sub.empty:
+        return pd.DataFrame()
+
+    keys = sub[by].str.lower() if by == "energyGroup" else sub[by]
+    panel = sub.pivot_table(index=time_col, columns=keys, values=value_col, aggfunc="sum")
+    full_index = pd.date_range(panel.index.min(), panel.index.max(), freq="h")
+    panel = panel.reindex(full_index).interpolate(method="time", limit_direction="both")
+    return panel.dropna(axis=1, how="all").sort_index(axis=1)
+
+
+def panel_spectrogram(panel: pd.DataFrame, window_length: int = 256,
+                      overlap: int = 128) -> tuple[np.ndarray, pd.DatetimeIndex, np.ndarray]:
+    """
+    Spectrogram of every panel column in one call.
+    Returns (freqs [cycles/day], times [segment centre timestamps], Sxx [series, freq, time]).
+    """
+    from scipy.signal import spectrogram
+
+    x = panel.to_numpy(dtype=float).T
+    nperseg = min(window_length, x.shape[-1])
+    f, t, Sxx = spectrogram(
+        x,
+        fs=SAMPLES_PER_DAY,
+        nperseg=nperseg,
+        noverlap=min(overlap, nperseg - 1),
+        scaling="density",
+        axis=-1,
+    )
+    times = panel.index[0] + pd.to_timedelta(t, unit="D")
+    return f, times, Sxx
+
+
+def panel_welch(panel: pd.DataFrame, nperseg: int = 24 * 7 * 4) -> tuple[np.ndarray, np.ndarray]:
+    """Welch PSD of every panel column in one call. Returns (freqs [cycles/day], Pxx [series, freq])."""
+    from scipy.signal import welch
+
+    x = panel.to_numpy(dtype=float).T
+    f, Pxx = welch(x, fs=SAMPLES_PER_DAY, nperseg=min(nperseg, x.shape[-1]), axis=-1)
+    return f, Pxx
+
+
+def panel_spectra(panel: pd.DataFrame, window_length: int = 256, overlap: int = 128) -> dict:
+    """
+    Spectrogram and Welch PSD of every panel column. Returns a dict with
+    groups (column names), f, times, Sxx and f_psd, Pxx, plain arrays that
+    pickle and cache cheaply.
+    """
+    f, times, Sxx = panel_spectrogram(panel, window_length=window_length, overlap=overlap)
+    f_psd, Pxx = panel_welch(panel)
+    return {"groups": list(panel.columns), "f": f, "times": times, "Sxx": Sxx, "f_psd": f_psd, "Pxx": Pxx}
+
+
+def to_db(power: ArrayLike) -> np.ndarray:
+    return 10 * np.log10(power + 1e-10)
@@ -0,0 +1,139 @@
+# analysis/stl.py
+# STL decomposition of energy production/consumption series.
+import numpy as np
+import pandas as pd
+
+# Same settings the STL page has always used
+STL_DEFAULTS = {"period": 24, "seasonal": 13, "trend": 365, "robust": True}
+
+
+def select_series(df: pd.DataFrame, area: str, group: str, year: int | None = None, time_col: str = "startTime",
+                  value_col: str = "quantityKwh") -> pd.Series:
+    """Time-sorted series of one area/group (optionally one calendar year)."""
+    mask = (df["priceArea"] == area) & (df["energyGroup"].str.lower() == group.lower())
+    if year is not None:
+        mask &= df[time_col].dt.year == year
+    sub = df.loc[mask, [time_col, value_col]].sort_values(time_col)
+    return pd.Series(
+        sub[value_col].to_numpy(dtype=float),
+        index=pd.DatetimeIndex(sub[time_col]),
+        name=value_col,
+    )
+
+
+def regular_hourly(series: pd.Series) -> pd.Series:
+    """Drop duplicate timestamps, reindex to a full hourly grid and interpolate gaps in time."""
+    hourly = series[~series.index.duplicated(keep="first")].asfreq("h")
+    return hourly.interpolate(method="time", limit_direction="both")
+
+
+def stl_components(series: pd.Series, period: int = 24, seasonal: int = 13, trend: int = 365,
+                   robust: bool = True) -> pd.DataFrame:
+    """Return a DataFrame with observed, trend, seasonal and resid columns."""
+    from statsmodels.tsa.seasonal import STL
+
+    result = STL(series, period=period, seasonal=seasonal, trend=trend, robust=robust).fit()
+    return pd.DataFrame({
+        "observed": series.to_numpy(),
+        "trend": result.trend.to_numpy(),
+        "seasonal": result.seasonal.to_numpy(),
+        "resid": result.resid.to_numpy(),
+    }, index=series.index)
+
+
+# -----------------------------
+# Multi-seasonal decomposition (daily + weekly + yearly)
+# -----------------------------
+MSTL_DEFAULTS = {
+    "periods": (24, 168),
+    "yearly": True,
+    "chunk_hours": 24 * 7 * 12,
+    "overlap_hours": 24 * 7,
+}
+
+
+def _yearly_component(hourly):
+    """
+    Yearly cycle of an hourly series, estimated with STL on daily means (period 365)
+    and interpolated back to hours. Needs at least two years of data, else zeros.
+    """
+    # 7-day centred mean keeps the weekly cycle out of the yearly one
+    daily = hourly.resample("D").mean().interpolate(limit_direction="both")
+    daily = daily.rolling(7, center=True, min_periods=1).mean()
+    if len(daily) < 2 * 365:
+        return pd.Series(0.0, index=hourly.index)
+    from statsmodels.tsa.seasonal import STL
+
+    seasonal = STL(daily, period=365, robust=True).fit().seasonal
+    # Daily values sit at midnight, shift to midday before interpolating to hours
+    seasonal.index = seasonal.index + pd.Timedelta(hours=12)
+    return (
+        seasonal.reindex(seasonal.index.union(hourly.index))
+        .interpolate(method="time", limit_direction="both")
+        .reindex(hourly.index)
+    )
+
+
+def _chunk_starts(n, chunk, step):
+    if n <= chunk:
+        return [0]
+    starts = list(range(0, n - chunk, step))
+    return starts + [n - chunk]
+
+
+def mstl_components(series: pd.Series, periods: tuple[int, ...] = (24, 168), yearly: bool = True,
+                    chunk_hours: int = 24 * 7 * 12, overlap_hours: int = 24 * 7) -> pd.DataFrame:
+    """
+    Multi-seasonal decomposition of an hourly series.
+
+    The yearly cycle is removed first (see _yearly_component). Daily/weekly cycles
+    and the trend come from MSTL fitted on overlapping chunks of chunk_hours that
+    are cross-faded over overlap_hours, so the working memory of the fit depends on
+    the chunk size and not on how many years the series covers.
+
+    Returns a DataFrame with observed, trend, seasonal_<period>..., [seasonal_yearly], resid.
+    """
+    from statsmodels.tsa.seasonal import MSTL
+
+    periods = tuple(sorted(periods))
+    if chunk_hours < 2 * periods[-1]:
+        raise ValueError(f"chunk_hours must cover at least two periods of {periods[-1]} hours.")
+    if not 0 <= overlap_hours < chunk_hours:
+        raise ValueError("overlap_hours must be smaller than chunk_hours.")
+
+    # Regular hourly grid, gaps filled so every chunk is complete
+    hourly = regular_hourly(series)
+
+    yearly_part = _yearly_component(hourly) if yearly else None
+    values = (hourly - yearly_part).to_numpy() if yearly else hourly.to_numpy()
+
+    n = len(values)
+    names = ["trend"] + [f"seasonal_{p}" for p in periods]
+    acc = np.zeros((len(names), n))
+    weight = np.zeros(n)
+
+    starts = _chunk_starts(n, chunk_hours, chunk_hours - overlap_hours)
+    ramp = np.linspace(0.0, 1.0, overlap_hours + 2)[1:-1]
+    for i, start in enumerate(starts):
+        end = min(start + chunk_hours, n)
+        res = MSTL(values[start:end], periods=periods).fit()
+        seasonal = np.asarray(res.seasonal).reshape(end - start, -1)
+
+        # Trapezoid weights: fade in/out over the overlap with the neighbouring chunks
+        w = np.ones(end - start)
+        if i > 0 and overlap_hours:
+            w[:overlap_hours] = ramp
+        if i < len(starts) - 1 and overlap_hours:
+            w[-overlap_hours:] = np.minimum(w[-overlap_hours:], ramp[::-1])
+        acc[0, start:end] += w * np.asarray(res.trend)
+        acc[1:, start:end] += w * seasonal.T
+        weight[start:end] += w
+
+    comps = acc / weight
+    out = pd.DataFrame({"observed": hourly.to_numpy()}, index=hourly.index)
+    for name, col in zip(names, comps):
+        out[name] = col
+    if yearly:
+        out["seasonal_yearly"] = yearly_part.to_numpy()
+    out["resid"] = out["observed"] - out.drop(columns="observed").sum(axis=1)
+    return out
@@ -0,0 +1,134 @@
+# analysis/streaming.py
+# Online anomaly detection for hourly data that arrives one point at a time.
+#
+# Each series keeps a fixed, tiny state: a running median per hour-of-day slot
+# and one running mean absolute deviation of the residuals. Both are updated in
+# O(1) per point (a stochastic-approximation ("frugal") step for the median, an
+# exponential average for the deviation), so nothing is refitted when new data
+# lands. Circular
+# variables such as wind direction use angular residuals. detect_anomalies()
+# wraps this as a generator stage that can sit behind any loader yielding
+# dict records.
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pandas is imported where it is used, it is slow to load
+    import pandas as pd
+
+# Scale factor from the mean absolute deviation to a standard deviation for
+# normal data, sqrt(pi/2). The running deviation is an exponential *mean* of
+# |residual|, so the median-based MAD_TO_SIGMA (1.4826) would overstate sigma.
+MEAN_AD_TO_SIGMA = math.sqrt(math.pi / 2)
+
+# Scale floor as a fraction of |median|, so a series that was constant during
+# warm-up still gets a finite scale for its first deviation
+MIN_RELATIVE_SCALE = 0.01
+
+
+class StreamingAnomalyDetector:
+    """
+    Incremental median/mean-absolute-deviation detector for one series. The
+    deviation is kept in .mad (the name of the saved state field). period (e.g. 360 for a
+    direction in degrees) makes the series circular: residuals are taken the
+    short way round and the medians are kept in [0, period).
+    """
+
+    __slots__ = ("k", "alpha", "warmup", "season", "period", "median", "mad", "n")
+
+    def __init__(self, k: float = 4.0, alpha: float = 0.05, warmup: int = 48, season: int = 24,
+                 period: float | None = None):
+        self.k = k
+        self.alpha = alpha
+        self.warmup = warmup
+        self.season = season or 1
+        self.period = period
+        self.median: list[float | None] = [None] * self.season
+        self.mad = 0.0
+        self.n = 0
+
+    def update(self, value: float, slot: int = 0) -> tuple[float, bool]:
+        """Add one observation. Returns (robust z-score, is_anomaly)."""
+        slot %= self.season
+        if self.period:
+            value %= self.period
+        if self.median[slot] is None:
+            self.median[slot] = value
+        resid = value - self.median[slot]
+        if self.period:
+            resid = (resid + self.period / 2) % self.period - self.period / 2
+        scale = MEAN_AD_TO_SIGMA * max(self.mad, MIN_RELATIVE_SCALE * abs(self.median[slot]))
+        score = resid / scale if scale > 0 else 0.0
+        is_anomaly = self.n >= self.warmup and abs(score) > self.k
+
+        if self.n < self.warmup:
+            # Fast exponential start so the state settles in a couple of days
+            self.median[slot] += 0.2 * resid
+            self.mad += 0.2 * (abs(resid) - self.mad)
+        else:
+            # Frugal median step: move a fraction of the current deviation towards
+            # the data, so a spike moves the median by at most one step. The
+            # deviation is an additive exponential average, so it can grow again from zero
+            # after a constant stretch (a multiplicative step would stay at zero).
+            step = self.alpha * max(self.mad, 1e-9)
+            self.median[slot] += step if resid > 0 else -step if resid < 0 else 0.0
+            self.mad += self.alpha * (abs(resid) - self.mad)
+        if self.period:
+            self.median[slot] %= self.period
+        self.n += 1
+        return score, is_anomaly
+
+    def state(self) -> dict:
+        return {"median": list(self.median), "mad": self.mad, "n": self.n}
+
+    def load_state(self, state: dict) -> StreamingAnomalyDetector:
+        self.median = list(state["median"])
+        self.mad = state["mad"]
+        self.n = state["n"]
+        return self
+
+
+def detect_anomalies(records: Iterable[dict], value_cols: list[str], key_cols: tuple[str, ...] = (),
+                     time_col: str = "time", detectors: dict | None = None, circular: Iterable[str] = (),
+                     **params) -> Iterator[dict]:
+    """
+    Generator stage: yields every record with <col>_score and <col>_anomaly added
+    for each value column. Records are dicts (DataFrame rows, Mongo documents, ...).
+    Columns in circular are directions in degrees (period 360).
+
+    One detector is kept per (key, column). Pass the same detectors dict to later
+    calls to continue from the saved state when more data is ingested.
+    """
+    if detectors is None:
+        detectors = {}
+    season = params.get("season", 24)
+    for rec in records:
+        key = tuple(rec[c] for c in key_cols)
+        hour = getattr(rec.get(time_col), "hour", 0)
+        for col in value_cols:
+            value = rec.get(col)
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                continue
+            det = detectors.get((key, col))
+            if det is None:
+                period = 360.0 if col in circular else None
+                det = detectors[(key, col)] = StreamingAnomalyDetector(period=period, **params)
+            score, is_anomaly = det.update(float(value), hour if season else 0)
+            rec[f"{col}_score"] = score
+            rec[f"{col}_anomaly"] = is_anomaly
+        yield rec
+
+
+def iter_records(df: pd.DataFrame, chunk_size: int = 10_000) -> Iterator[dict]:
+    """Yield DataFrame rows as dicts, a chunk at a time (adapter for the data loaders)."""
+    for start in range(0, len(df), chunk_size):
+        yield from df.iloc[start:start + chunk_size].to_dict("records")
+
+
+def only_anomalies(records: Iterable[dict], value_cols: list[str]) -> Iterator[dict]:
+    """Generator stage that passes on records flagged in any of value_cols."""
+    for rec in records:
+        if any(rec.get(f"{col}_anomaly") for col in value_cols):
+            yield rec
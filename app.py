@@ -1,6 +1,6 @@
 import streamlit as st
 import utils as ut
-from pymongo.mongo_client import MongoClient
+import datasets as ds
 
 
 # Apply custom CSS and show sidebar
@@ -69,9 +69,9 @@ with col3:
     if st.button("📉 SARIMAX Forecasting"):
         st.switch_page("pages/8_ Forecasting SARIMAX.py")
 # DATA PRELOADING
-df = st.session_state.get("df")
+token = st.session_state.get("dataset_token")
 
-if df is None:
+if token is None or not ds.is_registered(token):
     with st.spinner("Fetching data..."):
         #production_df = ut.load_data_from_mongo(db_name="indra", collection_name="production_per_group")
         #df = ut.load_data_from_csv(file_path="No_sync/P_Energy.csv")
@@ -0,0 +1,3 @@
+# batch
+# Headless jobs that precompute results for the pages.
+# Run from the repository root, e.g.  python -m batch.stl production
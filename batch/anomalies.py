@@ -0,0 +1,78 @@
+# batch/anomalies.py
+# Anomaly scan over every price area × energy group series.
+#
+#     python -m batch.anomalies production
+#     python -m batch.anomalies consumption --source export.parquet --k 4 --proportion 0.001
+#
+# Each series is scanned with DCT-SPC and LOF (analysis.outliers.scan_series)
+# in a process pool. Flagged hours and their scores are written to
+# results/anomalies/<dataset token>/<area>_<group>.parquet, which the
+# Outliers page reads instead of refitting anything live.
+import argparse
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import results_store as rs
+from analysis.outliers import scan_series
+from analysis.stl import regular_hourly, select_series
+from batch.common import check_failures, default_workers, load_energy, main
+
+log = logging.getLogger(__name__)
+
+SCAN_DEFAULTS = {"freq_cutoff": 10, "k": 4.0, "proportion": 0.001}
+
+
+def scan_and_store(series, area, group, path, params):
+    """Worker task: scan one series and write the flagged hours to path."""
+    flagged = scan_series(regular_hourly(series), **params)
+    flagged.insert(0, "energyGroup", group)
+    flagged.insert(0, "priceArea", area)
+    rs.write_frame(flagged, path)
+    return len(flagged)
+
+
+def run(dataset_type, source=None, workers=None, overwrite=False, **params):
+    """Scan every area × group series that has no stored result yet."""
+    params = {**SCAN_DEFAULTS, **params}
+    df, token = load_energy(dataset_type, source)
+    workers = workers or default_workers()
+
+    start = time.perf_counter()
+    flagged = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for (area, group), sub in df.groupby([df["priceArea"], df["energyGroup"].str.lower()], sort=True):
+            path = rs.anomalies_path(token, area, group)
+            if path.exists() and not overwrite:
+                continue
+            series = select_series(sub, area, group)
+            if series.empty:
+                continue
+            futures[pool.submit(scan_and_store, series, area, group, path, params)] = (area, group)
+        for future in as_completed(futures):
+            area, group = futures[future]
+            try:
+                flagged += future.result()
+            except Exception as e:
+                failed += 1
+                log.error("Anomaly scan failed for %s/%s: %s", area, group, e)
+
+    log.info("%s (%s): %d series scanned, %d flagged hours in %.1fs on %d workers", dataset_type, token,
+             len(futures) - failed, flagged, time.perf_counter() - start, workers)
+    check_failures(failed, len(futures), "anomaly scans")
+    return token
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan every area × group energy series for anomalies.")
+    parser.add_argument("dataset", choices=["production", "consumption"])
+    parser.add_argument("--source", help="parquet/csv export instead of MongoDB")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--overwrite", action="store_true")
+    parser.add_argument("--freq-cutoff", type=int, default=SCAN_DEFAULTS["freq_cutoff"])
+    parser.add_argument("--k", type=float, default=SCAN_DEFAULTS["k"])
+    parser.add_argument("--proportion", type=float, default=SCAN_DEFAULTS["proportion"])
+    args = parser.parse_args()
+    main(lambda: run(args.dataset, source=args.source, workers=args.workers, overwrite=args.overwrite,
+                     freq_cutoff=args.freq_cutoff, k=args.k, proportion=args.proportion))
@@ -0,0 +1,52 @@
+# batch/common.py
+# Shared helpers for the batch jobs.
+import logging
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+import datasets as ds
+
+
+def load_energy(dataset_type, source=None):
+    """
+    Load an energy dataset and its version token.
+    Without source the data comes from MongoDB exactly as the Map page loads it,
+    so results line up with the token the app computes. A parquet/csv export
+    can be passed instead for offline runs.
+    """
+    if source is None:
+        import utils as ut  # imports streamlit, keep it out of the worker processes
+        df = ut.load_energy_data(dataset_type)
+    else:
+        path = Path(source)
+        df = pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_csv(path)
+        df = ds.normalize_columns(df)
+        df["quantityKwh"] = pd.to_numeric(df["quantityKwh"], errors="coerce")
+        df["startTime"] = pd.to_datetime(df["startTime"], utc=True)
+    return df, ds.content_token(df, dataset_type)
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+class BatchError(RuntimeError):
+    """Some tasks of a batch run failed (each one is logged)."""
+
+
+def check_failures(failed, total, what):
+    if failed:
+        raise BatchError(f"{failed} of {total} {what} failed")
+
+
+def main(run_all):
+    """CLI entry point: log to stderr, call run_all() and exit with 1 if tasks failed."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        run_all()
+    except BatchError as e:
+        logging.getLogger("batch").error("%s", e)
+        sys.exit(1)
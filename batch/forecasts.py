@@ -0,0 +1,195 @@
+# batch/forecasts.py
+# Nightly forecast precomputation for every price area × energy group.
+#
+#     python -m batch.forecasts                       # production and consumption
+#     python -m batch.forecasts consumption --source export.parquet --workers 8
+#
+# Each series gets a SARIMAX fit on its most recent train_days, with the
+# forecasting page's default hyperparameters. The point forecast and interval
+# go to results/forecasts/<dataset token>/<area>_<group>.parquet with a JSON
+# sidecar (hyperparameters, training window, AIC/BIC, fit time), and the
+# fitted model goes to the model registry. The page shows the stored
+# forecast straight away and only fits live for custom settings.
+#
+# With --update, a series that already has a forecast from an earlier
+# version of the dataset is not refitted: its stored model is filtered over
+# the new hours only (parameters fixed), which takes milliseconds. A full
+# refit happens only when the model's one-step errors on the new hours
+# drift past --drift-threshold (RMS of the standardized errors).
+import argparse
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+import model_registry as registry
+import results_store as rs
+from analysis import forecasting as fc
+from analysis.stl import regular_hourly, select_series
+from batch.common import BatchError, check_failures, default_workers, load_energy, main
+
+log = logging.getLogger(__name__)
+
+FORECAST_DEFAULTS = {
+    "order": (1, 1, 1),
+    "seasonal_order": (1, 0, 1, 24),
+    "train_days": 365,
+    "horizon": 720,
+    "alpha": 0.05,
+    "drift_threshold": 2.0,
+}
+
+
+def _store(results, y, area, group, token, path, params, key, **meta):
+    """Forecast from results (which have seen all of y) and write frame, metadata and model."""
+    mean, conf_int = fc.forecast(results, y, None, params["horizon"], params["alpha"])
+    registry.save(key, results, fit_seconds=meta["fit_seconds"], source="batch.forecasts",
+                  aic=meta["aic"], bic=meta["bic"])
+    frame = pd.DataFrame({"time": mean.index, "forecast": mean.to_numpy(),
+                          "lower": conf_int.iloc[:, 0].to_numpy(), "upper": conf_int.iloc[:, 1].to_numpy()})
+    rs.write_frame(frame, path)
+    rs.write_meta({
+        "area": area,
+        "group": group,
+        "dataset": token,
+        "engine": "SARIMAX",
+        "order": list(params["order"]),
+        "seasonal_order": list(params["seasonal_order"]),
+        "alpha": params["alpha"],
+        "train_start": key["train_start"],
+        "train_end": key["train_end"],
+        "model": registry.key_id(key),
+        "created": time.time(),
+        **meta,
+    }, path)
+
+
+def forecast_and_store(series, area, group, token, path, params):
+    """Worker task: fit one series on its last train_days and store the forecast."""
+    y = regular_hourly(series)
+    y = y[y.index > y.index[-1] - pd.Timedelta(days=params["train_days"])]
+    results, seconds = fc.fit_sarimax(y, None, params["order"], params["seasonal_order"])
+    key = registry.model_key(area, group, token, y.index[0], y.index[-1],
+                             params["order"], params["seasonal_order"])
+    _store(results, y, area, group, token, path, params, key,
+           aic=float(results.aic), bic=float(results.bic), fit_seconds=seconds,
+           fitted_on=token, updates=0, drift=None)
+    return "fit", seconds
+
+
+def update_and_store(series, area, group, token, path, params, previous):
+    """
+    Worker task: filter the stored model of an earlier dataset version over the
+    new hours only. The training window slides forward by the new hours, so
+    it stays train_days long like a fresh fit (the filter state carries the
+    older hours). Falls back to a full refit when the model is missing, there
+    are no new hours, the new hours span more than the window, or the drift
+    exceeds the threshold.
+    """
+    start = time.perf_counter()
+    y = regular_hourly(series)
+    y = y[y.index > y.index[-1] - pd.Timedelta(days=params["train_days"])]
+    previous_end = pd.Timestamp(previous["train_end"])
+    y_new = y[y.index > previous_end]
+    results = registry.load_id(previous["model"]) if len(y_new) and previous_end >= y.index[0] else None
+    if results is None:
+        return forecast_and_store(series, area, group, token, path, params)
+
+    updated, drift = fc.update_results(results, y_new)
+    if drift > params["drift_threshold"]:
+        log.info("%s/%s: drift %.2f > %s, refitting", area, group, drift, params["drift_threshold"])
+        return forecast_and_store(series, area, group, token, path, params)
+
+    key = registry.model_key(area, group, token, y.index[0], y.index[-1],
+                             params["order"], params["seasonal_order"])
+    _store(updated, y, area, group, token, path, params, key,
+           aic=previous["aic"], bic=previous["bic"], fit_seconds=previous["fit_seconds"],
+           fitted_on=previous["fitted_on"], updates=previous["updates"] + 1, drift=drift,
+           update_seconds=time.perf_counter() - start)
+    return "update", time.perf_counter() - start
+
+
+def previous_forecast(dataset_type, area, group, token):
+    """Metadata of the newest stored forecast of this series from another dataset version."""
+    folder = Path(rs.RESULTS_DIR) / "forecasts"
+    metas = [rs.read_meta(p) for p in folder.glob(f"{dataset_type}-*/{area}_{group.lower()}.json")
+             if p.parent.name != token]
+    return max(metas, key=lambda m: pd.Timestamp(m["train_end"]), default=None)
+
+
+def run(dataset_type, source=None, workers=None, overwrite=False, update=False, **params):
+    """
+    Forecast every area × group series that has no stored forecast yet. With
+    update, series forecast from an earlier dataset version are updated in place
+    of a refit.
+    """
+    params = {**FORECAST_DEFAULTS, **params}
+    df, token = load_energy(dataset_type, source)
+    workers = workers or default_workers()
+
+    start = time.perf_counter()
+    counts, seconds = {"fit": 0, "update": 0}, {"fit": 0.0, "update": 0.0}
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for (area, group), sub in df.groupby([df["priceArea"], df["energyGroup"].str.lower()], sort=True):
+            path = rs.forecast_path(token, area, group)
+            if path.exists() and not overwrite:
+                continue
+            series = select_series(sub, area, group)
+            if len(series) < 2 * params["seasonal_order"][3]:
+                continue
+            previous = previous_forecast(dataset_type, area, group, token) if update else None
+            if previous is not None:
+                future = pool.submit(update_and_store, series, area, group, token, path, params, previous)
+            else:
+                future = pool.submit(forecast_and_store, series, area, group, token, path, params)
+            futures[future] = (area, group)
+        for future in as_completed(futures):
+            area, group = futures[future]
+            try:
+                kind, took = future.result()
+                counts[kind] += 1
+                seconds[kind] += took
+            except Exception as e:
+                failed += 1
+                log.error("Forecast failed for %s/%s: %s", area, group, e)
+
+    log.info("%s (%s): %d series fitted (%.1fs), %d updated (%.2fs) in %.1fs on %d workers", dataset_type,
+             token, counts["fit"], seconds["fit"], counts["update"], seconds["update"],
+             time.perf_counter() - start, workers)
+    check_failures(failed, len(futures), "forecasts")
+    return token
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute forecasts for every area × group series.")
+    parser.add_argument("datasets", nargs="*", choices=["production", "consumption"],
+                        default=["production", "consumption"])
+    parser.add_argument("--source", help="parquet/csv export instead of MongoDB (one dataset only)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--overwrite", action="store_true")
+    parser.add_argument("--train-days", type=int, default=FORECAST_DEFAULTS["train_days"])
+    parser.add_argument("--horizon", type=int, default=FORECAST_DEFAULTS["horizon"])
+    parser.add_argument("--update", action="store_true",
+                        help="filter stored models over new hours instead of refitting")
+    parser.add_argument("--drift-threshold", type=float, default=FORECAST_DEFAULTS["drift_threshold"])
+    args = parser.parse_args()
+    if args.source and len(args.datasets) != 1:
+        parser.error("--source needs exactly one dataset")
+
+    def run_all():
+        failures = []
+        for dataset in args.datasets:  # one dataset failing does not stop the other
+            try:
+                run(dataset, source=args.source, workers=args.workers, overwrite=args.overwrite,
+                    update=args.update, train_days=args.train_days, horizon=args.horizon,
+                    drift_threshold=args.drift_threshold)
+            except BatchError as e:
+                failures.append(f"{dataset}: {e}")
+        if failures:
+            raise BatchError("; ".join(failures))
+
+    main(run_all)
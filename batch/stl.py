@@ -0,0 +1,125 @@
+# batch/stl.py
+# Precompute STL components for every price area × energy group × year.
+#
+#     python -m batch.stl production
+#     python -m batch.stl consumption --source export.parquet --workers 8
+#     python -m batch.stl production --mstl      # multi-seasonal, full series per area × group
+#
+# Components are written to the parquet store (results_store.py), one file per
+# combination. The STL page only reads these files; a combination that is
+# missing is computed lazily in the background with submit_missing().
+import argparse
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import jobs
+import results_store as rs
+from analysis.stl import MSTL_DEFAULTS, STL_DEFAULTS, mstl_components, select_series, stl_components
+from batch.common import check_failures, default_workers, load_energy, main
+
+log = logging.getLogger(__name__)
+
+
+def decompose_and_store(series, path, params, method="stl"):
+    """Worker task: decompose one series and write it to path."""
+    decompose = mstl_components if method == "mstl" else stl_components
+    rs.write_frame(decompose(series, **params), path)
+    return str(path)
+
+
+def _defaults(method):
+    return MSTL_DEFAULTS if method == "mstl" else STL_DEFAULTS
+
+
+def result_path(token, area, group, year, method="stl", **params):
+    """Store path of one decomposition; MSTL always covers the full series (year is ignored)."""
+    params = {**_defaults(method), **params}
+    if method == "mstl":
+        return rs.mstl_path(token, area, group, **params)
+    return rs.stl_path(token, area, group, year, **params)
+
+
+def iter_tasks(df, token, params, overwrite=False, method="stl"):
+    """Yield (key, series, path) for every area/group(/year for STL) combination in df."""
+    groups = df["energyGroup"].str.lower()
+    keys = [df["priceArea"], groups]
+    if method != "mstl":
+        keys.append(df["startTime"].dt.year)
+    for key, sub in df.groupby(keys, sort=True):
+        area, group, year = (*key, None)[:3]
+        path = result_path(token, area, group, year, method, **params)
+        if path.exists() and not overwrite:
+            continue
+        series = select_series(sub, area, group)
+        if series.empty:
+            continue
+        yield (area, group, year), series, path
+
+
+def run(dataset_type, source=None, workers=None, overwrite=False, method="stl", **params):
+    """Decompose every missing combination across a process pool."""
+    params = {**_defaults(method), **params}
+    df, token = load_energy(dataset_type, source)
+    workers = workers or default_workers()
+
+    start = time.perf_counter()
+    done = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(decompose_and_store, series, path, params, method): key
+            for key, series, path in iter_tasks(df, token, params, overwrite, method)
+        }
+        for future in as_completed(futures):
+            area, group, year = futures[future]
+            try:
+                future.result()
+                done += 1
+            except Exception as e:
+                failed += 1
+                log.error("%s failed for %s/%s/%s: %s", method.upper(), area, group, year, e)
+
+    log.info("%s (%s): %d/%d %s decompositions in %.1fs on %d workers", dataset_type, token, done,
+             len(futures), method.upper(), time.perf_counter() - start, workers)
+    check_failures(failed, len(futures), f"{method.upper()} decompositions")
+    return token
+
+
+# -----------------------------
+# Lazy background computation for the page
+# -----------------------------
+def job_key(path):
+    return ("stl", str(path))
+
+
+def submit_missing(df, token, area, group, year, method="stl", **params):
+    """
+    Start computing one combination as a background job (jobs.py) unless it is
+    stored already. Returns the job, or None when nothing had to be done.
+    Failed and cancelled jobs are returned as they are, so the page can show
+    them; jobs.forget(job.key) allows a retry.
+    """
+    params = {**_defaults(method), **params}
+    path = result_path(token, area, group, year, method, **params)
+    if path.exists():
+        return None
+    job = jobs.get(job_key(path))
+    if job is not None:
+        return job
+    series = select_series(df, area, group, None if method == "mstl" else year)
+    if series.empty:
+        raise ValueError(f"No data found for area '{area}' and group '{group}'.")
+    return jobs.submit(job_key(path), decompose_and_store, series, path, params, method,
+                       label=f"{method.upper()} {area}/{group}/{year if method == 'stl' else 'all'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute STL components for every area × group × year.")
+    parser.add_argument("dataset", choices=["production", "consumption"])
+    parser.add_argument("--source", help="parquet/csv export instead of MongoDB")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--overwrite", action="store_true")
+    parser.add_argument("--mstl", action="store_true", help="multi-seasonal decomposition of the full series")
+    args = parser.parse_args()
+    main(lambda: run(args.dataset, source=args.source, workers=args.workers, overwrite=args.overwrite,
+                     method="mstl" if args.mstl else "stl"))
@@ -0,0 +1,3 @@
+# benchmarks
+# Standalone benchmark scripts, run from the repository root, e.g.
+#     python -m benchmarks.bench_mstl
@@ -0,0 +1,24 @@
+# benchmarks/_timing.py
+# Time and peak memory of one kernel call, shared by the benchmark scripts.
+import time
+import tracemalloc
+
+
+def measure(func, *args, repeat=0, **kwargs):
+    """
+    (seconds, peak MiB) of func(*args, **kwargs). Seconds is the best of repeat
+    plain runs; peak memory comes from one extra run under tracemalloc, which is
+    also the timed run when repeat is 0 (slow kernels run only once).
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    traced = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times, default=traced), peak / 2**20
@@ -0,0 +1,54 @@
+# benchmarks/bench_forecast.py
+# Fit time and one-week accuracy of the forecasting engines against SARIMAX.
+#
+#     python -m benchmarks.bench_forecast
+#     python -m benchmarks.bench_forecast --years 1 2 --weekly-sarimax   # also SARIMAX with s = 168 (very slow)
+#
+# Each engine is trained on all but the last horizon hours of a synthetic
+# series and scored on those hours (MAE, RMSE and 95% interval coverage).
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+from analysis import fast_forecast as ff
+from analysis import forecasting as fc
+from benchmarks.synthetic import hourly_energy_series
+
+
+def sarimax_engine(seasonal_order, order=(1, 1, 1)):
+    def run(y, X, horizon):
+        start = time.perf_counter()
+        results, _ = fc.fit_sarimax(y, X, order, seasonal_order)
+        mean, conf_int = fc.forecast(results, y, X, horizon)
+        return mean, conf_int, time.perf_counter() - start
+    return run
+
+
+def main(years_list, horizon, weekly_sarimax):
+    engines = {"SARIMAX (1,1,1)(1,0,1,24)": sarimax_engine((1, 0, 1, 24))}
+    if weekly_sarimax:
+        engines["SARIMAX (1,1,1)(1,0,1,168)"] = sarimax_engine((1, 0, 1, 168))
+    engines.update(ff.ENGINES)
+
+    print(f"{'years':>5} {'engine':<45} {'seconds':>8} {'MAE':>8} {'RMSE':>8} {'coverage':>8}")
+    for years in years_list:
+        series = hourly_energy_series(years)
+        train, test = series.iloc[:-horizon], series.iloc[-horizon:].to_numpy()
+        for name, engine in engines.items():
+            mean, conf_int, seconds = engine(train, None, horizon)
+            err = test - mean.to_numpy()
+            inside = (test >= conf_int.iloc[:, 0].to_numpy()) & (test <= conf_int.iloc[:, 1].to_numpy())
+            print(f"{years:>5} {name:<45} {seconds:>8.2f} {np.abs(err).mean():>8.1f} "
+                  f"{np.sqrt((err ** 2).mean()):>8.1f} {inside.mean():>8.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark forecasting engines against SARIMAX.")
+    parser.add_argument("--years", type=float, nargs="+", default=[0.25, 1, 3])
+    parser.add_argument("--horizon", type=int, default=168)
+    parser.add_argument("--weekly-sarimax", action="store_true")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+    main(args.years, args.horizon, args.weekly_sarimax)
@@ -0,0 +1,273 @@
+# benchmarks/bench_load.py
+# Concurrent-session load test of the Streamlit pages, driven headless by AppTest.
+#
+#     python -m benchmarks.bench_load                          # 4 concurrent sessions, 1 round
+#     python -m benchmarks.bench_load --sessions 8 --rounds 3 --latency 0.2
+#     python -m benchmarks.bench_load --engine "Seasonal naive (weekly)" --json load.json
+#
+# Every session follows SESSION: open the Map page, select a price area (the
+# rerun a map click triggers), then visit the Energy, Correlation, STL,
+# Outliers and Forecast pages and press Run Forecast. Sessions spread over
+# the five areas. --sessions of them run at once in threads of this process,
+# sharing its caches and dataset registry as the sessions of one Streamlit
+# server do, each running --rounds sessions back to back.
+#
+# MongoDB, Open-Meteo and the NVE price-area download are replaced by the
+# local stand-ins of benchmarks/stand_ins.py (--latency seconds per backend
+# call); results and models go to a temporary IND320_RESULTS_DIR.
+#
+# Reported: latency percentiles per page step, page views and sessions per
+# second, resident memory (start, peak, end), cache sizes and the number of
+# backend calls. Caches start cold unless --warmup runs one session first.
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MAP = "pages/1_Map_And_Selector.py"
+
+# (step name, page script, action before the run)
+SESSION = [
+    ("Map", MAP, None),
+    ("Map: select area", MAP, "select_area"),
+    ("Energy", "pages/4_Energy Production.py", None),
+    ("Correlation", "pages/3_Sliding_Window_Correlation.py", None),
+    ("STL", "pages/5_STL and Spectrogram.py", None),
+    ("Outliers", "pages/7_Outliers and Anomalies.py", None),
+    ("Forecast", "pages/8_ Forecasting SARIMAX.py", None),
+    ("Forecast: run", "pages/8_ Forecasting SARIMAX.py", "run_forecast"),
+]
+
+
+def rss_mib():
+    """Resident memory of this process in MiB (Linux /proc; peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return peak_rss_mib()
+
+
+def peak_rss_mib():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class MemorySampler(threading.Thread):
+    """Samples resident memory every interval seconds and keeps the peak."""
+
+    def __init__(self, interval=0.1):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = rss_mib()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, rss_mib())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.peak
+
+
+def allow_concurrent_apptests():
+    """
+    AppTest is written for one test at a time; make concurrent runs in threads safe.
+
+    - Every run installs a mock Runtime singleton and resets it to None when it
+      ends, pulling it from under the runs still going. Runtime.instance() and
+      exists() fall back to the last installed one instead.
+    - Every run also resets the class-level PagesManager.uses_pages_directory,
+      and a run that reads it while reset executes app.py instead of its page.
+      This app always uses the pages/ directory, so the script runner is
+      given a PagesManager that says so.
+    - Every AppTest has its own script cache, so concurrent sessions parse the
+      same pages at once (a server shares one cache), and concurrent ast.parse
+      calls can fail on Python 3.11. Parsing is serialized.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.pages_manager import PagesManager
+    from streamlit.runtime.scriptrunner import magic, script_runner
+
+    last = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            last["runtime"] = cls._instance
+        runtime = cls._instance or last.get("runtime")
+        if runtime is None:
+            raise RuntimeError("Runtime hasn't been created!")
+        return runtime
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or "runtime" in last)
+
+    class PagesDirectory(PagesManager):
+        uses_pages_directory = True
+
+    script_runner.PagesManager = PagesDirectory
+
+    lock, add_magic = threading.Lock(), magic.add_magic
+
+    def locked_add_magic(*args, **kwargs):
+        with lock:
+            return add_magic(*args, **kwargs)
+
+    magic.add_magic = locked_add_magic
+
+
+def run_session(area, centroid, engine, think=0.0):
+    """One scripted session; returns a list of step records (step, seconds, error)."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(Path(__file__).resolve().parent.parent / "app.py"), default_timeout=1800)
+    records = []
+    for step, page, action in SESSION:
+        at.switch_page(page)
+        if action == "select_area":
+            at.session_state["selected_area"] = area
+            at.session_state["selected_coords"] = centroid
+        start = time.perf_counter()
+        try:
+            if action == "run_forecast":
+                _widget(at.selectbox, "Forecasting engine").select(engine)
+                _widget(at.button, "Run Forecast").click()
+            at.run()
+            error = at.exception[0].value.splitlines()[0][:120] if at.exception else None
+        except Exception as e:  # a widget missing because the page stopped early, a timeout
+            error = f"{type(e).__name__}: {e}"[:120]
+        records.append({"step": step, "seconds": time.perf_counter() - start, "error": error})
+        if think:
+            time.sleep(think)
+    return records
+
+
+def _widget(widgets, label):
+    for w in widgets:
+        if w.label == label:
+            return w
+    raise LookupError(f"no widget labelled {label!r}")
+
+
+def run(sessions, rounds, engine, centroids, think=0.0):
+    """Run sessions concurrent workers, rounds sessions each; returns (records, wall seconds)."""
+    areas = sorted(centroids)
+    records, lock = [], threading.Lock()
+
+    def worker(w):
+        for r in range(rounds):
+            area = areas[(w + r * sessions) % len(areas)]
+            session = run_session(area, centroids[area], engine, think)
+            with lock:
+                records.extend({**rec, "worker": w, "round": r, "area": area} for rec in session)
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(sessions)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return pd.DataFrame(records), time.perf_counter() - start
+
+
+def latency_table(records):
+    """Per step: views, errors and latency percentiles, in session order."""
+    order = {step: i for i, (step, _, _) in enumerate(SESSION)}
+    table = records.groupby("step").agg(
+        views=("seconds", "size"),
+        errors=("error", lambda e: int(e.notna().sum())),
+        mean_s=("seconds", "mean"),
+        p50_s=("seconds", lambda x: np.percentile(x, 50)),
+        p90_s=("seconds", lambda x: np.percentile(x, 90)),
+        p95_s=("seconds", lambda x: np.percentile(x, 95)),
+        max_s=("seconds", "max"),
+    )
+    return table.sort_index(key=lambda idx: idx.map(order)).reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent sessions")
+    parser.add_argument("--rounds", type=int, default=1, help="sessions run back to back by each worker")
+    parser.add_argument("--years", type=float, default=1.0, help="years of stand-in energy data")
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per MongoDB/Open-Meteo call")
+    parser.add_argument("--engine", default="SARIMAX", help="forecasting engine selected before Run Forecast")
+    parser.add_argument("--think", type=float, default=0.0, help="pause between page views (seconds)")
+    parser.add_argument("--warmup", action="store_true", help="run one session before measuring (warm caches)")
+    parser.add_argument("--json", help="also write the summary and per-view records to this file")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    workdir = tempfile.mkdtemp(prefix="ind320-load-")
+    os.environ["IND320_RESULTS_DIR"] = str(Path(workdir) / "results")  # before results_store is imported
+
+    import cache
+    import datasets as ds
+    from benchmarks import stand_ins
+
+    allow_concurrent_apptests()
+    centroids = stand_ins.install_geo_assets(Path(workdir) / "assets")
+    mongo, meteo = stand_ins.install_backends(args.years, args.latency)
+    if args.warmup:
+        area = sorted(centroids)[0]
+        run_session(area, centroids[area], args.engine)
+
+    rss_start = rss_mib()
+    sampler = MemorySampler()
+    sampler.start()
+    records, wall = run(args.sessions, args.rounds, args.engine, centroids, args.think)
+    rss_peak = sampler.stop()
+    meteo.close()
+
+    table = latency_table(records)
+    n_sessions = args.sessions * args.rounds
+    summary = {
+        "sessions": n_sessions,
+        "concurrency": args.sessions,
+        "wall_s": wall,
+        "page_views_per_s": len(records) / wall,
+        "sessions_per_min": 60 * n_sessions / wall,
+        "errors": int(records["error"].notna().sum()),
+        "rss_start_mib": rss_start,
+        "rss_peak_mib": rss_peak,
+        "rss_end_mib": rss_mib(),
+        "cache_mib": sum(s["bytes"] for s in cache.stats()) / cache.MiB,
+        "datasets_mib": sum(ds.memory_usage().values()) / cache.MiB,
+        "mongo_calls": mongo.calls,
+        "open_meteo_calls": meteo.calls,
+    }
+
+    print(table.to_string(index=False, float_format="{:.2f}".format))
+    print()
+    print(f"{n_sessions} sessions ({args.sessions} concurrent) in {wall:.1f} s: "
+          f"{summary['page_views_per_s']:.2f} page views/s, {summary['sessions_per_min']:.1f} sessions/min, "
+          f"{summary['errors']} errors")
+    print(f"memory: {rss_start:.0f} MiB at start, {rss_peak:.0f} MiB peak, {summary['rss_end_mib']:.0f} MiB at end "
+          f"(caches {summary['cache_mib']:.0f} MiB, datasets {summary['datasets_mib']:.0f} MiB)")
+    print(f"backend calls: MongoDB {mongo.calls}, Open-Meteo {meteo.calls}")
+    errors = records[records["error"].notna()].drop_duplicates("step")
+    for _, row in errors.iterrows():
+        print(f"  {row['step']}: {row['error']}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "summary": summary,
+            "steps": table.to_dict("records"),
+            "views": records.to_dict("records"),
+        }, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+# benchmarks/bench_lof.py
+# Time and peak memory of the multivariate LOF at 1, 10 and 80 years of hourly weather.
+#
+#     python -m benchmarks.bench_lof
+#     python -m benchmarks.bench_lof --years 1 10 --max-fit 100000
+import argparse
+
+from analysis.outliers import LOF_FEATURES, LOF_MAX_FIT, lof_scores
+from benchmarks._timing import measure
+from benchmarks.synthetic import hourly_weather_frame
+
+
+def main(years_list, max_fit, n_jobs):
+    print(f"{'years':>5} {'rows':>8} {'fit rows':>9} {'seconds':>9} {'peak MiB':>9}")
+    for years in years_list:
+        df = hourly_weather_frame(years)
+        X = df[LOF_FEATURES].to_numpy()
+        seconds, peak = measure(lof_scores, X, max_fit=max_fit, strata=df["time"].dt.month.to_numpy(), n_jobs=n_jobs)
+        print(f"{years:>5} {len(df):>8} {min(len(df), max_fit):>9} {seconds:>9.1f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark multivariate LOF anomaly detection.")
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 10, 80])
+    parser.add_argument("--max-fit", type=int, default=LOF_MAX_FIT)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+    main(args.years, args.max_fit, args.n_jobs)
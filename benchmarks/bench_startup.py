@@ -0,0 +1,133 @@
+# benchmarks/bench_startup.py
+# Cold-start cost of app.py and every page, each measured in a fresh interpreter.
+#
+#     python -m benchmarks.bench_startup                   # all pages, best of 3
+#     python -m benchmarks.bench_startup --pages app.py "pages/5_Table.py" --repeat 5
+#     python -m benchmarks.bench_startup --json startup.json
+#
+# import_s       time to run the script's top-level imports (what a new
+#                server process pays before the page can start)
+# first_paint_s  time of the first AppTest run of the script, imports
+#                included, with MongoDB and Open-Meteo replaced by the local
+#                stand-ins of benchmarks/stand_ins.py and the session seeded
+#                as if the Map page had been visited
+#
+# Before the timer starts, a measuring interpreter has imported only
+# streamlit (paid once per server, not per page), streamlit.testing for the
+# first paint, and the standard library modules this script and
+# benchmarks/stand_ins.py use. The stand-in data is written once by the
+# parent; the child patches utils right after the app imports it, and the
+# time spent patching is subtracted from first_paint_s.
+import argparse
+import ast
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+SCRIPTS = ["app.py"] + sorted(str(p.relative_to(REPO_ROOT)) for p in (REPO_ROOT / "pages").glob("*.py"))
+
+
+def import_block(script):
+    """The top-level import statements of a script, as source."""
+    tree = ast.parse((REPO_ROOT / script).read_text(encoding="utf-8"))
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def _child(mode, script, snapshot_dir):
+    """Run one measurement in a fresh interpreter and return its JSON result."""
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child", mode, script,
+                          "--snapshot", str(snapshot_dir)],
+                         cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _check_clean():
+    """Fail if app modules or their heavy dependencies were imported before timing."""
+    early = [m for m in ("pandas", "numpy", "utils", "datasets") if m in sys.modules]
+    if early:
+        raise RuntimeError(f"imported before timing: {', '.join(early)}")
+
+
+def measure_imports(script):
+    import streamlit  # noqa: F401
+
+    block = import_block(script)
+    _check_clean()
+    start = time.perf_counter()
+    exec(block, {})
+    return {"seconds": time.perf_counter() - start}
+
+
+def measure_first_paint(script, snapshot_dir):
+    import warnings
+
+    from streamlit.testing.v1 import AppTest
+
+    from benchmarks import stand_ins
+
+    warnings.filterwarnings("ignore")
+    session, stand_in_cost = stand_ins.install_on_import(snapshot_dir)
+    # Pages are opened through the entry script so their st.page_link/switch_page targets resolve
+    at = AppTest.from_file(str(REPO_ROOT / "app.py"), default_timeout=600)
+    if script != "app.py":
+        at.switch_page(script)
+    for key, value in session.items():
+        at.session_state[key] = value
+    _check_clean()
+    start = time.perf_counter()
+    at.run()
+    seconds = time.perf_counter() - start - stand_in_cost["seconds"]
+    error = at.exception[0].value.splitlines()[0][:80] if at.exception else None
+    return {"seconds": seconds, "error": error}
+
+
+def run(scripts, repeat=3):
+    import pandas as pd
+
+    from benchmarks import stand_ins
+
+    snapshot_dir = stand_ins.snapshot(tempfile.mkdtemp(prefix="ind320-startup-"))
+    rows = []
+    for script in scripts:
+        imports = [_child("imports", script, snapshot_dir)["seconds"] for _ in range(repeat)]
+        paints = [_child("paint", script, snapshot_dir) for _ in range(repeat)]
+        rows.append({
+            "script": script,
+            "import_s": min(imports),
+            "first_paint_s": min(p["seconds"] for p in paints),
+            "error": paints[0]["error"],
+        })
+        print(f"{script:<40} import {rows[-1]['import_s']:6.2f}s   first paint {rows[-1]['first_paint_s']:6.2f}s",
+              file=sys.stderr)
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", nargs="+", default=SCRIPTS, help="scripts relative to the repo root")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per measurement (best is kept)")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "SCRIPT"), help=argparse.SUPPRESS)
+    parser.add_argument("--snapshot", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        mode, script = args.child
+        result = measure_imports(script) if mode == "imports" else measure_first_paint(script, args.snapshot)
+        print(json.dumps(result))
+        return 0
+
+    results = run(args.pages, args.repeat)
+    print(results.to_string(index=False, float_format="{:.2f}".format))
+    if args.json:
+        Path(args.json).write_text(results.to_json(orient="records", indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# benchmarks/bench_streaming.py
+# Behaviour checks and throughput of the online detector (analysis/streaming.py).
+#
+#     python -m benchmarks.bench_streaming
+#     python -m benchmarks.bench_streaming --points 500000
+#
+# Checks, each printed with OK/FAIL (the exit code is 1 if any fails):
+#   constant warm-up   48 identical values, then noise and one spike: the
+#                      scale must grow from zero (some flags in the first
+#                      day are expected) and the spike be flagged
+#   zero warm-up       as above around 0 (dry hours before rain)
+#   wind direction     directions wandering across north (350°..10°) are
+#                      not flagged, a 180° turn is
+# Throughput is measured on --points hourly values through detect_anomalies().
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from analysis import streaming
+
+
+def replay(values, **params):
+    """Feed values hour by hour; return (scores, flags, detector)."""
+    det = streaming.StreamingAnomalyDetector(**params)
+    out = [det.update(float(v), slot=i % det.season) for i, v in enumerate(values)]
+    scores, flags = map(np.array, zip(*out))
+    return scores, flags, det
+
+
+def check_constant_warmup(level, rng):
+    noise = level + rng.normal(0, 0.5, 24 * 20)
+    values = np.concatenate([np.full(48, level), noise, [level + 50], noise[:24]])
+    _, flags, det = replay(values)
+    spike = 48 + len(noise)
+    # The first day after warm-up may be flagged while the scale grows from zero
+    false_flags = int(flags[72:spike].sum() + flags[spike + 1:].sum())
+    ok = det.mad > 0 and flags[spike] and false_flags <= 5
+    return ok, f"mean |resid| {det.mad:.3f}, spike flagged {bool(flags[spike])}, {false_flags} other flags after day one"
+
+
+def check_wind_direction(rng):
+    values = (rng.normal(0, 4, 24 * 20) % 360).tolist()  # around north, both sides of 0°
+    values += [180.0] + (rng.normal(0, 4, 24) % 360).tolist()
+    _, flags, _ = replay(values, period=360.0)
+    turn = 24 * 20
+    ok = flags[turn] and flags[48:turn].sum() <= 5
+    return ok, f"180° turn flagged {bool(flags[turn])}, {int(flags[48:turn].sum())} flags across north"
+
+
+def throughput(points, rng):
+    frame = pd.DataFrame({
+        "time": pd.date_range("2021-01-01", periods=points, freq="h"),
+        "value": rng.normal(10, 2, points),
+        "direction": rng.uniform(0, 360, points),
+    })
+    start = time.perf_counter()
+    n = sum(1 for _ in streaming.detect_anomalies(streaming.iter_records(frame), ["value", "direction"],
+                                                  circular=["direction"]))
+    return n / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=100_000, help="hourly records for the throughput run")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    checks = [
+        ("constant warm-up", check_constant_warmup(5.0, rng)),
+        ("zero warm-up", check_constant_warmup(0.0, rng)),
+        ("wind direction", check_wind_direction(rng)),
+    ]
+    for name, (ok, detail) in checks:
+        print(f"{name:<17} {detail}  {'OK' if ok else 'FAIL'}")
+    print(f"throughput        {throughput(args.points, rng):,.0f} records/s (two columns each)")
+    return 0 if all(ok for _, (ok, _) in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# benchmarks/bench_thundering_herd.py
+# Concurrency check of the single-flight data layer (cache.py).
+#
+#     python -m benchmarks.bench_thundering_herd                 # 16 callers, 0.5 s backend latency
+#     python -m benchmarks.bench_thundering_herd --callers 64 --latency 1
+#
+# N threads are released at the same moment on a cold cache and all call
+# utils.load_energy_data and utils.get_weather_data with the same
+# arguments, as sessions opening the app right after a deploy do. The
+# backends are the local stand-ins of benchmarks/stand_ins.py, which count
+# the calls they receive. Expected: one Mongo scan and one Open-Meteo
+# request, every caller getting the same data. A third check interrupts the
+# first caller with a BaseException (as Streamlit's rerun/stop exceptions
+# are): it alone must see it, and the waiters must elect a new caller that
+# computes once more. The exit code is 1 if any check fails.
+import argparse
+import sys
+import threading
+import time
+import warnings
+
+from benchmarks import stand_ins
+
+
+def herd(fn, callers, *args):
+    """Call fn(*args) from callers threads released together; return (results, errors, seconds)."""
+    barrier = threading.Barrier(callers)
+    results, errors = [None] * callers, []
+
+    def call(i):
+        barrier.wait()
+        try:
+            results[i] = fn(*args)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors, time.perf_counter() - start
+
+
+class _Interrupted(BaseException):
+    """Stands in for streamlit's StopException / RerunException."""
+
+
+def interrupted_leader(callers, latency):
+    """Herd on a key whose first computation is interrupted; returns (ok, detail)."""
+    import cache
+
+    ns = cache.Namespace("interrupted", cache.MiB)
+    computations = []
+
+    def compute():
+        computations.append(threading.get_ident())
+        time.sleep(latency)
+        if len(computations) == 1:
+            raise _Interrupted()
+        return "value"
+
+    def call():
+        try:
+            return ns.get_or_compute("key", compute)
+        except _Interrupted:
+            return "interrupted"
+
+    results, errors, seconds = herd(call, callers)
+    ok = (results.count("interrupted") == 1 and results.count("value") == callers - 1
+          and len(computations) == 2 and not errors)
+    return ok, (f"{callers} callers  computations {len(computations)}  wall {seconds:.2f}s  "
+                f"interrupted {results.count('interrupted')}  errors {len(errors)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--callers", type=int, default=16, help="concurrent identical calls")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per backend call")
+    parser.add_argument("--years", type=float, default=0.25, help="size of the stand-in energy data")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    import cache
+    import utils as ut
+
+    mongo, meteo = stand_ins.install_backends(args.years, args.latency)
+    lat, lon = stand_ins.COORDS
+    checks = [
+        ("mongo", mongo, ut.load_energy_data, ("production",)),
+        ("open-meteo", meteo, ut.get_weather_data, (lat, lon, "2021-01-01", "2021-12-31")),
+    ]
+    failed = False
+    for name, backend, fn, fn_args in checks:
+        results, errors, seconds = herd(fn, args.callers, *fn_args)
+        same = all(r is not None and r.equals(results[0]) for r in results)
+        ok = backend.calls == 1 and not errors and same
+        failed |= not ok
+        print(f"{name:<11} {args.callers} callers  backend calls {backend.calls}  "
+              f"wall {seconds:.2f}s  identical results {same}  errors {len(errors)}  {'OK' if ok else 'FAIL'}")
+    meteo.close()
+
+    ok, detail = interrupted_leader(args.callers, args.latency)
+    failed |= not ok
+    print(f"{'interrupted':<11} {detail}  {'OK' if ok else 'FAIL'}")
+
+    for s in cache.stats():
+        if s["misses"] or s["coalesced"]:
+            print(f"  cache {s['namespace']:<8} misses {s['misses']}  coalesced {s['coalesced']}  hits {s['hits']}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
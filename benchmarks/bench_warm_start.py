@@ -0,0 +1,42 @@
+# benchmarks/bench_warm_start.py
+# Optimizer iterations and wall time of SARIMAX fits over sliding training
+# windows, cold (default start parameters) against warm-started from the
+# previous window's optimum, as the forecasting page does on a slider nudge.
+#
+#     python -m benchmarks.bench_warm_start
+#     python -m benchmarks.bench_warm_start --window-days 90 --shift-days 7 --windows 6
+import argparse
+import warnings
+
+import numpy as np
+
+from analysis import forecasting as fc
+from benchmarks.synthetic import hourly_energy_series
+
+
+def main(window_days, shift_days, windows, order, seasonal_order):
+    series = hourly_energy_series((window_days + shift_days * windows) / 365.25 + 0.01)
+    print(f"{'window':>6} {'cold it':>8} {'cold s':>8} {'warm it':>8} {'warm s':>8} {'AIC diff':>9}")
+    totals = np.zeros(4)
+    previous = None
+    for i in range(windows):
+        start = i * shift_days * 24
+        y = series.iloc[start:start + window_days * 24]
+        cold, cold_s = fc.fit_sarimax(y, None, order, seasonal_order)
+        warm, warm_s = fc.fit_sarimax(y, None, order, seasonal_order, start_params=previous)
+        previous = warm.params.to_numpy()
+        row = [cold.mle_retvals["iterations"], cold_s, warm.mle_retvals["iterations"], warm_s]
+        totals += row
+        print(f"{i:>6} {row[0]:>8} {row[1]:>8.2f} {row[2]:>8} {row[3]:>8.2f} {warm.aic - cold.aic:>9.2f}")
+    print(f"{'total':>6} {totals[0]:>8.0f} {totals[1]:>8.2f} {totals[2]:>8.0f} {totals[3]:>8.2f}")
+    print("(window 0 has no previous optimum, so both fits start cold)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark warm-started SARIMAX fits over sliding windows.")
+    parser.add_argument("--window-days", type=int, default=60)
+    parser.add_argument("--shift-days", type=int, default=1)
+    parser.add_argument("--windows", type=int, default=8)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+    main(args.window_days, args.shift_days, args.windows, (1, 1, 1), (1, 0, 1, 24))
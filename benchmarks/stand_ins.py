@@ -0,0 +1,281 @@
+# benchmarks/stand_ins.py
+# Local stand-ins for MongoDB and Open-Meteo, so pages can be driven
+# headless (AppTest) without network access or credentials.
+#
+# install() replaces the loaders in utils.py with synthetic data from
+# benchmarks/synthetic.py and returns the session state a visit to the Map
+# page would leave behind (selected area, coordinates, dataset token).
+# snapshot() + install_on_import() do the same in two steps for startup
+# timing: the data is written once, and a fresh interpreter patches utils
+# only when the app imports it, so nothing is imported ahead of the app.
+#
+# This module imports only the standard library at the top; pandas and the
+# synthetic data generators are loaded by the functions that need them.
+# install_backends() keeps the loaders (and their caching) and replaces
+# only the backends: an in-process MongoDB client and a local HTTP server
+# answering like the Open-Meteo archive API. Both count the calls they
+# receive and can add a fixed latency per call. install_geo_assets() builds
+# the Map page's price-area assets from synthetic polygons instead of NVE.
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+AREA, COORDS = "NO1", (59.91, 10.75)
+AREAS = ("NO1", "NO2", "NO3", "NO4", "NO5")
+GROUPS = ("hydro", "wind", "solar", "thermal", "other")
+
+# Open-Meteo hourly variable -> column of the synthetic weather frame
+METEO_VARIABLES = {
+    "temperature_2m": "temperature_2m (°C)",
+    "precipitation": "precipitation (mm)",
+    "windspeed_10m": "wind_speed_10m (m/s)",
+    "wind_speed_10m": "wind_speed_10m (m/s)",
+    "wind_gusts_10m": "wind_gusts_10m (m/s)",
+    "wind_direction_10m": "wind_direction_10m (°)",
+}
+
+
+def weather_stand_in(lat, lon, start_date, end_date):
+    """Open-Meteo shaped hourly weather for [start_date, end_date], as utils.get_weather_data returns it."""
+    import pandas as pd
+
+    from benchmarks.synthetic import HOURS_PER_YEAR, hourly_weather_frame
+
+    start, end = pd.Timestamp(str(start_date)), pd.Timestamp(str(end_date)) + pd.Timedelta(hours=23)
+    years = ((end - start) / pd.Timedelta(hours=1) + 1) / HOURS_PER_YEAR
+    seed = int(abs(lat) * 100 + abs(lon)) % 1000
+    df = hourly_weather_frame(years, seed=seed, start=start)
+    return df[df["time"] <= end].reset_index(drop=True)
+
+
+def install(years=1):
+    """Patch utils to load synthetic data; return the session state seeded by the Map page."""
+    import datasets as ds
+    import utils as ut
+
+    from benchmarks.synthetic import hourly_energy_frame
+
+    energy = hourly_energy_frame(years, areas=AREAS, groups=GROUPS)
+    _patch_utils(ut, energy)
+    return _session(ds.register(energy, "production"))
+
+
+def _session(token):
+    return {
+        "selected_area": AREA,
+        "selected_coords": COORDS,
+        "selected_data_type": "production",
+        "selected_dataset": "production",
+        "dataset_token": token,
+    }
+
+
+def _patch_utils(ut, energy):
+    ut.load_energy_data = lambda dataset_type: energy.copy(deep=False)
+    ut.get_weather_data = weather_stand_in
+
+
+def snapshot(out_dir, years=1):
+    """Write the synthetic energy data and the seeded session of install() to out_dir."""
+    from pathlib import Path
+
+    import datasets as ds
+
+    from benchmarks.synthetic import hourly_energy_frame
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    energy = hourly_energy_frame(years, areas=AREAS, groups=GROUPS)
+    energy.to_pickle(out_dir / "energy.pkl")
+    session = _session(ds.content_token(energy, "production"))
+    (out_dir / "session.json").write_text(json.dumps(session))
+    return out_dir
+
+
+class _PatchOnImport:
+    """Meta path finder running patch(module) right after module name is first imported."""
+
+    def __init__(self, name, patch):
+        self.name, self.patch = name, patch
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname != self.name:
+            return None
+        import importlib.util
+
+        sys.meta_path.remove(self)
+        spec = importlib.util.find_spec(fullname)
+        exec_module = spec.loader.exec_module
+
+        def exec_and_patch(module):
+            exec_module(module)
+            self.patch(module)
+
+        spec.loader.exec_module = exec_and_patch
+        return spec
+
+
+def install_on_import(snapshot_dir):
+    """
+    install() from a snapshot(), deferred until the app imports utils: only
+    then are the data loaded, utils patched and the dataset registered.
+    Returns (session state, cost), where cost["seconds"] is the time the
+    stand-ins spent once triggered (for benchmarks to subtract).
+    """
+    from pathlib import Path
+
+    snapshot_dir = Path(snapshot_dir)
+    session = json.loads((snapshot_dir / "session.json").read_text())
+    cost = {"seconds": 0.0}
+
+    def patch(ut):
+        start = time.perf_counter()
+        import pandas as pd
+
+        import datasets as ds
+
+        energy = pd.read_pickle(snapshot_dir / "energy.pkl")
+        _patch_utils(ut, energy)
+        ds.register(energy, "production", token=session["dataset_token"])
+        import benchmarks.synthetic  # noqa: F401  (loaded by the weather stand-in later)
+        cost["seconds"] += time.perf_counter() - start
+
+    sys.meta_path.insert(0, _PatchOnImport("utils", patch))
+    return session, cost
+
+
+class _Counter:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def hit(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+
+class MongoStandIn(_Counter):
+    """
+    Client shaped like pymongo's for client[db][collection].find(): returns
+    Elhub records (productionGroup/consumptionGroup, ISO startTime) of a
+    synthetic energy frame. calls counts the find() scans.
+    """
+
+    def __init__(self, years=1, latency=0.0):
+        from benchmarks.synthetic import hourly_energy_frame
+
+        super().__init__(latency)
+        energy = hourly_energy_frame(years, areas=AREAS, groups=GROUPS)
+        energy["startTime"] = energy["startTime"].dt.strftime("%Y-%m-%dT%H:%M:%S%z")
+        self._records = {
+            kind: energy.rename(columns={"energyGroup": f"{kind}Group"}).to_dict("records")
+            for kind in ("production", "consumption")
+        }
+
+    def __getitem__(self, db_name):
+        return _Database(self)
+
+
+class _Database:
+    def __init__(self, client):
+        self.client = client
+
+    def __getitem__(self, collection_name):
+        return _Collection(self.client, collection_name.removesuffix("_per_group"))
+
+
+class _Collection:
+    def __init__(self, client, kind):
+        self.client, self.kind = client, kind
+
+    def find(self, *args, **kwargs):
+        self.client.hit()
+        return iter(self.client._records.get(self.kind, []))
+
+
+class OpenMeteoStandIn(_Counter):
+    """
+    Local HTTP server answering like the Open-Meteo archive API (hourly
+    variables of weather_stand_in()). url is the endpoint; calls counts requests.
+    """
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.hit()
+                body = json.dumps(stand_in.response(parse_qs(urlparse(self.path).query))).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/archive"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def response(query):
+        lat, lon = float(query["latitude"][0]), float(query["longitude"][0])
+        df = weather_stand_in(lat, lon, query["start_date"][0], query["end_date"][0])
+        variables = [v for item in query.get("hourly", []) for v in item.split(",")]
+        hourly = {"time": df["time"].dt.strftime("%Y-%m-%dT%H:%M").tolist()}
+        for v in variables:
+            hourly[v] = df[METEO_VARIABLES[v]].round(2).tolist()
+        return {"latitude": lat, "longitude": lon, "hourly": hourly}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def install_geo_assets(out_dir):
+    """
+    Build the Map page assets in out_dir from five rectangular stand-in price
+    areas (with geo_assets.build_assets, so geopandas is needed) and point
+    geo_assets.load_assets at them. Returns the area centroids as (lat, lon).
+    """
+    import functools
+    from pathlib import Path
+
+    import geo_assets as ga
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    features = []
+    for i, area in enumerate(AREAS):
+        lat0 = 58.0 + 3.0 * i
+        ring = [[5.0, lat0], [12.0, lat0], [12.0, lat0 + 3.0], [5.0, lat0 + 3.0], [5.0, lat0]]
+        features.append({"type": "Feature", "properties": {"ElSpotOmr": area},
+                         "geometry": {"type": "Polygon", "coordinates": [ring]}})
+    source = out_dir / "elspot_stand_in.geojson"
+    source.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+    meta = ga.build_assets(url=str(source), out_dir=out_dir)
+    ga.load_assets = functools.partial(ga.load_assets, out_dir=out_dir)
+    return {area: tuple(c) for area, c in meta["centroids"].items()}
+
+
+def install_backends(years=1, latency=0.0):
+    """
+    Point utils at a MongoStandIn and a running OpenMeteoStandIn (each call
+    sleeping latency seconds) and return (mongo, meteo).
+    """
+    import utils as ut
+
+    mongo, meteo = MongoStandIn(years, latency), OpenMeteoStandIn(latency)
+    ut.get_mongo_uri = lambda: "mongodb://stand-in"
+    ut.get_mongo_client = lambda uri: mongo
+    ut.OPEN_METEO_URL = meteo.url
+    return mongo, meteo
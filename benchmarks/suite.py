@@ -0,0 +1,191 @@
+# benchmarks/suite.py
+# Time and peak memory of every analysis kernel at several data scales,
+# compared against a stored baseline.
+#
+#     python -m benchmarks.suite                          # 1, 10 and 80 years, compare with baseline.json
+#     python -m benchmarks.suite --scales 1 10 --kernels lof_scores stl_by_year
+#     python -m benchmarks.suite --save-baseline          # record this machine's numbers as the baseline
+#
+# Inputs come from the deterministic generators in benchmarks/synthetic.py
+# (Open-Meteo shaped weather seeded from open-meteo-subset.csv, Elhub shaped
+# energy driven by it) and are built before timing. Time is the best of
+# --repeat runs; peak memory is measured in one extra run under tracemalloc.
+# A kernel is reported as a regression when time or memory exceeds the
+# baseline by more than --tolerance, and the exit code is then 1.
+import argparse
+import json
+import sys
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+from analysis import aggregation, correlation, forecasting, outliers, snow_drift, spectral, stl
+from benchmarks._timing import measure
+from benchmarks.synthetic import hourly_energy_frame, hourly_weather_frame, snow_drift_frame
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+# Below these, differences are timer/allocator noise and are not compared
+NOISE_FLOOR = {"seconds": 0.02, "peak_mib": 1.0}
+
+
+class Inputs:
+    """Synthetic inputs of one scale, built lazily and shared by the kernels."""
+
+    def __init__(self, years):
+        self.years = years
+        self._cache = {}
+
+    def _get(self, name, build):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    @property
+    def weather(self):
+        return self._get("weather", lambda: hourly_weather_frame(self.years))
+
+    @property
+    def energy(self):
+        return self._get("energy", lambda: hourly_energy_frame(self.years))
+
+    @property
+    def snow(self):
+        return self._get("snow", lambda: snow_drift_frame(self.years))
+
+
+# -----------------------------
+# Kernels: name -> (make(inputs) -> zero-argument callable, largest scale in years)
+# -----------------------------
+def _snow_qupot(inputs):
+    speeds = inputs.snow["wind_speed"].to_numpy()
+    return lambda: snow_drift.compute_Qupot(speeds)
+
+
+def _snow_sectors(inputs):
+    speeds, dirs = inputs.snow["wind_speed"].to_numpy(), inputs.snow["wind_direction"].to_numpy()
+    return lambda: snow_drift.compute_sector_transport(speeds, dirs)
+
+
+def _snow_yearly(inputs):
+    df = inputs.snow
+    return lambda: snow_drift.compute_yearly_results(df, T=3000, F=30000, theta=0.5)
+
+
+def _sliding_corr(inputs):
+    energy = stl.select_series(inputs.energy, "NO1", "wind")
+    wind = pd.Series(inputs.weather["wind_speed_10m (m/s)"].to_numpy()[:len(energy)], index=energy.index)
+    return lambda: correlation.sliding_window_corr(wind, energy, window=72, lag=3)
+
+
+def _mean_by_area(inputs):
+    df = inputs.energy
+    start, end = df["startTime"].min().tz_localize(None), df["startTime"].max().tz_localize(None)
+    return lambda: aggregation.mean_values_by_area(df, "hydro", start, end)
+
+
+def _spc(inputs):
+    values = inputs.weather["temperature_2m (°C)"].to_numpy()
+
+    def run():
+        satv, median, mad = outliers.spc_filter(values, outliers.scaled_cutoff(10, len(values)))
+        return outliers.spc_outliers(satv, median, mad, 3.0)
+    return run
+
+
+def _lof(inputs):
+    X = inputs.weather[outliers.LOF_FEATURES].to_numpy()
+    strata = inputs.weather["time"].dt.month.to_numpy()
+    return lambda: outliers.lof_scores(X, proportion=0.01, strata=strata)
+
+
+def _spectrogram(inputs):
+    df = inputs.energy
+    return lambda: spectral.panel_spectrogram(spectral.hourly_panel(df, area="NO1"), 256, 128)
+
+
+def _stl_by_year(inputs):
+    series = stl.select_series(inputs.energy, "NO1", "hydro")
+
+    def run():
+        for _, year in series.groupby(series.index.year):
+            stl.stl_components(stl.regular_hourly(year))
+    return run
+
+
+def _sarimax(inputs):
+    y = stl.regular_hourly(stl.select_series(inputs.energy, "NO1", "hydro")).iloc[-24 * 30:]
+    return lambda: forecasting.fit_sarimax(y, None, (1, 1, 1), (1, 0, 1, 24))
+
+
+KERNELS = {
+    "snow_qupot": (_snow_qupot, 80),
+    "snow_sector_transport": (_snow_sectors, 80),
+    "snow_yearly_results": (_snow_yearly, 80),
+    "sliding_window_corr": (_sliding_corr, 80),
+    "mean_values_by_area": (_mean_by_area, 80),
+    "spc_outliers": (_spc, 80),
+    "lof_scores": (_lof, 80),
+    "spectrogram": (_spectrogram, 80),
+    "stl_by_year": (_stl_by_year, 10),
+    "sarimax_fit": (_sarimax, 1),  # fixed 30-day window, scale independent
+}
+
+
+def run(scales, kernels, repeat):
+    results = {}
+    for years in scales:
+        inputs = Inputs(years)
+        for name in kernels:
+            make, max_years = KERNELS[name]
+            if years > max_years:
+                continue
+            seconds, peak = measure(make(inputs), repeat=repeat if years <= 10 else 1)
+            results.setdefault(name, {})[str(years)] = {"seconds": round(seconds, 4), "peak_mib": round(peak, 2)}
+            print(f"{name:<24} {years:>5}y {seconds:>9.3f}s {peak:>9.1f} MiB", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print current/baseline ratios; return the regressed (kernel, scale, metric) entries."""
+    regressions = []
+    print(f"\n{'kernel':<24} {'scale':>6} {'time x':>8} {'memory x':>9}")
+    for name, scales in results.items():
+        for years, now in scales.items():
+            before = baseline.get(name, {}).get(years)
+            if before is None:
+                print(f"{name:<24} {years:>5}y {'new':>8}")
+                continue
+            ratios = {metric: max(now[metric], floor) / max(before[metric], floor)
+                      for metric, floor in NOISE_FLOOR.items()}
+            flag = [metric for metric, r in ratios.items() if r > 1 + tolerance]
+            regressions += [(name, years, metric) for metric in flag]
+            print(f"{name:<24} {years:>5}y {ratios['seconds']:>8.2f} {ratios['peak_mib']:>9.2f}"
+                  f"{'  REGRESSION' if flag else ''}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analysis kernels against a stored baseline.")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 80])
+    parser.add_argument("--kernels", nargs="+", choices=list(KERNELS), default=list(KERNELS))
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per kernel up to 10 years")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown/growth, 0.5 = +50%%")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    scales = [int(s) if float(s).is_integer() else s for s in args.scales]
+    results = run(scales, args.kernels, args.repeat)
+    if args.save_baseline:
+        stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        for name, by_scale in results.items():
+            stored.setdefault(name, {}).update(by_scale)
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+    elif args.baseline.exists():
+        if compare(results, json.loads(args.baseline.read_text()), args.tolerance):
+            sys.exit(1)
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one.")
@@ -0,0 +1,104 @@
+# benchmarks/synthetic.py
+# Deterministic synthetic data for the benchmarks.
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+HOURS_PER_YEAR = 8766  # 365.25 days
+
+
+def hourly_energy_series(years, seed=0, start="2021-01-01", level=1000.0):
+    """Hourly series with trend, daily, weekly and yearly cycles plus noise."""
+    n = int(round(years * HOURS_PER_YEAR))
+    idx = pd.date_range(start, periods=n, freq="h", tz="UTC")
+    t = np.arange(n)
+    rng = np.random.default_rng(seed)
+    values = (
+        level
+        + 0.002 * t
+        + 0.10 * level * np.sin(2 * np.pi * t / 24)
+        + 0.05 * level * np.sin(2 * np.pi * t / 168)
+        + 0.30 * level * np.cos(2 * np.pi * t / HOURS_PER_YEAR)
+        + rng.normal(0, 0.01 * level, n)
+    )
+    return pd.Series(values, index=idx, name="quantityKwh")
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+WEATHER_SEED_CSV = REPO_ROOT / "open-meteo-subset.csv"
+
+
+def hourly_weather_frame(years, seed=0, start="1945-01-01"):
+    """
+    Open-Meteo shaped hourly weather (same columns as utils.get_weather_data),
+    made by tiling the year in open-meteo-subset.csv and adding seeded noise.
+    """
+    base = pd.read_csv(WEATHER_SEED_CSV)
+    n = int(round(years * HOURS_PER_YEAR))
+    values = np.resize(base.drop(columns="time").to_numpy(dtype=float), (n, base.shape[1] - 1))
+    rng = np.random.default_rng(seed)
+    values = values + rng.normal(0.0, 0.1, values.shape) * values.std(axis=0)
+
+    df = pd.DataFrame(values, columns=base.columns.drop("time"))
+    df["precipitation (mm)"] = df["precipitation (mm)"].clip(lower=0).round(1)
+    for column in ("wind_speed_10m (m/s)", "wind_gusts_10m (m/s)"):
+        df[column] = df[column].clip(lower=0)
+    df["wind_direction_10m (°)"] = df["wind_direction_10m (°)"] % 360
+    df.insert(0, "time", pd.date_range(start, periods=n, freq="h"))
+    return df
+
+
+# Hourly production profile per energy group, driven by the synthetic weather
+def _group_profile(group, weather, hours):
+    day = 2 * np.pi * hours.hour.to_numpy() / 24
+    doy = 2 * np.pi * hours.dayofyear.to_numpy() / 365.25
+    wind = weather["wind_speed_10m (m/s)"].to_numpy()
+    if group == "wind":
+        return (np.clip(wind, 3, 12) ** 3 - 27) / (12 ** 3 - 27)
+    if group == "solar":
+        cloud = np.where(weather["precipitation (mm)"].to_numpy() > 0, 0.4, 1.0)
+        return np.clip(-np.cos(day), 0, None) * (1 - np.cos(doy)) * cloud
+    if group == "hydro":
+        return 1.0 + 0.6 * np.cos(doy - 2.4) + 0.1 * np.sin(day - 1.5)
+    return 1.0 + 0.2 * np.sin(day - 1.5) - 0.3 * np.cos(doy)  # thermal, other
+
+
+def hourly_energy_frame(years, areas=("NO1", "NO2"), groups=("hydro", "wind", "solar"), seed=0,
+                        start="2021-01-01"):
+    """
+    Elhub-shaped long frame (priceArea, energyGroup, startTime, quantityKwh),
+    one hourly series per area × group. Wind and solar follow the synthetic
+    weather of hourly_weather_frame, so weather/energy correlations exist.
+    """
+    n = int(round(years * HOURS_PER_YEAR))
+    hours = pd.date_range(start, periods=n, freq="h", tz="UTC")
+    rng = np.random.default_rng(seed)
+    frames = []
+    for a, area in enumerate(areas):
+        weather = hourly_weather_frame(years, seed=seed + a, start=start)
+        for group in groups:
+            profile = _group_profile(group, weather, hours)
+            scale = rng.uniform(2e5, 2e6)
+            values = np.clip(scale * profile * (1 + rng.normal(0, 0.05, n)), 0, None)
+            frames.append(pd.DataFrame({"priceArea": area, "energyGroup": group,
+                                        "startTime": hours, "quantityKwh": values}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def snow_drift_frame(years, seed=0, start_year=1990):
+    """
+    Weather in the shape the Snow drift page builds (time, temperature,
+    precipitation, wind_speed, wind_direction, season), starting on 1 July.
+    """
+    weather = hourly_weather_frame(years + 1, seed=seed, start=f"{start_year}-01-01")
+    weather = weather[weather["time"] >= f"{start_year}-07-01"].iloc[:int(round(years * HOURS_PER_YEAR))]
+    df = pd.DataFrame({
+        "time": weather["time"].to_numpy(),
+        "temperature": weather["temperature_2m (°C)"].to_numpy(),
+        "precipitation": weather["precipitation (mm)"].to_numpy(),
+        "wind_speed": weather["wind_speed_10m (m/s)"].to_numpy(),
+        "wind_direction": weather["wind_direction_10m (°)"].to_numpy(),
+    })
+    df["season"] = np.where(df["time"].dt.month >= 7, df["time"].dt.year, df["time"].dt.year - 1)
+    return df
@@ -0,0 +1,303 @@
+# cache.py
+# Bounded in-process caches with per-namespace memory budgets.
+#
+# Every namespace (remote weather, Mongo frames, figure data, fitted models,
+# ...) has a byte budget, optionally an entry limit and a time to live.
+# Entries are evicted least recently used first once a namespace is over
+# its budget; a value larger than the whole budget is returned but not
+# kept. Expired entries are dropped when looked up and on every put().
+# Concurrent misses on one key are coalesced (single flight): the first
+# caller computes, the others wait for its result (or its exception)
+# instead of sending the same Mongo scan or Open-Meteo request again.
+# Hits, misses, coalesced calls, evictions and expirations are counted per
+# namespace for the Performance page. Streamlit-free; utils.cached() builds
+# the page caches on memoize().
+import functools
+import hashlib
+import inspect
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+MiB = 2**20
+
+# Limits per namespace; namespaces not listed here get DEFAULT_LIMITS
+BUDGETS = {
+    # Full energy frames as read from MongoDB
+    "mongo": {"max_bytes": 1024 * MiB, "ttl": 3600},
+    # Open-Meteo responses, keyed by arbitrary (lat, lon, start, end)
+    "weather": {"max_bytes": 256 * MiB, "ttl": 6 * 3600},
+    # Arrays and frames behind the page figures (spectra, SPC bands, LOF scores)
+    "figures": {"max_bytes": 256 * MiB},
+    # Batch anomaly results, re-read when a batch run may have replaced them
+    "anomalies": {"max_bytes": 64 * MiB, "ttl": 300},
+    # Fitted SARIMAX results loaded from or saved to the model registry
+    "models": {"max_bytes": 512 * MiB},
+    # Converged SARIMAX parameters used as start values
+    "warm starts": {"max_bytes": 4 * MiB, "max_entries": 1024},
+}
+DEFAULT_LIMITS = {"max_bytes": 64 * MiB}
+
+_NAMESPACES = {}
+_LOCK = threading.Lock()
+
+
+def sizeof(value, _seen=None):
+    """Approximate memory held by value in bytes (deep for pandas, numpy and containers)."""
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if hasattr(value, "memory_usage") and hasattr(value, "index"):  # DataFrame / Series
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if hasattr(value, "nbytes") and hasattr(value, "dtype"):  # ndarray, Index
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k, seen) + sizeof(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(v, seen) for v in value)
+    if hasattr(value, "__dict__") and not isinstance(value, type):
+        return sys.getsizeof(value) + sizeof(vars(value), seen)
+    return sys.getsizeof(value)
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on."""
+
+    __slots__ = ("done", "result", "error", "abandoned")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False
+
+
+class Namespace:
+    """One LRU cache with a byte budget, an optional entry limit and an optional TTL (seconds)."""
+
+    def __init__(self, name, max_bytes, max_entries=None, ttl=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, size, expires)
+        self._flights = {}  # key -> _Flight of the call computing it
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = self.misses = self.coalesced = self.evictions = self.expirations = 0
+
+    def _lookup(self, key):
+        """Live entry for key or None (caller holds the lock)."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key, default=None):
+        """Cached value for key (counted as a hit or miss), or default."""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return entry[0]
+
+    def get_or_compute(self, key, compute, on_coalesced=None):
+        """
+        Cached value for key, or compute() once however many threads ask at the
+        same time: later callers wait for the first one and share its result (or
+        its Exception), calling on_coalesced() first. None results are returned
+        but not kept. If the first caller is interrupted by a BaseException that
+        is not an Exception (KeyboardInterrupt, a Streamlit rerun or stop), the
+        waiters do not inherit it: they retry and one of them computes instead.
+        """
+        while True:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    self.hits += 1
+                    return entry[0]
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+                    self.misses += 1
+            if leader:
+                break
+            flight.done.wait()
+            if flight.abandoned:
+                continue
+            with self._lock:
+                self.coalesced += 1
+            if on_coalesced is not None:
+                on_coalesced()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+            if flight.result is not None:
+                self.put(key, flight.result)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        except BaseException:
+            flight.abandoned = True
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def put(self, key, value, size=None):
+        """Store value under key; size defaults to sizeof(value). Returns whether it was kept."""
+        size = sizeof(value) if size is None else int(size)
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._sweep()
+            if size > self.max_bytes:
+                return False
+            self._entries[key] = (value, size, expires)
+            self.bytes += size
+            while self.bytes > self.max_bytes or (self.max_entries and len(self._entries) > self.max_entries):
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+            return True
+
+    def _sweep(self):
+        """Drop every expired entry, not only the ones looked up again (caller holds the lock)."""
+        if not self.ttl:
+            return
+        now = time.monotonic()
+        for key in [k for k, (_, _, expires) in self._entries.items() if expires <= now]:
+            self._drop(key)
+            self.expirations += 1
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def discard(self, predicate=None):
+        """Remove the entries whose key matches predicate (all entries without one)."""
+        with self._lock:
+            for key in [k for k in self._entries if predicate is None or predicate(k)]:
+                self._drop(key)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.name,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def namespace(name):
+    """The process-wide cache for name, created with its BUDGETS entry on first use."""
+    with _LOCK:
+        if name not in _NAMESPACES:
+            _NAMESPACES[name] = Namespace(name, **{**DEFAULT_LIMITS, **BUDGETS.get(name, {})})
+        return _NAMESPACES[name]
+
+
+def _freeze(value):
+    """Hashable stand-in for a call argument (pandas/numpy values by content)."""
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return value
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__,) + tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return ("dict",) + tuple(sorted(((_freeze(k), _freeze(v)) for k, v in value.items()), key=repr))
+    if isinstance(value, (set, frozenset)):
+        return ("set",) + tuple(sorted((_freeze(v) for v in value), key=repr))
+    if hasattr(value, "memory_usage") and hasattr(value, "index"):
+        import pandas as pd
+
+        digest = hashlib.sha1(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+        digest.update(repr(getattr(value, "columns", getattr(value, "name", None))).encode())
+        return (type(value).__name__, digest.hexdigest())
+    if hasattr(value, "tobytes") and hasattr(value, "dtype"):
+        return ("array", str(value.dtype), value.shape, hashlib.sha1(value.tobytes()).hexdigest())
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def function_id(fn):
+    """Module, file and qualified name of the function behind any decorators (pages all run as __main__)."""
+    inner = inspect.unwrap(fn)
+    return (inner.__module__, inner.__code__.co_filename, inner.__qualname__)
+
+
+def call_key(fn, args, kwargs):
+    return function_id(fn) + (_freeze(args), _freeze(kwargs))
+
+
+def memoize(name, on_coalesced=None):
+    """
+    Decorator: cache the function's results in namespace name, keyed by its
+    arguments, with concurrent identical calls coalesced into one (see
+    Namespace.get_or_compute; on_coalesced() is called in the callers that
+    waited). None results (failed fetches) are not kept. DataFrames and
+    Series come back as shallow copies (copy-on-write keeps the cached one
+    intact); other results are shared and must be treated as read-only.
+    The wrapper has a clear() removing this function's entries.
+    """
+    def decorate(fn):
+        cache = namespace(name)
+        fid = function_id(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = call_key(fn, args, kwargs)
+            return _shallow(cache.get_or_compute(key, lambda: fn(*args, **kwargs), on_coalesced))
+
+        wrapper.clear = lambda: cache.discard(lambda key: key[:3] == fid)
+        return wrapper
+    return decorate
+
+
+def _shallow(result):
+    if hasattr(result, "memory_usage") and hasattr(result, "copy"):
+        return result.copy(deep=False)
+    return result
+
+
+def stats():
+    """Per-namespace statistics (entries, bytes, budget, hit rate, coalesced calls, evictions, expirations)."""
+    with _LOCK:
+        caches = list(_NAMESPACES.values())
+    return [c.stats() for c in sorted(caches, key=lambda c: c.name)]
+
+
+def clear(name=None):
+    """Empty one namespace, or all of them."""
+    with _LOCK:
+        caches = [_NAMESPACES[name]] if name is not None else list(_NAMESPACES.values())
+    for c in caches:
+        c.discard()
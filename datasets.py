@@ -0,0 +1,156 @@
+# datasets.py
+# Process-wide registry of loaded datasets.
+#
+# Every dataset gets an immutable version token when it is loaded. Cached
+# computations take the token (plus their parameters) instead of the whole
+# DataFrame, so Streamlit only hashes a short string on each rerun.
+#
+# The registry holds the only full copy of each dataset version in the
+# process. Registering a new version of a named dataset retires the old one
+# rather than dropping it: sessions still holding the old token keep reading
+# it, and it is dropped once nobody has read it for RETIRED_GRACE seconds
+# (a session coming back later reloads from the Map page). Sessions keep just
+# the token (and their filter choices) and ask for get()/view() on every
+# rerun. Both return new DataFrame objects sharing the registered column
+# buffers: assigning a column on them never reaches the shared frame, and
+# with pandas (>= 3) copy-on-write neither do in-place writes.
+# Frames are normalized once at load, so pages need no dtype fix-ups.
+import hashlib
+import threading
+import time
+
+import pandas as pd
+
+# Seconds a superseded version stays registered after its last read
+RETIRED_GRACE = 600.0
+
+_REGISTRY = {}
+_SUMMARY = {}
+_LATEST = {}  # dataset name -> token of its registered version
+_RETIRED = {}  # superseded token -> monotonic time of its last read
+_LOCK = threading.Lock()
+
+
+def normalize_columns(df):
+    """Normalize columns for production and consumption datasets."""
+    df.columns = [c.lower() for c in df.columns]
+
+    rename_map = {
+        "productiongroup": "energyGroup",
+        "consumptiongroup": "energyGroup",
+        "starttime": "startTime",
+        "pricearea": "priceArea",
+        "quantitykwh": "quantityKwh"
+    }
+    df = df.rename(columns=rename_map)
+    return df
+
+
+def content_token(df, name=""):
+    """Version token from a hash of the frame contents (computed once at load)."""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(name.encode())
+    digest.update("|".join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return f"{name}-{digest.hexdigest()}" if name else digest.hexdigest()
+
+
+def register(df, name="", token=None):
+    """
+    Store df under a version token and return the token.
+    Pass token explicitly (e.g. a sync high-water mark) to skip hashing.
+    A named dataset has one current version: an older token of name is
+    retired, and dropped once unread for RETIRED_GRACE seconds.
+    """
+    if token is None:
+        token = content_token(df, name)
+    with _LOCK:
+        if token not in _REGISTRY:
+            _REGISTRY[token] = df
+            _SUMMARY[token] = _summarize(df)
+        _RETIRED.pop(token, None)
+        if name:
+            old = _LATEST.get(name)
+            if old is not None and old != token:
+                _RETIRED[old] = time.monotonic()
+            _LATEST[name] = token
+        _drop_retired()
+    return token
+
+
+def _drop_retired():
+    """Drop retired versions unread for RETIRED_GRACE seconds (caller holds _LOCK)."""
+    cutoff = time.monotonic() - RETIRED_GRACE
+    for token in [t for t, last_read in _RETIRED.items() if last_read < cutoff]:
+        del _RETIRED[token]
+        _REGISTRY.pop(token, None)
+        _SUMMARY.pop(token, None)
+
+
+def _lookup(token):
+    """Registered frame of token, marking a retired version as still in use (caller holds _LOCK)."""
+    _drop_retired()
+    if token not in _REGISTRY:
+        raise KeyError(f"Dataset '{token}' is not loaded. Load it from the Map page first.")
+    if token in _RETIRED:
+        _RETIRED[token] = time.monotonic()
+    return _REGISTRY[token]
+
+
+def _shared(token):
+    with _LOCK:
+        return _lookup(token)
+
+
+def get(token):
+    """The dataset registered under token, as a shallow copy of the shared frame."""
+    return _shared(token).copy(deep=False)
+
+
+def view(token, area=None, group=None, year=None):
+    """
+    Rows of a dataset matching a filter spec (price area, energy group
+    case-insensitively, calendar year of startTime); None means no filter.
+    """
+    df = _shared(token)
+    mask = pd.Series(True, index=df.index)
+    if area is not None:
+        mask &= df["priceArea"] == area
+    if group is not None:
+        mask &= df["energyGroup"].str.lower() == group.lower()
+    if year is not None:
+        mask &= df["startTime"].dt.year == year
+    return df[mask] if not mask.all() else df.copy(deep=False)
+
+
+def _summarize(df):
+    if df.empty:
+        return {"rows": 0, "years": [], "areas": [], "groups": [], "start": None, "end": None}
+    return {
+        "rows": len(df),
+        "years": sorted(df["startTime"].dt.year.unique().tolist()),
+        "areas": sorted(df["priceArea"].dropna().unique().tolist()),
+        "groups": sorted(df["energyGroup"].dropna().unique().tolist()),
+        "start": df["startTime"].min(),
+        "end": df["startTime"].max(),
+    }
+
+
+def summary(token):
+    """Rows, years, areas, groups and time range of a dataset, computed once at registration."""
+    with _LOCK:
+        _lookup(token)
+        return _SUMMARY[token]
+
+
+def is_registered(token):
+    with _LOCK:
+        _drop_retired()
+        return token in _REGISTRY
+
+
+def memory_usage():
+    """Bytes held by each registered dataset (deep, i.e. including strings)."""
+    with _LOCK:
+        frames = dict(_REGISTRY)
+    return {token: int(df.memory_usage(deep=True).sum()) for token, df in frames.items()}
@@ -0,0 +1,142 @@
+# geo_assets.py
+# Offline Elspot price-area geometry for the Map page.
+#
+# Build once (and again whenever NVE changes the areas) with:
+#     python geo_assets.py
+# The Map page then reads the simplified files from assets/ instead of
+# downloading the full-resolution polygons on every new process. On a fresh
+# deploy without assets/ the first page load builds them once (one download).
+import json
+import threading
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+ELSPOT_URL = "https://nve.geodataonline.no/arcgis/rest/services/Mapservices/Elspot/MapServer/0/query?where=OBJECTID%20IN%20(6,7,8,9,10)&outFields=*&f=geojson"
+ASSET_DIR = Path(__file__).resolve().parent / "assets"
+META_FILE = "elspot_meta.json"
+
+# Simplification tolerance (degrees) per detail level.
+# At zoom 3 one screen pixel is ~0.18° wide, so "low" is already sub-pixel there.
+TOLERANCES = {"low": 0.05, "medium": 0.01, "high": 0.002}
+
+# Coordinates are rounded to ~1 m before writing
+COORD_DECIMALS = 5
+
+_BUILD_LOCK = threading.Lock()
+
+
+def level_for_zoom(zoom):
+    """Return the detail level that matches a mapbox zoom level."""
+    if zoom < 5:
+        return "low"
+    if zoom < 7:
+        return "medium"
+    return "high"
+
+
+def asset_path(level, out_dir=ASSET_DIR):
+    return Path(out_dir) / f"elspot_{level}.geojson"
+
+
+def _simplify(geoms, tolerance):
+    """Simplify all areas together so shared borders stay shared (no gaps/overlaps)."""
+    import shapely
+
+    if hasattr(shapely, "coverage_simplify"):
+        try:
+            return shapely.coverage_simplify(geoms, tolerance)
+        except shapely.errors.GEOSException:
+            pass
+    # Older shapely or an invalid coverage: simplify each polygon on its own
+    return shapely.simplify(geoms, tolerance, preserve_topology=True)
+
+
+def _outline(geom):
+    """Exterior rings of a (Multi)Polygon as lon/lat lists separated by None."""
+    polygons = geom.geoms if geom.geom_type == "MultiPolygon" else [geom]
+    lons, lats = [], []
+    for polygon in polygons:
+        ring = np.round(np.asarray(polygon.exterior.coords)[:, :2], COORD_DECIMALS)
+        if lons:
+            lons.append(None)
+            lats.append(None)
+        lons.extend(ring[:, 0].tolist())
+        lats.extend(ring[:, 1].tolist())
+    return {"lon": lons, "lat": lats}
+
+
+def build_assets(url=ELSPOT_URL, out_dir=ASSET_DIR, tolerances=TOLERANCES):
+    """Download the Elspot polygons and write simplified GeoJSON + metadata to out_dir."""
+    import geopandas as gpd
+    import shapely
+
+    gdf = gpd.read_file(url)[["ElSpotOmr", "geometry"]]
+    if gdf.crs is None:
+        gdf = gdf.set_crs(4326)
+    else:
+        gdf = gdf.to_crs(4326)
+    gdf = gdf.sort_values("ElSpotOmr").reset_index(drop=True)
+
+    # Centroids from the full-resolution geometry, as (lat, lon).
+    # Same planar lon/lat centroid the page used before, so silence the CRS warning.
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        centroid_points = gdf.geometry.centroid
+    centroids = {
+        area: [round(c.y, COORD_DECIMALS), round(c.x, COORD_DECIMALS)]
+        for area, c in zip(gdf["ElSpotOmr"], centroid_points)
+    }
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    meta = {
+        "areas": gdf["ElSpotOmr"].tolist(),
+        "centroids": centroids,
+        "tolerances": dict(tolerances),
+        "outlines": {},
+    }
+
+    for level, tol in tolerances.items():
+        geoms = _simplify(gdf.geometry.values, tol)
+        geoms = shapely.set_precision(geoms, 10 ** -COORD_DECIMALS)
+        simplified = gdf.set_geometry(gpd.GeoSeries(geoms, crs=4326))
+        asset_path(level, out_dir).write_text(simplified.to_json(drop_id=True))
+        meta["outlines"][level] = {
+            area: _outline(geom) for area, geom in zip(simplified["ElSpotOmr"], simplified.geometry)
+        }
+
+    (out_dir / META_FILE).write_text(json.dumps(meta))
+    return meta
+
+
+def assets_exist(out_dir=ASSET_DIR, levels=TOLERANCES):
+    out_dir = Path(out_dir)
+    return (out_dir / META_FILE).exists() and all(asset_path(lv, out_dir).exists() for lv in levels)
+
+
+def load_assets(level="low", out_dir=ASSET_DIR):
+    """
+    Return (geojson, centroids, outlines) for one detail level.
+    Builds the assets first if they are missing (the only network call), once
+    per process however many sessions ask at the same time.
+    """
+    out_dir = Path(out_dir)
+    if not assets_exist(out_dir):
+        with _BUILD_LOCK:
+            if not assets_exist(out_dir):
+                build_assets(out_dir=out_dir)
+
+    geojson = json.loads(asset_path(level, out_dir).read_text())
+    meta = json.loads((out_dir / META_FILE).read_text())
+    centroids = {area: tuple(c) for area, c in meta["centroids"].items()}
+    return geojson, centroids, meta["outlines"][level]
+
+
+if __name__ == "__main__":
+    meta = build_assets()
+    for level in meta["tolerances"]:
+        path = asset_path(level)
+        print(f"{path.name}: {path.stat().st_size / 1024:.0f} kB")
+    print(f"{META_FILE}: {len(meta['areas'])} areas")
@@ -0,0 +1,156 @@
+# jobs.py
+# Background jobs for long-running page computations.
+#
+# A page submits work under a key that identifies it (kind + parameters) and
+# gets a Job handle back. The work runs on a process-wide thread pool, so it
+# keeps going while the user moves widgets and every rerun (of any session)
+# finds the same job via get(key). Identical submissions share one job.
+# Jobs report progress and check for cancellation through the handle; CPU
+# heavy jobs can fan out to their own worker processes from inside the
+# thread, and must kill them when report() raises JobCancelled (the
+# forecasting kernels report while they wait, so cancelling stops their
+# fits within a second instead of letting them run to the end).
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 2
+KEEP_FINISHED = 200
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """Handle of one submitted computation."""
+
+    def __init__(self, key, label=""):
+        self.key = key
+        self.label = label or str(key)
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def done(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def seconds(self):
+        """Run time so far (or in total once finished)."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def report(self, progress=None, message=None):
+        """Called by the job: record progress (0..1) and stop here if cancellation was requested."""
+        if progress is not None:
+            self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def step_reporter(self, unit="steps"):
+        """progress(done, total) callback for kernels that count their steps."""
+        return lambda done, total: self.report(done / total, f"{done}/{total} {unit}")
+
+    def cancel(self):
+        """Drop a queued job, or ask a running one to stop at its next report()."""
+        self._cancel.set()
+        if self._future is not None and self._future.cancel():
+            self.status = CANCELLED
+            self.finished = time.time()
+
+    def __repr__(self):
+        return f"Job({self.label!r}, {self.status}, {self.progress:.0%})"
+
+
+_POOL = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="job")
+_JOBS = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def _run(job, fn, args, kwargs):
+    if job.cancel_requested:
+        job.status = CANCELLED
+        job.finished = time.time()
+        return
+    job.status, job.started = RUNNING, time.time()
+    try:
+        job.result = fn(*args, **kwargs)
+        job.progress, job.status = 1.0, DONE
+    except JobCancelled:
+        job.status = CANCELLED
+    except Exception as e:
+        job.error, job.status = e, FAILED
+    job.finished = time.time()
+
+
+def _evict_finished():
+    finished = [k for k, j in _JOBS.items() if j.done]
+    for key in finished[:max(len(finished) - KEEP_FINISHED, 0)]:
+        del _JOBS[key]
+
+
+def submit(key, fn, *args, label="", **kwargs):
+    """
+    Run fn(*args, **kwargs) in the background under key and return its Job.
+    If a job with this key is queued, running or done, that job is returned
+    instead; failed and cancelled jobs are replaced by a fresh one.
+    A fn that takes a `job` keyword receives the handle for report().
+    """
+    with _LOCK:
+        job = _JOBS.get(key)
+        if job is not None and job.status not in (FAILED, CANCELLED):
+            return job
+        job = Job(key, label)
+        if "job" in inspect.signature(fn).parameters:
+            kwargs["job"] = job
+        _JOBS[key] = job
+        _evict_finished()
+        job._future = _POOL.submit(_run, job, fn, args, kwargs)
+    return job
+
+
+def get(key):
+    """The job submitted under key, or None."""
+    with _LOCK:
+        return _JOBS.get(key)
+
+
+def cancel(key):
+    with _LOCK:
+        job = _JOBS.get(key)
+    if job is not None:
+        job.cancel()
+    return job
+
+
+def forget(key):
+    """Drop a finished job so its result is no longer returned."""
+    with _LOCK:
+        job = _JOBS.get(key)
+        if job is not None and job.done:
+            del _JOBS[key]
+
+
+def all_jobs():
+    with _LOCK:
+        return list(_JOBS.values())
@@ -0,0 +1,135 @@
+# model_registry.py
+# On-disk registry of fitted SARIMAX results.
+#
+# A model is identified by everything its fit depends on: area, group,
+# dataset version token, training window, order, seasonal order and the
+# exogenous set (variables + weather location). The fitted results object
+# (parameters plus filter state) is pickled with statsmodels' save(), so a
+# repeat request loads in milliseconds instead of refitting.
+#
+# The last converged parameters per series and model structure (area, group,
+# order, seasonal order, exog set) are also remembered, so a fit on a nearby
+# training window can start from them (start_params()).
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import cache
+from results_store import RESULTS_DIR, tmp_path
+
+MODELS_DIR = Path(RESULTS_DIR) / "models"
+
+# Bump when the stored results change shape, so older pickles are not reused
+# (2: results keep the forecast covariance needed for intervals)
+FORMAT = 2
+
+# Loaded models and warm-start parameters live in bounded caches (cache.py);
+# a model's size is taken as its pickle size.
+_MEMORY = cache.namespace("models")
+_WARM = cache.namespace("warm starts")
+
+
+def model_key(area, group, dataset_token, start_date, end_date, order, seasonal_order,
+              exog_vars=(), location=None, value_col="quantityKwh"):
+    """Plain dict describing one fitted model (stored next to it as JSON)."""
+    return {
+        "format": FORMAT,
+        "area": area,
+        "group": group,
+        "value_col": value_col,
+        "dataset": dataset_token,
+        "train_start": str(start_date),
+        "train_end": str(end_date),
+        "order": list(order),
+        "seasonal_order": list(seasonal_order),
+        "exog": list(exog_vars),
+        "location": list(location) if (exog_vars and location) else None,
+    }
+
+
+def structure(key):
+    """The part of a key that fixes the parameter vector (everything but data version and window)."""
+    return (key["area"], key["group"], key["value_col"], tuple(key["order"]),
+            tuple(key["seasonal_order"]), tuple(key["exog"]))
+
+
+def start_params(key):
+    """Last converged parameters of a model with the same structure, or None."""
+    return _WARM.get(structure(key))
+
+
+def remember(key, results):
+    """Keep the parameters of a converged fit as start values for similar fits."""
+    if getattr(results, "mle_retvals", None) and results.mle_retvals.get("converged"):
+        _WARM.put(structure(key), results.params.to_numpy().copy())
+
+
+def key_id(key):
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()[:20]
+
+
+def _paths(key, root=None):
+    folder = Path(root or MODELS_DIR)
+    kid = key_id(key)
+    return folder / f"{kid}.pkl", folder / f"{kid}.json"
+
+
+def load(key, root=None):
+    """Fitted results for key, or None. Loaded models are also kept in memory."""
+    return load_id(key_id(key), root)
+
+
+def load_id(kid, root=None):
+    """Fitted results by key id (as recorded in forecast metadata), or None."""
+    results = _MEMORY.get(kid)
+    if results is not None:
+        return results
+    pkl = Path(root or MODELS_DIR) / f"{kid}.pkl"
+    if not pkl.exists():
+        return None
+    from statsmodels.tsa.statespace.sarimax import SARIMAXResults
+    results = SARIMAXResults.load(str(pkl))
+    _MEMORY.put(kid, results, size=pkl.stat().st_size)
+    return results
+
+
+def save(key, results, fit_seconds=None, root=None, **extra):
+    """Persist results with a JSON sidecar (key, AIC/BIC, fit time, creation time, extra fields)."""
+    pkl, meta = _paths(key, root)
+    pkl.parent.mkdir(parents=True, exist_ok=True)
+    tmp = tmp_path(pkl)
+    results.save(str(tmp))
+    os.replace(tmp, pkl)
+    if "aic" not in extra:  # callers updating a model pass the AIC/BIC of its original fit
+        extra.update(aic=float(results.aic), bic=float(results.bic))
+    tmp = tmp_path(meta)
+    tmp.write_text(json.dumps({
+        "key": key,
+        "fit_seconds": fit_seconds,
+        "created": time.time(),
+        **extra,
+    }, indent=2))
+    os.replace(tmp, meta)
+    _MEMORY.put(key_id(key), results, size=pkl.stat().st_size)
+
+
+def metadata(key, root=None):
+    _, meta = _paths(key, root)
+    return json.loads(meta.read_text()) if meta.exists() else None
+
+
+def get_or_fit(key, fit, root=None):
+    """
+    Return (results, loaded_from_registry). fit() is called only when the
+    registry has no model for key; it must return (results, fit seconds).
+    """
+    results = load(key, root)
+    if results is not None:
+        remember(key, results)
+        return results, True
+    results, seconds = fit()
+    save(key, results, fit_seconds=seconds, root=root)
+    remember(key, results)
+    return results, False
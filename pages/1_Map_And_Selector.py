@@ -1,45 +1,28 @@
 import streamlit as st
-import geopandas as gpd
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import json
 import utils as ut
+import datasets as ds
+import geo_assets as ga
+import tracing
+from analysis.aggregation import mean_values_by_area
 
 # --- Apply custom styles & sidebar ---
 ut.apply_styles()
 ut.show_sidebar()
 
+MAP_ZOOM = 3
+
 # -------------------------------
-# --- load GeoJSON once, cache to speed up ---
-@st.cache_data(show_spinner=False)
-def load_geojson():
-    url = "https://nve.geodataonline.no/arcgis/rest/services/Mapservices/Elspot/MapServer/0/query?where=OBJECTID%20IN%20(6,7,8,9,10)&outFields=*&f=geojson"
-    gdf = gpd.read_file(url)
-    return gdf
-
-# --- UPDATED FUNCTION ---
-def mean_values_by_area(production_df, group, start_date, end_date):
-    """Return mean quantityKwh per priceArea for chosen group and interval (start_date to end_date)."""
-    start_date = pd.Timestamp(start_date).tz_localize('UTC')
-    end_date = pd.Timestamp(end_date).tz_localize('UTC')
-    # Ensure start_date is before end_date
-    if start_date > end_date:
-        start_date, end_date = end_date, start_date
-    
-    df = production_df[
-        (production_df['energyGroup'].str.lower() == group.lower()) &
-        (production_df['startTime'].between(pd.to_datetime(start_date), pd.to_datetime(end_date)))
-    ]
-    return df.groupby('priceArea')['quantityKwh'].mean().reset_index()
-
-def get_area_centroid(geojson_gdf, area_name):
-    """Calculate the centroid of a selected price area."""
-    selected = geojson_gdf[geojson_gdf['ElSpotOmr'] == area_name]
-    if not selected.empty:
-        centroid = selected.geometry.centroid.iloc[0]
-        return (centroid.y, centroid.x)  # (lat, lon)
-    return None
+# --- load pre-simplified GeoJSON from assets/ (see geo_assets.py) ---
+@ut.cached("geojson")
+def load_geojson(level):
+    return ga.load_assets(level)
+
+def get_area_centroid(centroids, area_name):
+    """Look up the precomputed centroid of a selected price area."""
+    return centroids.get(area_name)  # (lat, lon) or None
 
 # --- Set page configuration ---
 st.set_page_config(
@@ -68,46 +51,44 @@ if "selected_group" not in st.session_state:
     st.session_state.selected_group = None
 
 
-@st.cache_data(show_spinner=False)
+# Same namespace (and TTL) as the frame, so the token is refreshed with the data
+@ut.cached("dataset init", "mongo")
 def init_and_get_data(dataset_type):
+    """Load the dataset once per process and return its version token."""
     with st.spinner("Fetching data..."):
-        df = []
-        if dataset_type == "production":
-            df  = ut.normalize_columns(ut.load_data_from_mongo(db_name="indra", collection_name="production_per_group"))
-                #df = normalize_columns(ut.load_data_from_csv("No_sync/P_Energy.csv"))
-        else:
-                #df = normalize_columns(ut.load_data_from_csv("No_sync/C_Energy.csv"))
-            df = ut.normalize_columns(ut.load_data_from_mongo(db_name="indra", collection_name="consumption_per_group"))
+        df = ut.load_energy_data(dataset_type)
+        #df = ut.normalize_columns(ut.load_data_from_csv("No_sync/P_Energy.csv"))
 
-
-    return df
+    # Content hash is computed here only, cached computations key on the token
+    return ds.register(df, dataset_type)
 
 mode = st.radio("Choose dataset:", ["Production", "Consumption"], horizontal=True)
 
 dataset_type = mode.lower()
 
 with st.spinner("Fetching data..."):
-    production_df = init_and_get_data(dataset_type)
+    dataset_token = init_and_get_data(dataset_type)
+    production_df = ds.get(dataset_token)
 
 st.session_state.selected_dataset = dataset_type
+st.session_state.selected_data_type = dataset_type
+st.session_state.dataset_token = dataset_token
 
 if len(production_df) == 0:
     st.warning("There is not any data to process, Please check your data source.")
     st.stop()
 
-production_df['quantityKwh'] = pd.to_numeric(production_df['quantityKwh'], errors="coerce")
-
 
 # --- DATA RANGE LIMITS ---
-production_df['startTime'] = pd.to_datetime(production_df['startTime'], utc=True)
-min_date = production_df['startTime'].min().date()
-max_date = production_df['startTime'].max().date()
+summary = ds.summary(dataset_token)
+min_date = summary['start'].date()
+max_date = summary['end'].date()
 
 # --- Display Data Range Info ---
 st.info(f"The available {mode.lower()} data ranges from **{min_date.strftime('%Y-%m-%d')}** to **{max_date.strftime('%Y-%m-%d')}**.")
 
 # --- Dynamic energy group selection ---
-group_options = sorted(production_df['energyGroup'].dropna().unique())
+group_options = summary['groups']
 col1, col2, col3 = st.columns([1, 1, 1])
 
 with col1:
@@ -131,10 +112,16 @@ with col3:
 
 # --- Load GeoJSON ---
 with st.spinner("Fetching geodata..."):
-    geojson = load_geojson()
+    try:
+        geojson, centroids, outlines = load_geojson(ga.level_for_zoom(MAP_ZOOM))
+    except Exception as e:  # first build failed (NVE unreachable); the dataset above is loaded regardless
+        st.error(f"Could not load the price-area map: {e}. "
+                 "The other pages work; build the map assets with `python geo_assets.py`.")
+        st.stop()
 
     # --- Compute mean values for chosen interval ---
-    mean_df = mean_values_by_area(production_df, group, start_date, end_date)
+    with tracing.span("area means", rows=len(production_df)):
+        mean_df = mean_values_by_area(production_df, group, start_date, end_date)
     mean_df['priceArea'] = mean_df['priceArea'].str.replace('NO', 'NO ', regex=False)
 
     # --- Build choropleth map ---
@@ -148,44 +135,25 @@ with st.spinner("Fetching geodata..."):
         center={"lat": 65, "lon": 13},
         mapbox_style="carto-positron",
         opacity=0.6,
-        zoom=3,
+        zoom=MAP_ZOOM,
         height=600,
         hover_name="priceArea",
     )
 
 # --- Highlight selected area ---
 if st.session_state.selected_area:
-    selected_gdf = geojson[geojson['ElSpotOmr'] == st.session_state.selected_area]
-    if not selected_gdf.empty:
-        selected_geojson = json.loads(selected_gdf.to_json())
-        for feature in selected_geojson['features']:
-            if feature['geometry']['type'] == 'Polygon':
-                coords = feature['geometry']['coordinates'][0]
-                lons = [coord[0] for coord in coords]
-                lats = [coord[1] for coord in coords]
-                fig.add_trace(go.Scattermapbox(
-                    lon=lons,
-                    lat=lats,
-                    mode='lines',
-                    line=dict(width=2, color='red'),
-                    name=f'Selected: {st.session_state.selected_area}',
-                    showlegend=True,
-                    hoverinfo='skip'
-                ))
-            elif feature['geometry']['type'] == 'MultiPolygon':
-                for polygon in feature['geometry']['coordinates']:
-                    coords = polygon[0]
-                    lons = [coord[0] for coord in coords]
-                    lats = [coord[1] for coord in coords]
-                    fig.add_trace(go.Scattermapbox(
-                        lon=lons,
-                        lat=lats,
-                        mode='lines',
-                        line=dict(width=2, color='red'),
-                        name=f'Selected: {st.session_state.selected_area}',
-                        showlegend=False,
-                        hoverinfo='skip'
-                    ))
+    outline = outlines.get(st.session_state.selected_area)
+    if outline:
+        # All rings in one trace, separated by None in the precomputed arrays
+        fig.add_trace(go.Scattermapbox(
+            lon=outline["lon"],
+            lat=outline["lat"],
+            mode='lines',
+            line=dict(width=2, color='red'),
+            name=f'Selected: {st.session_state.selected_area}',
+            showlegend=True,
+            hoverinfo='skip'
+        ))
 
 # --- Add marker for selected coordinates ---
 if st.session_state.selected_coords:
@@ -215,7 +183,7 @@ fig.update_layout(
 )
 
 # --- Display map ---
-selected = st.plotly_chart(
+selected = ut.plotly_chart(
     fig,
     width='stretch',
     on_select="rerun",
@@ -231,7 +199,7 @@ if selected and selected.selection and selected.selection.get("points"):
         if clicked_area:
             if clicked_area != st.session_state.selected_area:
                 st.session_state.selected_area = clicked_area
-                centroid = get_area_centroid(geojson, clicked_area)
+                centroid = get_area_centroid(centroids, clicked_area)
                 if centroid:
                     st.session_state.selected_coords = centroid
                 st.rerun()
@@ -2,8 +2,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import requests
 import utils as ut
+import tracing
+from analysis.snow_drift import compute_average_sector, compute_yearly_results, season_of
 
 ut.apply_styles()
 ut.show_sidebar()
@@ -14,92 +15,6 @@ st.title("Snow Drift Analysis")
 
 # ========== SNOW DRIFT CALCULATION FUNCTIONS ==========
 
-def compute_Qupot(hourly_wind_speeds, dt=3600):
-    """Compute potential wind-driven snow transport (Qupot) [kg/m]"""
-    total = sum((u ** 3.8) * dt for u in hourly_wind_speeds) / 233847
-    return total
-
-def sector_index(direction):
-    """Convert wind direction to sector index (0-15)"""
-    return int(((direction + 11.25) % 360) // 22.5)
-
-def compute_sector_transport(hourly_wind_speeds, hourly_wind_dirs, dt=3600):
-    """Compute transport for each of 16 wind sectors"""
-    sectors = [0.0] * 16
-    for u, d in zip(hourly_wind_speeds, hourly_wind_dirs):
-        idx = sector_index(d)
-        sectors[idx] += ((u ** 3.8) * dt) / 233847
-    return sectors
-
-def compute_snow_transport(T, F, theta, Swe, hourly_wind_speeds, dt=3600):
-    """Compute snow drifting transport according to Tabler (2003)"""
-    Qupot = compute_Qupot(hourly_wind_speeds, dt)
-    Qspot = 0.5 * T * Swe
-    Srwe = theta * Swe
-    
-    if Qupot > Qspot:
-        Qinf = 0.5 * T * Srwe
-        control = "Snowfall controlled"
-    else:
-        Qinf = Qupot
-        control = "Wind controlled"
-    
-    Qt = Qinf * (1 - 0.14 ** (F / T))
-    
-    return {
-        "Qt (kg/m)": Qt,
-        "Control": control
-    }
-
-def compute_yearly_results(df, T, F, theta):
-    """
-    Compute yearly snow transport.
-    Year defined as July 1 to June 30 of next year.
-    """
-    seasons = sorted(df['season'].unique())
-    results_list = []
-    
-    for s in seasons:
-        season_start = pd.Timestamp(year=s, month=7, day=1)
-        season_end = pd.Timestamp(year=s+1, month=6, day=30, hour=23, minute=59, second=59)
-        df_season = df[(df['time'] >= season_start) & (df['time'] <= season_end)].copy()
-        
-        if df_season.empty:
-            continue
-            
-        # Swe = precipitation when temp < 1°C
-        df_season['Swe_hourly'] = df_season.apply(
-            lambda row: row['precipitation'] if row['temperature'] < 1 else 0, 
-            axis=1
-        )
-        
-        total_Swe = df_season['Swe_hourly'].sum()
-        wind_speeds = df_season["wind_speed"].tolist()
-        
-        result = compute_snow_transport(T, F, theta, total_Swe, wind_speeds)
-        result["season"] = f"{s}/{s+1}"
-        results_list.append(result)
-    
-    return pd.DataFrame(results_list)
-
-def compute_average_sector(df):
-    """Compute average directional breakdown over all seasons"""
-    sectors_list = []
-    
-    for s, group in df.groupby('season'):
-        group = group.copy()
-        group['Swe_hourly'] = group.apply(
-            lambda row: row['precipitation'] if row['temperature'] < 1 else 0,
-            axis=1
-        )
-        ws = group["wind_speed"].tolist()
-        wdir = group["wind_direction"].tolist()
-        sectors = compute_sector_transport(ws, wdir)
-        sectors_list.append(sectors)
-    
-    avg_sectors = np.mean(sectors_list, axis=0)
-    return avg_sectors
-
 def plot_wind_rose(avg_sector_values, overall_avg):
     """Create polar wind rose plot"""
     num_sectors = 16
@@ -147,13 +62,13 @@ def plot_wind_rose(avg_sector_values, overall_avg):
     return fig
 
 
-@st.cache_data(show_spinner=False)
+@ut.cached("open-meteo (snow)", "weather")
 def fetch_weather_data(lat, lon, start_year, end_year):
     """Fetch hourly weather data from Open-Meteo API"""
     start_date = f"{start_year}-07-01"
     end_date = f"{end_year + 1}-06-30"
     
-    url = "https://archive-api.open-meteo.com/v1/archive"
+    url = ut.OPEN_METEO_URL
     
     params = {
         "latitude": lat,
@@ -164,31 +79,26 @@ def fetch_weather_data(lat, lon, start_year, end_year):
         "timezone": "Europe/Oslo"
     }
     
-    try:
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
-        hourly = data.get('hourly', {})
-        
-        df = pd.DataFrame({
-            'time': pd.to_datetime(hourly['time']),
-            'temperature': hourly['temperature_2m'],
-            'precipitation': hourly['precipitation'],
-            'wind_speed': hourly['wind_speed_10m'],
-            'wind_direction': hourly['wind_direction_10m']
-        })
-        
-        # Define season: July onwards = current year, before July = previous year
-        df['season'] = df['time'].apply(
-            lambda dt: dt.year if dt.month >= 7 else dt.year - 1
-        )
-        
-        return df
+    import requests
+
+    response = requests.get(url, params=params, timeout=30)
+    response.raise_for_status()
+    data = response.json()
+    
+    hourly = data.get('hourly', {})
+    
+    df = pd.DataFrame({
+        'time': pd.to_datetime(hourly['time']),
+        'temperature': hourly['temperature_2m'],
+        'precipitation': hourly['precipitation'],
+        'wind_speed': hourly['wind_speed_10m'],
+        'wind_direction': hourly['wind_direction_10m']
+    })
+    
+    # Define season: July onwards = current year, before July = previous year
+    df['season'] = season_of(df['time'])
     
-    except Exception as e:
-        st.error(f"Error fetching weather data: {e}")
-        return None
+    return df
 
 # ========== MAIN APP ==========
 
@@ -257,7 +167,11 @@ theta = st.slider(
 # Calculate button
 if st.button("🔄 Calculate Snow Drift", type="primary", use_container_width=False):
     with st.spinner(f"Fetching weather data for {start_year}-{end_year}..."):
-        df = fetch_weather_data(lat, lon, start_year, end_year)
+        try:
+            df = fetch_weather_data(lat, lon, start_year, end_year)
+        except Exception as e:
+            st.error(f"Error fetching weather data: {e}")
+            df = None
     
     if df is not None and not df.empty:
         st.session_state['snow_drift_df'] = df
@@ -267,7 +181,7 @@ if st.button("🔄 Calculate Snow Drift", type="primary", use_container_width=Fa
         }
         st.success("Data fetched successfully!")
         st.rerun()
-    else:
+    elif df is not None:
         st.error("Failed to fetch weather data. Please try again.")
 
 # ========== RESULTS DISPLAY ==========
@@ -279,7 +193,7 @@ if 'snow_drift_df' in st.session_state:
     st.divider()
     st.subheader("Results")
     
-    with st.spinner("Calculating snow drift..."):
+    with st.spinner("Calculating snow drift..."), tracing.span("snow drift", rows=len(df)):
         yearly_df = compute_yearly_results(df, params['T'], params['F'], params['theta'])
         
         if yearly_df.empty:
@@ -312,7 +226,7 @@ if 'snow_drift_df' in st.session_state:
     # Wind Rose
     st.subheader("Wind Rose - Directional Snow Transport")
     fig_rose = plot_wind_rose(avg_sectors, overall_avg)
-    st.plotly_chart(fig_rose, width='stretch')
+    ut.plotly_chart(fig_rose, width='stretch')
     
     st.divider()
     
@@ -356,7 +270,7 @@ if 'snow_drift_df' in st.session_state:
         height=400
     )
     
-    st.plotly_chart(fig_bar, width='stretch')
+    ut.plotly_chart(fig_bar, width='stretch')
     
 
 # Help
@@ -3,6 +3,8 @@ import pandas as pd
 import plotly.graph_objects as go
 import utils as ut
 import datetime as dt
+import tracing
+from analysis import correlation
 
 ut.apply_styles()
 ut.show_sidebar()
@@ -10,7 +12,7 @@ ut.show_sidebar()
 
 # Load data from session_state
 #meteo_df = st.session_state.get("df_2021", pd.DataFrame())
-energy_df = st.session_state.get("df", pd.DataFrame())
+energy_df = ut.session_dataset()
 selected_coords = st.session_state.get("selected_coords", None)
 selected_data_type = st.session_state.get("selected_data_type", None)
 
@@ -34,19 +36,12 @@ end_date = pd.to_datetime(energy_df["startTime"].max(), utc=True).date()
 st.info(f"The available {selected_data_type} data ranges from **{start_date.strftime('%Y-%m-%d')}** to **{end_date.strftime('%Y-%m-%d')}**.")
 
 with st.spinner("Fetching data..."):
-    meteo_df = []
-    meteo_df = ut.get_weather_data(lat, lon, start_date, end_date)
+    meteo_df = ut.weather_or_stop(lat, lon, start_date, end_date)
 
 if len(meteo_df) == 0:
     st.warning("Error while fetching mateo data!!")
 
 
-# Helper: sliding‑window correlation
-def sliding_window_corr(x: pd.Series, y: pd.Series, window: int = 24, lag: int = 0) -> pd.Series:
-    """Compute rolling correlation between two equal‑length Series with lag."""
-    x_shifted = x.shift(lag)
-    return x_shifted.rolling(window).corr(y)
-
 # User controls
 meteo_cols = [c for c in meteo_df.columns if c not in ["time", "date", "datetime"]]
 meteo_var = st.selectbox("Select meteorological variable", meteo_cols, index=0)
@@ -59,38 +54,17 @@ window = st.slider("Window length (hours)", 12, 240, 72, step=12)
 
 # Prepare aligned data  (fixed duplicates + timezones)
 
-# ---- ENERGY ----
-ts_energy = (
-    energy_df[energy_df["energyGroup"] == energy_group]
-    .groupby("startTime", as_index=True)["quantityKwh"]
-    .mean()                                   # aggregate -> unique timestamp
-    .sort_index()
-)
-ts_energy.index = pd.to_datetime(ts_energy.index, utc=True)
-ts_energy = ts_energy[~ts_energy.index.duplicated(keep="first")]
-
-# ---- METEOROLOGY ----
-ts_meteo = (
-    meteo_df.groupby("time", as_index=True)[meteo_var]
-    .mean()                                   # aggregate -> unique timestamp
-    .astype(float)
-    .sort_index()
-)
-ts_meteo.index = pd.to_datetime(ts_meteo.index, utc=True)
-ts_meteo = ts_meteo[~ts_meteo.index.duplicated(keep="first")]
-
-# ---- JOIN ----
-joined = pd.concat(
-    [ts_meteo.rename("meteo"), ts_energy.rename("energy")],
-    axis=1
-).dropna()
+with tracing.span("align series") as align:
+    joined = correlation.align_energy_weather(energy_df, meteo_df, energy_group, meteo_var)
+    align.rows = len(joined)
 
 if joined.empty:
     st.warning("No overlapping timestamps found after alignment.")
     st.stop()
 
 # Compute rolling correlation
-corr_series = sliding_window_corr(joined["meteo"], joined["energy"], window, lag)
+with tracing.span("sliding correlation", rows=len(joined)):
+    corr_series = correlation.sliding_window_corr(joined["meteo"], joined["energy"], window, lag)
 corr_series.name = "corr"
 
 # Plotly visualization
@@ -115,7 +89,7 @@ fig.update_layout(
     height=500,
 )
 
-st.plotly_chart(fig, width='stretch')
+ut.plotly_chart(fig, width='stretch')
 
 # Summary statistics
 st.subheader("Correlation Summary Statistics")
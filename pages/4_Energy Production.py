@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import utils as ut
+import datasets as ds
+import tracing
 
 ut.apply_styles()
 ut.show_sidebar()
@@ -22,30 +24,24 @@ if selected_area is None:
     st.stop()
 
 
-#@st.cache_data(show_spinner=False)
-def get_df():
-    df = st.session_state.get("df", [])
-    return df
-
-# ---------------- LOAD DATA ----------------
-with st.spinner("Fetching data..."):
-    df = get_df()
-    df["startTime"] = pd.to_datetime(df["startTime"], utc=True)
-    df["quantityKwh"] = pd.to_numeric(df["quantityKwh"], errors="coerce")
+dataset_token = st.session_state.get("dataset_token")
+if dataset_token is None or not ds.is_registered(dataset_token):
+    st.warning("No data loaded. Please load it from the Map page.")
+    if st.button("🗺️ Go to Map Page", type="primary", key="load_data"):
+        st.switch_page("pages/1_Map_And_Selector.py")
+    st.stop()
 
 # ---------------- YEAR SELECTION ----------------
-# Auto-detect available years
-available_years = sorted(df["startTime"].dt.year.unique())
+# Years of the shared dataset (computed once when it was loaded)
+available_years = ds.summary(dataset_token)["years"]
 
 selected_year = st.selectbox("Select Year:", available_years)
 
-# Filter for selected year (instead of fixed 2021)
-df = df[df["startTime"].dt.year == selected_year]
-
-
-# ---------------- CLEAN AGAIN (unchanged logic) ----------------
-df["startTime"] = pd.to_datetime(df["startTime"], utc=True)
-df["quantityKwh"] = pd.to_numeric(df["quantityKwh"], errors="coerce")
+# ---------------- LOAD DATA ----------------
+# Rows of the selected year, viewed from the shared dataset (already normalized at load)
+with st.spinner("Fetching data..."), tracing.span("prepare frame") as prep:
+    df = ut.session_dataset(year=selected_year)
+    prep.rows = len(df)
 
 
 # -------------- LAYOUT: TWO COLUMNS ----------------
@@ -72,7 +68,7 @@ with col1:
     
     pie_fig.update_layout(margin=dict(t=200, b=0, l=0, r=0))  # Adjust 't' (top margin) to your desired value (e.g., 80)
 
-    st.plotly_chart(pie_fig, width='stretch')
+    ut.plotly_chart(pie_fig, width='stretch')
 
 
 # --------- LINE CHART ---------
@@ -105,19 +101,20 @@ with col2:
     ]
 
     if not line_df.empty:
-        pivot_df = line_df.pivot_table(
-            index="startTime",
-            columns="energyGroup",
-            values="quantityKwh",
-            aggfunc="sum",
-            fill_value=0
-        ).reset_index()
-
-        line_long = pivot_df.melt(
-            id_vars="startTime",
-            var_name="energyGroup",
-            value_name="quantityKwh"
-        )
+        with tracing.span("line pivot", rows=len(line_df)):
+            pivot_df = line_df.pivot_table(
+                index="startTime",
+                columns="energyGroup",
+                values="quantityKwh",
+                aggfunc="sum",
+                fill_value=0
+            ).reset_index()
+
+            line_long = pivot_df.melt(
+                id_vars="startTime",
+                var_name="energyGroup",
+                value_name="quantityKwh"
+            )
 
         line_fig = px.line(
             line_long,
@@ -127,7 +124,7 @@ with col2:
             title=f"Energy {selected_data_type} in {selected_area} for {pd.Timestamp(selected_year, month, 1).strftime('%B')} {selected_year}"
         )
 
-        st.plotly_chart(line_fig, width='stretch')
+        ut.plotly_chart(line_fig, width='stretch')
     else:
         st.info("No data available for the selected combination.")
 
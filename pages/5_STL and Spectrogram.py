@@ -1,11 +1,12 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-from scipy.signal import spectrogram
-from statsmodels.tsa.seasonal import STL
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import utils as ut 
+import datasets as ds
+import results_store as rs
+import batch.stl as batch_stl
+import jobs
+from analysis import spectral
 
 ut.apply_styles()
 ut.show_sidebar()
@@ -14,14 +15,14 @@ st.title("STL analysis and Spectrogram")
 
 # Try to get the selected area and year
 area = st.session_state.get('selected_area', None)
-production_df = st.session_state.get("df", [])
+dataset_token = st.session_state.get("dataset_token", None)
 selected_data_type = st.session_state.get("selected_data_type", None)
 
 
 if area:
     st.write(f"Working with Price Area: {area}")
 
-if area is None or len(production_df) == 0:
+if area is None or dataset_token is None or not ds.is_registered(dataset_token):
     st.warning("No price area selected. Please select one from the Map page.")
     if st.button("🗺️ Go to Map Page", type="primary"):
         st.switch_page("pages/1_Map_And_Selector.py")
@@ -37,132 +38,105 @@ st.caption(f"Info: The analysing dataset is the energy {selected_data_type} data
 area = area.replace(" ", "")
 
 
-production_df["startTime"] = pd.to_datetime(production_df["startTime"], utc=True)
-available_years = sorted(production_df["startTime"].dt.year.unique())
+available_years = ds.summary(dataset_token)["years"]
 
 selected_year = st.selectbox("Select Year:", available_years)
 
-# Filter entire dataframe BEFORE heavy computations
-production_df = production_df[production_df["startTime"].dt.year == selected_year]
+# Only the selected year's rows, viewed from the shared dataset
+production_df = ut.session_dataset(year=selected_year)
 
 if production_df.empty:
     st.error(f"No data available for year {selected_year}.")
     st.stop()
 
-with st.spinner("Implementing STL and Spectrogram... ⏳"):
-
-    @st.cache_data(show_spinner=False)
-    def production_spectrogram(
-        production_df,
-        area='NO1',
-        group='hydro',
-        time_col='startTime',
-        value_col='quantityKwh',
-        window_length=256,
-        overlap=128
-    ):
-        sub = production_df[
-            (production_df['priceArea'] == area) &
-            (production_df['energyGroup'].str.lower() == group.lower())
-        ].copy()
-
-        if sub.empty:
-            raise ValueError(f"No data found for area '{area}' and group '{group}'.")
-
-        sub = sub.sort_values(time_col)
-        sub[time_col] = pd.to_datetime(sub[time_col], utc=True)
-        sub = sub.set_index(time_col)
-        signal = sub[value_col].fillna(0.0).values
-
-        fs = 1.0
-        f, t, Sxx = spectrogram(
-            signal,
-            fs=fs,
-            nperseg=window_length,
-            noverlap=overlap,
-            scaling='density'
+# Cached on (dataset token, parameters) – the frame itself is never hashed.
+# One vectorized call covers every group of the area, so switching group is free.
+@ut.cached("spectral panel", "figures")
+def production_spectral_panel(
+    dataset_token,
+    year,
+    area='NO1',
+    window_length=256,
+    overlap=128
+):
+    panel = spectral.hourly_panel(ds.get(dataset_token), area=area, by="energyGroup", year=year)
+    if panel.empty:
+        raise ValueError(f"No data found for area '{area}' in {year}.")
+    return spectral.panel_spectra(panel, window_length=window_length, overlap=overlap)
+
+
+def spectrogram_figure(spec, area, group, year):
+    """Heatmap of one group's spectrogram from the cached panel result."""
+    i = spec["groups"].index(group)
+    fig = go.Figure(
+        data=go.Heatmap(
+            z=spectral.to_db(spec["Sxx"][i]),
+            x=spec["times"],
+            y=spec["f"],
+            colorscale='Viridis',
+            colorbar=dict(title='Power (dB)'),
         )
+    )
 
-        Sxx_dB = 10 * np.log10(Sxx + 1e-10)
+    fig.update_layout(
+        title=f"Spectrogram — {area} ({group.title()}) — {year}",
+        xaxis_title="Time",
+        yaxis_title="Frequency (cycles/day)",
+        template="plotly_white",
+        height=500
+    )
+    return fig
 
-        fig = go.Figure(
-            data=go.Heatmap(
-                z=Sxx_dB,
-                x=t,
-                y=f,
-                colorscale='Viridis',
-                colorbar=dict(title='Power (dB)'),
-            )
-        )
 
-        fig.update_layout(
-            title=f"Spectrogram — {area} ({group.title()}) — {selected_year}",
-            xaxis_title="Time Index",
-            yaxis_title="Frequency",
-            template="plotly_white",
-            height=500
-        )
+def psd_figure(spec, area, year):
+    """Welch PSD of every group in one figure."""
+    fig = go.Figure()
+    for group, pxx in zip(spec["groups"], spec["Pxx"]):
+        fig.add_trace(go.Scatter(x=spec["f_psd"], y=spectral.to_db(pxx), mode='lines', name=group.title()))
 
-        return f, t, Sxx, fig
-
-
-    @st.cache_data(show_spinner=False)
-    def stl_decomposition_by_area(
-        production_df,
-        area='NO1',
-        group='wind',
-        time_col='startTime',
-        value_col='quantityKwh',
-        period=24,
-        seasonal=12,
-        trend=365,
-        robust=True
-    ):
-        sub = production_df[
-            (production_df['priceArea'] == area) &
-            (production_df['energyGroup'].str.lower() == group.lower())
-        ].copy()
-
-        if sub.empty:
-            raise ValueError(f"No data found for city '{area}' and group '{group}'.")
-
-        sub = sub.sort_values(time_col)
-        sub[time_col] = pd.to_datetime(sub[time_col], utc=True)
-        sub = sub.set_index(time_col)
-
-        stl = STL(
-            sub[value_col],
-            period=period,
-            seasonal=seasonal,
-            trend=trend,
-            robust=robust
-        )
-        result = stl.fit()
+    fig.update_layout(
+        title=f"Welch PSD — all groups in {area} — {year}",
+        xaxis_title="Frequency (cycles/day)",
+        yaxis_title="Power (dB)",
+        template="plotly_white",
+        height=500
+    )
+    return fig
 
-        fig = make_subplots(
-            rows=4, cols=1,
-            shared_xaxes=True,
-            vertical_spacing=0.03,
-            subplot_titles=("Observed", "Trend", "Seasonal", "Residual")
-        )
 
-        idx = sub.index
+STL_TITLES = {
+    "observed": "Observed", "trend": "Trend", "seasonal": "Seasonal",
+    "seasonal_24": "Daily seasonal", "seasonal_168": "Weekly seasonal",
+    "seasonal_yearly": "Yearly seasonal", "resid": "Residual",
+}
 
-        fig.add_trace(go.Scatter(x=idx, y=sub[value_col], mode='lines', name='Observed'), row=1, col=1)
-        fig.add_trace(go.Scatter(x=idx, y=result.trend, mode='lines', name='Trend'), row=2, col=1)
-        fig.add_trace(go.Scatter(x=idx, y=result.seasonal, mode='lines', name='Seasonal'), row=3, col=1)
-        fig.add_trace(go.Scatter(x=idx, y=result.resid, mode='lines', name='Residual'), row=4, col=1)
 
-        fig.update_layout(
-            height=800,
-            title_text=f"STL Decomposition — {area} ({group.title()}) — {selected_year}",
-            showlegend=False,
-            template="plotly_white"
-        )
+def stl_figure(comps, area, group, year):
+    """One subplot per stored component (observed, trend, seasonal(s), residual)."""
+    columns = list(comps.columns)
+    titles = tuple(STL_TITLES.get(c, c) for c in columns)
+    fig = make_subplots(
+        rows=len(columns), cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.03,
+        subplot_titles=titles
+    )
 
-        fig.update_xaxes(title_text="Time", row=4, col=1)
+    idx = comps.index
 
-        return result, fig
+    for row, (column, title) in enumerate(zip(columns, titles), start=1):
+        fig.add_trace(go.Scatter(x=idx, y=comps[column], mode='lines', name=title), row=row, col=1)
+
+    fig.update_layout(
+        height=200 * len(columns),
+        title_text=f"STL Decomposition — {area} ({group.title()}) — {year}",
+        showlegend=False,
+        template="plotly_white"
+    )
+
+    fig.update_xaxes(title_text="Time", row=len(columns), col=1)
+
+    return fig
 
 
 # Group selector
@@ -173,26 +147,59 @@ tab1, tab2 = st.tabs(["STL Decomposition", "Spectrogram"])
 
 with tab1:
     st.subheader("Seasonal-Trend Decomposition (STL)")
-    with st.spinner("Processing STL..."):
-        result, fig = stl_decomposition_by_area(
-            production_df,
-            area=area,
-            group=group,
-            period=24,
-            seasonal=13,
-            trend=365,
-            robust=True
-        )
-        st.plotly_chart(fig, width='stretch')
+    stl_mode = st.radio(
+        "Decomposition",
+        ["STL (daily period, selected year)", "Multi-seasonal (daily + weekly + yearly, all years)"],
+        horizontal=True
+    )
+    method = "mstl" if stl_mode.startswith("Multi") else "stl"
+    label_year = "all years" if method == "mstl" else selected_year
+
+    # Precomputed by `python -m batch.stl [--mstl]`, missing combinations are computed in the background
+    stl_path = batch_stl.result_path(dataset_token, area, group, selected_year, method)
+    comps = rs.read_frame(stl_path)
+    if comps is not None:
+        ut.plotly_chart(stl_figure(comps, area, group, label_year), width='stretch')
+    else:
+        source_df = ds.get(dataset_token) if method == "mstl" else production_df
+        try:
+            job = batch_stl.submit_missing(source_df, dataset_token, area, group, selected_year, method)
+        except ValueError as e:
+            st.warning(str(e))
+        else:
+            if job is None or job.status == jobs.DONE:
+                st.button("🔄 Show result")
+            elif job.status == jobs.FAILED:
+                st.error(f"{method.upper()} failed: {job.error}")
+                st.button("Retry", on_click=jobs.forget, args=(job.key,))
+            elif job.status == jobs.CANCELLED:
+                st.info("The decomposition was cancelled.")
+                st.button("Start again", on_click=jobs.forget, args=(job.key,))
+            else:
+                st.info("This decomposition has not been precomputed yet. It is being computed in the "
+                        "background and shows up here when ready, the other tab stays usable meanwhile.")
+                ut.show_job(job, f"{method.upper()} decomposition")
 
 with tab2:
     st.subheader("Spectrogram")
     with st.spinner("Processing Spectrogram..."):
-        f, t, Sxx, fig2 = production_spectrogram(
-            production_df,
-            area=area,
-            group=group,
-            window_length=256,
-            overlap=128
-        )
-        st.plotly_chart(fig2, width='stretch')
+        try:
+            spec = production_spectral_panel(
+                dataset_token,
+                selected_year,
+                area=area,
+                window_length=256,
+                overlap=128
+            )
+        except ValueError as e:
+            st.warning(str(e))
+            spec = None
+
+    if spec is not None:
+        if group in spec["groups"]:
+            ut.plotly_chart(spectrogram_figure(spec, area, group, selected_year), width='stretch')
+        else:
+            st.warning(f"No data found for area '{area}' and group '{group}'.")
+
+        if st.checkbox("Compare all groups (Welch PSD)"):
+            ut.plotly_chart(psd_figure(spec, area, selected_year), width='stretch')
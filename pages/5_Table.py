@@ -46,7 +46,7 @@ year = st.selectbox(
 st.caption(f"Info: These dataset cover open-meteo weathers data for {city} for year {year}.")
 
 with st.spinner("Fetching data..."):
-    df_2021 = ut.get_weather_data(lat, lon, f"{year}-01-01", f"{year}-01-31")
+    df_2021 = ut.weather_or_stop(lat, lon, f"{year}-01-01", f"{year}-01-31")
 
 st.write("1. Overview of the dataset.")
 st.write(df_2021)
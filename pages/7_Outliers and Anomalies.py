@@ -1,10 +1,11 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from sklearn.neighbors import LocalOutlierFactor
-from scipy.fftpack import dct, idct
 import plotly.graph_objects as go
 import utils as ut 
+from analysis import outliers as outliers_lib
+from analysis import streaming
+import results_store as rs
+import tracing
 
 ut.apply_styles()
 ut.show_sidebar()
@@ -22,14 +23,16 @@ if selected_area is None or selected_coords is None:
 
 lat, lon = selected_coords
 
-year = st.selectbox(
-    "Select Year",
-    options=range(1940, 2025),
-    index=2021 - 1940
+start_year, end_year = st.slider(
+    "Select years",
+    min_value=1940,
+    max_value=2024,
+    value=(2021, 2021)
 )
+year = f"{start_year}" if start_year == end_year else f"{start_year}–{end_year}"
 
 with st.spinner("Fetching data..."):
-    df_2021 = ut.get_weather_data(lat, lon, f"{year}-01-01", f"{year}-01-31")
+    df_2021 = ut.weather_or_stop(lat, lon, f"{start_year}-01-01", f"{end_year}-12-31")
 
 area_mapping = {
     "NO1": {"city": "Oslo"},
@@ -48,131 +51,128 @@ st.caption(f"Info: These dataset cover open-meteo weathers data for {city} for y
 # =====================================================
 #        REPLACEMENT 1 — SPC Plot Using Plotly
 # =====================================================
-def analyze_temperature_outliers(
-    df_2021,
-    time_col='time',
-    temp_col='temperature_2m (°C)',
-    freq_cutoff=10,
-    k=3
-):
-    data = df_2021.copy()
-    data[time_col] = pd.to_datetime(data[time_col])
-    data = data.sort_values(time_col).reset_index(drop=True)
+def weather_columns(df, time_col='time'):
+    return [c for c in df.columns if c != time_col]
 
-    temps = data[temp_col].astype(float).values
 
-    # ---- DCT high-pass filter ----
-    coeff = dct(temps, norm='ortho')
-    highpass = np.copy(coeff)
-    highpass[:freq_cutoff] = 0.0
-    satv = idct(highpass, norm='ortho')
+@ut.cached("spc filter", "figures")
+def spc_filtered(lat, lon, start_year, end_year, freq_cutoff, time_col='time'):
+    """
+    DCT high-pass of all weather variables as one 2-D transform, cached per
+    (dataset, cutoff). Changing k only re-thresholds these arrays.
+    """
+    df = ut.get_weather_data(lat, lon, f"{start_year}-01-01", f"{end_year}-12-31")
+    return outliers_lib.spc_bundle(df.sort_values(time_col).reset_index(drop=True), freq_cutoff, time_col)
 
-    median_satv = np.median(satv)
-    mad_satv = np.median(np.abs(satv - median_satv))
-    robust_sigma = 1.4826 * mad_satv
-    upper = median_satv + k * robust_sigma
-    lower = median_satv - k * robust_sigma
 
-    outlier_mask = (satv > upper) | (satv < lower)
-    outliers_df = data.loc[outlier_mask].copy()
-    outliers_df['SATV'] = satv[outlier_mask]
-
-    # ---- Convert to temperature space ----
-    temp_trend = temps - satv
-    upper_curve = temp_trend + upper
-    lower_curve = temp_trend + lower
+@tracing.traced("spc outliers + figure")
+def analyze_temperature_outliers(
+    spc,
+    temp_col='temperature_2m (°C)',
+    k=3
+):
+    outliers_df, bands, stats = outliers_lib.variable_outliers(spc, temp_col, k)
+    times = spc["time"]
+    temps = spc["values"][:, spc["columns"].index(temp_col)]
+    upper_curve = bands["upper"].to_numpy()
+    lower_curve = bands["lower"].to_numpy()
 
     # =====================================================
-    #              PLOTLY VERSION OF THE FIGURE
+    #     PLOTLY VERSION OF THE FIGURE (WebGL, decades of hours)
     # =====================================================
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(
-        x=data[time_col], y=temps,
+    fig.add_trace(go.Scattergl(
+        x=times, y=temps,
         mode="lines",
-        name="Temperature",
+        name=temp_col,
         line=dict(color="orange")
     ))
 
-    fig.add_trace(go.Scatter(
-        x=data[time_col], y=upper_curve,
+    fig.add_trace(go.Scattergl(
+        x=times, y=upper_curve,
         mode="lines",
         name="Upper SPC Limit",
         line=dict(color="gray", dash="dash")
     ))
 
-    fig.add_trace(go.Scatter(
-        x=data[time_col], y=lower_curve,
+    fig.add_trace(go.Scattergl(
+        x=times, y=lower_curve,
         mode="lines",
         name="Lower SPC Limit",
         line=dict(color="gray", dash="dash")
     ))
 
-    fig.add_trace(go.Scatter(
-        x=data.loc[outlier_mask, time_col],
-        y=temps[outlier_mask],
+    fig.add_trace(go.Scattergl(
+        x=outliers_df['time'],
+        y=outliers_df[temp_col],
         mode="markers",
         name="Outliers",
         marker=dict(color="red", size=8)
     ))
 
     fig.update_layout(
-        title="Temperature Outliers via DCT High-pass Filtering & Robust SPC",
+        title=f"{temp_col} Outliers via DCT High-pass Filtering & Robust SPC",
         xaxis_title="Time",
-        yaxis_title="Temperature (°C)",
+        yaxis_title=temp_col,
         template="plotly_white",
         height=500
     )
 
-    stats = {
-        'n_points': len(data),
-        'n_outliers': int(outlier_mask.sum()),
-        'proportion_outliers': float(outlier_mask.sum()) / len(data),
-        'median_SATV': float(median_satv),
-        'MAD_SATV': float(mad_satv),
-        'robust_sigma': float(robust_sigma),
-        'upper_limit_SATV': float(upper),
-        'lower_limit_SATV': float(lower)
-    }
-
     return outliers_df, stats, fig
 
 
+def spc_summary(spc, k):
+    """Outlier counts for every weather variable at once."""
+    mask = outliers_lib.spc_outliers(spc["satv"], spc["median"], spc["mad"], k)
+    return pd.DataFrame({
+        "Variable": spc["columns"],
+        "Outliers": mask.sum(axis=0),
+        "Proportion": mask.mean(axis=0).round(4),
+    })
+
+
 # =====================================================
 #       REPLACEMENT 2 — LOF Plot Using Plotly
 # =====================================================
+@ut.cached("lof", "figures")
+def lof_anomalies(lat, lon, start_year, end_year, features, proportion, time_col="time"):
+    """
+    LOF over the selected (standardized) features with parallel tree-based neighbour
+    search; long spans are fitted on a month-stratified sample and scored as novelties.
+    """
+    df = ut.get_weather_data(lat, lon, f"{start_year}-01-01", f"{end_year}-12-31")
+    data = df.sort_values(time_col).reset_index(drop=True)
+    X = data[list(features)].astype(float).interpolate(limit_direction="both").fillna(0).to_numpy()
+    mask, scores = outliers_lib.lof_scores(X, proportion=proportion, strata=data[time_col].dt.month.to_numpy())
+    return data, mask, scores
+
+
+@tracing.traced("lof anomalies + figure")
 def analyze_precipitation_anomalies(
-    df_2021,
+    df,
+    mask,
+    scores,
+    features=("precipitation (mm)",),
     time_col="time",
     precip_col="precipitation (mm)",
-    proportion=0.01
+    title="Precipitation Anomalies via Local Outlier Factor"
 ):
-    df = df_2021.copy()
-    df[time_col] = pd.to_datetime(df[time_col])
-    df = df.sort_values(time_col).reset_index(drop=True)
-
-    precip = df[precip_col].fillna(0).values.reshape(-1, 1)
-
-    lof = LocalOutlierFactor(contamination=proportion)
-    labels = lof.fit_predict(precip)
-    mask = labels == -1
-
-    outlier_df = df[mask].copy()
-    outlier_df["LOF_Score"] = lof.negative_outlier_factor_[mask]
+    outlier_df, stats = outliers_lib.anomaly_summary(df, mask, scores, list(features))
 
     # =====================================================
-    #               PLOTLY VERSION OF THE FIGURE
+    #     PLOTLY VERSION OF THE FIGURE (WebGL, decades of hours)
     # =====================================================
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=df[time_col], y=df[precip_col],
         mode="lines",
         name="Precipitation",
         line=dict(color="blue")
     ))
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=df.loc[mask, time_col],
         y=df.loc[mask, precip_col],
         mode="markers",
@@ -181,42 +181,108 @@ def analyze_precipitation_anomalies(
     ))
 
     fig.update_layout(
-        title="Precipitation Anomalies via Local Outlier Factor",
+        title=title,
         xaxis_title="Time",
         yaxis_title="Precipitation (mm)",
         template="plotly_white",
         height=500
     )
 
-    stats = {
-        "n_points": len(df),
-        "n_anomalies": len(outlier_df),
-        "proportion_anomalies": round(len(outlier_df) / len(df), 4),
-        "mean_precipitation": df[precip_col].mean(),
-        "mean_anomalies": outlier_df[precip_col].mean() if len(outlier_df) > 0 else None,
-    }
-
     return outlier_df, stats, fig
 
 
+@ut.cached("streaming replay", "figures")
+def streaming_replay(lat, lon, start_year, end_year, k, time_col="time"):
+    """Replay the weather data hour by hour through the online detector."""
+    df = ut.get_weather_data(lat, lon, f"{start_year}-01-01", f"{end_year}-12-31")
+    data = df.sort_values(time_col).reset_index(drop=True)
+    columns = weather_columns(data, time_col)
+    flagged = streaming.only_anomalies(
+        streaming.detect_anomalies(streaming.iter_records(data), columns, time_col=time_col, k=k,
+                                   circular=[c for c in columns if "direction" in c]),
+        columns
+    )
+    return pd.DataFrame(list(flagged)), columns
+
+
+@ut.cached("energy anomalies", "anomalies")
+def energy_anomalies(dataset_token):
+    """Flagged energy hours precomputed by `python -m batch.anomalies`."""
+    return rs.read_anomalies(dataset_token)
+
+
 # =====================================================
 #                 TABS + DISPLAY
 # =====================================================
-tab1, tab2 = st.tabs(["Temperature Outliers (SPC)", "Precipitation Anomalies (LOF)"])
+tab1, tab2, tab3, tab4 = st.tabs(["Weather Outliers (SPC)", "Weather Anomalies (LOF)", "Streaming Detector", "Energy Anomalies"])
 
 with tab1:
-    st.subheader("SPC Outlier Analysis (Temperature)")
-    cutoff = st.slider("DCT frequency cutoff", 5, 50, 10)
+    st.subheader("SPC Outlier Analysis")
+    cutoff = st.slider("DCT frequency cutoff", 5, 50, 10,
+                       help="Number of DCT coefficients removed per month of data, so the filter is the same for any span.")
     k = st.slider("MAD multiplier (k)", 1, 5, 3)
 
-    outliers, stats, fig = analyze_temperature_outliers(df_2021, freq_cutoff=cutoff, k=k)
-    st.plotly_chart(fig, width='stretch')
+    with st.spinner("Filtering weather variables..."):
+        spc = spc_filtered(lat, lon, start_year, end_year, cutoff)
+    spc_var = st.selectbox("Variable", spc["columns"], index=spc["columns"].index('temperature_2m (°C)'))
+
+    outliers, stats, fig = analyze_temperature_outliers(spc, temp_col=spc_var, k=k)
+    ut.plotly_chart(fig, width='stretch')
     st.write("Summary:", stats)
+    st.write("All variables:")
+    st.dataframe(spc_summary(spc, k), hide_index=True)
 
 with tab2:
-    st.subheader("Local Outlier Factor (Precipitation)")
+    st.subheader("Local Outlier Factor")
     prop = st.slider("Proportion of anomalies", 0.001, 0.05, 0.01)
-
-    anomalies, stats, fig = analyze_precipitation_anomalies(df_2021, proportion=prop)
-    st.plotly_chart(fig, width='stretch')
+    lof_mode = st.radio(
+        "Features",
+        ["Precipitation only", "Multivariate (precipitation, wind, gusts, temperature)"],
+        horizontal=True
+    )
+    if lof_mode.startswith("Multivariate"):
+        features = tuple(outliers_lib.LOF_FEATURES)
+        title = "Multivariate Weather Anomalies via Local Outlier Factor"
+    else:
+        features = ("precipitation (mm)",)
+        title = "Precipitation Anomalies via Local Outlier Factor"
+
+    with st.spinner("Scoring anomalies..."):
+        lof_df, lof_mask, lof_scores = lof_anomalies(lat, lon, start_year, end_year, features, prop)
+    anomalies, stats, fig = analyze_precipitation_anomalies(lof_df, lof_mask, lof_scores, features, title=title)
+    ut.plotly_chart(fig, width='stretch')
     st.write("Summary:", stats)
+
+with tab3:
+    st.subheader("Online detector (replayed hour by hour)")
+    st.caption("Running median and mean absolute deviation per series, updated in O(1) per new hour. The same stage can run behind any data loader as new data arrives.")
+    stream_k = st.slider("Robust z-score threshold", 3.0, 8.0, 4.0, step=0.5)
+    with st.spinner("Replaying data..."):
+        flagged_df, stream_cols = streaming_replay(lat, lon, start_year, end_year, stream_k)
+    if flagged_df.empty:
+        st.info("No anomalies flagged.")
+    else:
+        counts = {c: int(flagged_df[f"{c}_anomaly"].sum()) for c in stream_cols}
+        st.write("Flagged hours per variable:", counts)
+        st.dataframe(flagged_df, hide_index=True)
+
+with tab4:
+    st.subheader("Energy production/consumption anomalies (precomputed)")
+    dataset_token = st.session_state.get("dataset_token", None)
+    anomalies_df = energy_anomalies(dataset_token) if dataset_token else pd.DataFrame()
+    if anomalies_df.empty:
+        st.info("No precomputed anomalies for the loaded dataset. Run `python -m batch.anomalies <production|consumption>` to create them.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        areas = sorted(anomalies_df["priceArea"].unique())
+        sel_areas = col1.multiselect("Price areas", areas, default=[area_key] if area_key in areas else areas)
+        sel_groups = col2.multiselect("Groups", sorted(anomalies_df["energyGroup"].unique()))
+        sel_methods = col3.multiselect("Method", ["SPC", "LOF"], default=["SPC", "LOF"])
+
+        view = anomalies_df[
+            anomalies_df["priceArea"].isin(sel_areas) &
+            anomalies_df["method"].isin(sel_methods) &
+            (anomalies_df["energyGroup"].isin(sel_groups) if sel_groups else True)
+        ].sort_values("time")
+        st.write(f"{len(view)} flagged hours")
+        st.dataframe(view, hide_index=True)
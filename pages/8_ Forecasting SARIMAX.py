@@ -3,12 +3,16 @@
 # --------------------------------------------------------------------
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.graph_objects as go
-from statsmodels.tsa.statespace.sarimax import SARIMAX
 import warnings
 warnings.filterwarnings("ignore")
 import utils as ut 
+import model_registry as registry
+import results_store as rs
+import jobs
+import tracing
+from analysis import forecasting as fc
+from analysis import fast_forecast as ff
 
 ut.apply_styles()
 ut.show_sidebar()
@@ -22,7 +26,7 @@ st.title("Forecasting of Energy Production and Consumption")
 # --------------------------------------------------------------------
 # Load Data
 # --------------------------------------------------------------------
-energy_df = st.session_state.get("df", pd.DataFrame())
+dataset_token = st.session_state.get("dataset_token", None)
 
 #meteo_df = st.session_state.get("df_2021", pd.DataFrame())
 selected_area = st.session_state.get("selected_area", None)
@@ -39,12 +43,11 @@ if selected_area is None or selected_coords is None:
         st.switch_page("pages/1_Map_And_Selector.py")
     st.stop()
 
-# Filter for selected area if available
-if selected_area is not None:
-    energy_df = energy_df[energy_df["priceArea"] == selected_area]
-    if energy_df.empty:
-        st.warning(f"No data found for selected area: {selected_area}")
-        st.stop()
+# Rows of the selected area from the shared dataset
+energy_df = ut.session_dataset(area=selected_area)
+if energy_df.empty:
+    st.warning(f"No data found for selected area: {selected_area}")
+    st.stop()
 
 # --------------------------------------------------------------------
 # User Controls
@@ -52,7 +55,6 @@ if selected_area is not None:
 group = st.selectbox("Select energy group", energy_df["energyGroup"].unique().tolist())
 value_col = st.selectbox("Select quantity to forecast", ["quantityKwh"])
 
-energy_df["startTime"] = pd.to_datetime(energy_df["startTime"], utc=True)
 min_date = energy_df["startTime"].min().date()
 max_date = energy_df["startTime"].max().date()
 
@@ -73,18 +75,38 @@ forecast_horizon = st.number_input(
 )
 
 lat, lon = selected_coords
-meteo_df = ut.get_weather_data(lat, lon, start_date, end_date)
+meteo_df = ut.weather_or_stop(lat, lon, start_date, end_date)
+
+# Forecasting engine
+engine = st.selectbox(
+    "Forecasting engine", ["SARIMAX", *ff.ENGINES],
+    help="SARIMAX handles short seasonal periods (e.g. 24 h). For weekly or yearly "
+         "seasonality use ARIMA + Fourier seasonality, or one of the fast baselines."
+)
+is_sarimax = engine == "SARIMAX"
+uses_order = is_sarimax or engine == "ARIMA + Fourier seasonality"
 
 # SARIMAX parameters
-st.markdown("### Model hyperparameters (SARIMAX)")
+st.markdown("### Model hyperparameters (SARIMAX)" if is_sarimax else "### Model hyperparameters")
+# Defaults live in session_state so the order search can overwrite them
+for name, default in {"p": 1, "d": 1, "q": 1, "P": 1, "D": 0, "Q": 0, "s": 24}.items():
+    st.session_state.setdefault(f"sarimax_{name}", default)
+
 col1, col2, col3 = st.columns(3)
-p = col1.number_input("p", 0, 5, 1)
-d = col1.number_input("d", 0, 2, 1)
-q = col1.number_input("q", 0, 5, 1)
-P = col2.number_input("P", 0, 5, 1)
-D = col2.number_input("D", 0, 2, 0)
-Q = col2.number_input("Q", 0, 5, 0)
-s = col3.number_input("Seasonal period (s)", 0, 8760, 24)
+p = col1.number_input("p", 0, 5, key="sarimax_p", disabled=not uses_order)
+d = col1.number_input("d", 0, 2, key="sarimax_d", disabled=not uses_order)
+q = col1.number_input("q", 0, 5, key="sarimax_q", disabled=not uses_order)
+P = col2.number_input("P", 0, 5, key="sarimax_P", disabled=not is_sarimax)
+D = col2.number_input("D", 0, 2, key="sarimax_D", disabled=not is_sarimax)
+Q = col2.number_input("Q", 0, 5, key="sarimax_Q", disabled=not is_sarimax)
+s = col3.number_input("Seasonal period (s)", 0, 8760, key="sarimax_s", disabled=not is_sarimax)
+
+if is_sarimax and s >= 168:
+    st.warning(f"A seasonal period of {s} hours gives SARIMAX a state vector of that size and "
+               "fitting will take very long. Consider the ARIMA + Fourier seasonality engine.")
+elif engine == "ARIMA + Fourier seasonality":
+    st.caption("Daily, weekly and yearly seasonality are modelled by Fourier terms; "
+               "p, d, q set the ARIMA model of what remains.")
 
 # Optional exogenous variables
 st.markdown("### Optional exogenous variables (from meteorological data)")
@@ -97,69 +119,94 @@ else:
 # --------------------------------------------------------------------
 # Data Preparation
 # --------------------------------------------------------------------
-df = energy_df[energy_df["energyGroup"]==group].copy()
-df["startTime"] = pd.to_datetime(df["startTime"], utc=True)
-df = df[(df['startTime'] >= pd.Timestamp(start_date).tz_localize('UTC')) &
-        (df['startTime'] <= pd.Timestamp(end_date).tz_localize('UTC'))]
+with tracing.span("prepare series") as prep:
+    y = fc.prepare_target(energy_df, group, start_date, end_date, value_col)
+    if not y.empty:
+        y, X_train = fc.prepare_exog(meteo_df, y, exog_vars)
+    prep.rows = len(y)
 
-if df.empty:
+if y.empty:
     st.warning("No data within selected training dates.")
     st.stop()
 
-# --- Prepare y
-y = df[["startTime", value_col]].groupby("startTime").mean().sort_index()
-y.index = pd.to_datetime(y.index, utc=True)
-y = y[~y.index.duplicated(keep="first")]
-y = y.asfreq("H")
-y[value_col] = y[value_col].replace([np.inf, -np.inf], np.nan).interpolate(method="time").fillna(method="ffill").fillna(method="bfill")
-y = y[value_col].astype(float)
-
-# --- Prepare X_train
-X_train = None
-if exog_vars and not meteo_df.empty:
-    meteo_df["time"] = pd.to_datetime(meteo_df["time"], utc=True)
-    X_full = meteo_df.groupby("time")[exog_vars].mean().astype(float).sort_index()
-    X_full.index = pd.to_datetime(X_full.index, utc=True)
-    X_full = X_full[~X_full.index.duplicated(keep="first")]
-    
-    X_train = X_full.reindex(y.index).replace([np.inf,-np.inf], np.nan).fillna(method="ffill").fillna(method="bfill")
-    
-    df_comb = pd.concat([y, X_train], axis=1).dropna()
-    y = df_comb[value_col]
-    X_train = df_comb[exog_vars].astype(float)
-
-# --------------------------------------------------------------------
-# Fit SARIMAX Model
-# --------------------------------------------------------------------
-if st.button("Run Forecast", type="primary"):
-
-    @st.cache_resource(show_spinner=False)
-    def fit_sarimax_model(y, X_train, order, seasonal_order):
-        model = SARIMAX(y, order=order, seasonal_order=seasonal_order,
-                        exog=X_train, enforce_stationarity=False, enforce_invertibility=False)
-        return model.fit(disp=False, maxiter=200, method="lbfgs")
-
-    with st.spinner("Training SARIMAX model... ⏳"):
-        seasonal_order = (P,D,Q,s) if s>0 else (0,0,0,0)
-        results = fit_sarimax_model(y, X_train, (p,d,q), seasonal_order)
+# --------------------------------------------------------------------
+# Automatic order search (parallel grid, ranked by AIC/BIC)
+# --------------------------------------------------------------------
+def apply_order(order, seasonal_order):
+    """Button callback: copy a searched order into the hyperparameter inputs."""
+    for name, value in zip(["p", "d", "q", "P", "D", "Q", "s"], [*order, *seasonal_order]):
+        st.session_state[f"sarimax_{name}"] = int(value)
 
-    st.success("Model trained successfully ✅")
 
-    # --- Forecast
-    idx_forecast = pd.date_range(y.index[-1]+pd.Timedelta(hours=1), periods=forecast_horizon, freq="H", tz="UTC")
-    if X_train is not None:
-        last_exog = X_train.iloc[-1:]
-        X_future = pd.concat([last_exog]*forecast_horizon)
-        X_future.index = idx_forecast
-    else:
-        X_future = None
+# Searches and backtests run as background jobs (jobs.py): they keep running
+# while widgets change, and every rerun with the same settings finds them again.
+def run_order_search(y, X, candidates, timeout, job):
+    return fc.order_search(y, X, candidates, timeout=timeout, progress=job.step_reporter("fits"))
 
-    with st.spinner("Generating forecast... ⏳"):
-        pred_res = results.get_forecast(steps=forecast_horizon, exog=X_future)
-        y_pred = pred_res.predicted_mean
-        conf_int = pred_res.conf_int()
 
-    # --- Plot
+def run_backtest(y, X, order, seasonal_order, folds, horizon, refit, job):
+    return fc.backtest(y, X, order, seasonal_order, folds=folds, horizon=horizon, refit=refit,
+                       progress=job.step_reporter("folds"))
+
+
+data_key = (dataset_token, selected_area, group, value_col, str(start_date), str(end_date), tuple(exog_vars))
+
+if is_sarimax:
+    with st.expander("Automatic order search"):
+        st.caption(f"Fits every p, q up to the maximum, d ∈ {{0, 1}}, and P, Q ∈ {{0, 1}} with D = {D} and s = {s}, "
+                   "in parallel. Fits that run past the timeout or diverge are dropped from the ranking.")
+        c1, c2 = st.columns(2)
+        max_pq = c1.slider("Maximum p and q", 0, 3, 2)
+        timeout = c2.number_input("Timeout per fit (seconds)", 5, 600, 60, step=5)
+
+        search_key = ("order_search", *data_key, max_pq, D, s, timeout)
+        if st.button("Search orders"):
+            candidates = fc.candidate_orders(max_p=max_pq, max_q=max_pq, D=D, s=s)
+            jobs.submit(search_key, run_order_search, y, X_train, candidates, timeout, label="Order search")
+
+        search = ut.job_result(jobs.get(search_key), "Fitting candidate models")
+        if search is not None and not search.empty:
+            st.dataframe(search, width="stretch", hide_index=True)
+            best = search.iloc[0]
+            if best["status"] == "ok":
+                st.button(f"Use best model {best['order']}×{best['seasonal_order']}",
+                          on_click=apply_order, args=(best["order"], best["seasonal_order"]))
+            else:
+                st.warning("No candidate converged within the timeout.")
+
+# --------------------------------------------------------------------
+# Backtest (rolling-origin evaluation of the chosen hyperparameters)
+# --------------------------------------------------------------------
+if is_sarimax:
+    with st.expander("Backtest (rolling origin)"):
+        c1, c2, c3 = st.columns(3)
+        folds = c1.slider("Folds", 2, 20, 5)
+        bt_horizon = c2.number_input("Horizon per fold (hours)", 1, 720, 24)
+        refit = c3.checkbox("Refit every fold", value=False,
+                            help="Off: fit once before the first fold and extend that model with new "
+                                 "observations (parameters fixed). On: a full fit per fold.")
+
+        seasonal_order = (P,D,Q,s) if s>0 else (0,0,0,0)
+        backtest_key = ("backtest", *data_key, (p,d,q), seasonal_order, folds, bt_horizon, refit)
+        if st.button("Run backtest"):
+            jobs.submit(backtest_key, run_backtest, y, X_train, (p,d,q), seasonal_order,
+                        folds, bt_horizon, refit, label="Backtest")
+
+        outcome = ut.job_result(jobs.get(backtest_key), "Backtesting")
+        if outcome is not None:
+            metrics, fold_costs = outcome
+            fig = go.Figure()
+            for col in ["MAE", "RMSE"]:
+                fig.add_trace(go.Scatter(x=metrics.index, y=metrics[col], mode="lines+markers", name=col))
+            fig.update_layout(title="Forecast error by horizon step", template="plotly_white",
+                              xaxis_title="Hours ahead", yaxis_title="kWh", height=400)
+            ut.plotly_chart(fig, width='stretch')
+            st.dataframe(metrics.round(2), width="stretch")
+            st.caption(f"Fold costs — total {fold_costs['seconds'].sum():.1f} s")
+            st.dataframe(fold_costs, width="stretch", hide_index=True)
+
+
+def forecast_figure(y, y_pred, conf_int, title):
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=y.index, y=y, mode="lines", name="Observed", line=dict(color="royalblue")))
     fig.add_trace(go.Scatter(x=y_pred.index, y=y_pred, mode="lines", name="Forecast", line=dict(color="orange")))
@@ -169,9 +216,61 @@ if st.button("Run Forecast", type="primary"):
         fill="toself", fillcolor="rgba(255,165,0,0.25)",
         line=dict(color="rgba(255,255,255,0)"), hoverinfo="skip", showlegend=True, name="95% CI"
     ))
-    fig.update_layout(title=f"SARIMAX Forecast for {group} ({value_col})", template="plotly_white",
+    fig.update_layout(title=title, template="plotly_white",
                       xaxis_title="Time", yaxis_title="Energy Production/Consumption (kWh)", height=600)
-    st.plotly_chart(fig, width='stretch')
+    return fig
+
+
+# --------------------------------------------------------------------
+# Fit the model (SARIMAX fits are kept in the on-disk model registry)
+# --------------------------------------------------------------------
+forecast_file = rs.forecast_path(dataset_token, selected_area, group) if dataset_token else None
+precomputed = rs.read_frame(forecast_file) if forecast_file else None
+
+if precomputed is not None:
+    st.caption("A precomputed forecast with default settings is shown below. "
+               "Press Run Forecast for a live fit with the hyperparameters above.")
+run_forecast = st.button("Run Forecast", type="primary")
+
+if run_forecast and not is_sarimax:
+
+    with st.spinner(f"Fitting {engine}... ⏳"), tracing.span(f"fit {engine}", rows=len(y)):
+        options = {"order": (p,d,q)} if uses_order else {}
+        try:
+            y_pred, conf_int, fit_seconds = ff.ENGINES[engine](y, X_train, forecast_horizon, **options)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+    st.success(f"Model fitted in {fit_seconds:.2f} s ✅")
+    ut.plotly_chart(forecast_figure(y, y_pred, conf_int, f"{engine} Forecast for {group} ({value_col})"),
+                    width='stretch')
+
+elif run_forecast:
+
+    seasonal_order = (P,D,Q,s) if s>0 else (0,0,0,0)
+    key = registry.model_key(selected_area, group, dataset_token, start_date, end_date,
+                             (p,d,q), seasonal_order, exog_vars, (lat, lon), value_col)
+
+    with st.spinner("Training SARIMAX model... ⏳"), tracing.span("sarimax fit", rows=len(y)) as fit_span:
+        # Warm start from the last converged fit of this area/group/order (e.g. before a slider nudge)
+        results, from_registry = registry.get_or_fit(
+            key, lambda: fc.fit_sarimax(y, X_train, (p,d,q), seasonal_order,
+                                        start_params=registry.start_params(key))
+        )
+        fit_span.cache = tracing.HIT if from_registry else tracing.MISS
+
+    if from_registry:
+        st.success("Loaded previously fitted model from the registry ✅")
+    else:
+        st.success("Model trained successfully ✅")
+
+    # --- Forecast
+    with st.spinner("Generating forecast... ⏳"), tracing.span("sarimax forecast", rows=forecast_horizon):
+        y_pred, conf_int = fc.forecast(results, y, X_train, forecast_horizon)
+
+    # --- Plot
+    ut.plotly_chart(forecast_figure(y, y_pred, conf_int, f"SARIMAX Forecast for {group} ({value_col})"),
+                    width='stretch')
 
     # --- Metrics
     st.subheader("Model Summary (shortened)")
@@ -179,3 +278,19 @@ if st.button("Run Forecast", type="primary"):
     st.subheader("Training Fit Metrics")
     st.write(f"**AIC:** {results.aic:.2f}")
     st.write(f"**BIC:** {results.bic:.2f}")
+
+elif precomputed is not None:
+
+    # --- Precomputed forecast from the nightly batch job (batch/forecasts.py)
+    meta = rs.read_meta(forecast_file)
+    y_recent = fc.prepare_target(energy_df, group, pd.Timestamp(meta["train_end"]).date() - pd.Timedelta(days=28),
+                                 pd.Timestamp(meta["train_end"]).date() + pd.Timedelta(days=1), value_col)
+    shown = precomputed.set_index("time").iloc[:forecast_horizon]
+    st.subheader("Precomputed forecast")
+    ut.plotly_chart(forecast_figure(y_recent, shown["forecast"], shown[["lower", "upper"]],
+                                    f"SARIMAX{tuple(meta['order'])}×{tuple(meta['seasonal_order'])} "
+                                    f"Forecast for {group} ({value_col})"), width='stretch')
+    st.caption(f"Trained on {meta['train_start'][:10]} to {meta['train_end'][:10]} "
+               f"in {meta['fit_seconds']:.1f} s · AIC {meta['aic']:.2f} · BIC {meta['bic']:.2f} · "
+               f"computed {pd.Timestamp(meta['created'], unit='s'):%Y-%m-%d %H:%M} UTC")
+
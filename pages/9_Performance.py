@@ -0,0 +1,83 @@
+# --------------------------------------------------------------------
+# Streamlit Page : Performance panel for developers (cache usage and stage timings of all sessions)
+# Not linked from the sidebar; open it directly at /Performance.
+# --------------------------------------------------------------------
+import streamlit as st
+import pandas as pd
+import utils as ut
+import cache
+import tracing
+
+ut.apply_styles()
+ut.show_sidebar()
+
+st.title("Performance (developer)")
+st.caption("Stage timings recorded by tracing.py in this server process, for every session. "
+           f"The last {tracing.KEEP_SPANS:,} spans are kept"
+           + (f" and appended to {tracing.TRACE_FILE}." if tracing.TRACE_FILE else "; set IND320_TRACE_FILE to log them to disk."))
+
+# --------------------------------------------------------------------
+# Bounded caches (cache.py)
+# --------------------------------------------------------------------
+st.subheader("Caches")
+caches = pd.DataFrame(cache.stats())
+if caches.empty:
+    st.info("No cache has been used yet.")
+else:
+    caches["MiB"] = caches.pop("bytes") / cache.MiB
+    caches["budget MiB"] = caches.pop("max_bytes") / cache.MiB
+    st.dataframe(
+        caches.style.format({"MiB": "{:.1f}", "budget MiB": "{:.0f}", "hit_rate": "{:.0%}", "ttl_s": "{:.0f}"},
+                            na_rep="–"),
+        width='stretch', hide_index=True
+    )
+    if st.button("Clear all caches"):
+        cache.clear()
+        st.rerun()
+
+spans = [s for s in tracing.spans() if s.page != "Performance"]
+if not spans:
+    st.info("No spans recorded yet. Use the other pages first.")
+    st.stop()
+
+pages = sorted({s.page for s in spans})
+chosen = st.multiselect("Pages", pages, default=pages)
+spans = [s for s in spans if s.page in chosen]
+
+# --------------------------------------------------------------------
+# Slowest stages per page
+# --------------------------------------------------------------------
+st.subheader("Slowest stages")
+summary = tracing.stage_summary(spans)
+st.dataframe(
+    summary.style.format({
+        "mean_s": "{:.3f}", "p95_s": "{:.3f}", "max_s": "{:.3f}", "total_s": "{:.2f}",
+        "mean_rows": "{:,.0f}", "hit_rate": "{:.0%}",
+    }, na_rep="–"),
+    width='stretch', hide_index=True
+)
+
+# --------------------------------------------------------------------
+# Slowest reruns (sum of their top-level stages)
+# --------------------------------------------------------------------
+st.subheader("Slowest reruns")
+frame = pd.DataFrame([s.as_dict() for s in spans])
+top = frame[frame["parent"].isna()]
+reruns = (
+    top.groupby(["rerun", "page", "session"], dropna=False)
+    .agg(start=("start", "min"), stages=("stage", "size"), seconds=("seconds", "sum"),
+         slowest=("seconds", "idxmax"))
+    .reset_index()
+)
+reruns["slowest"] = top.loc[reruns["slowest"], "stage"].to_numpy()
+reruns["start"] = pd.to_datetime(reruns["start"], unit="s")
+st.dataframe(reruns.sort_values("seconds", ascending=False).head(20), width='stretch', hide_index=True)
+
+col1, col2 = st.columns(2)
+with col1:
+    st.download_button("Download spans (JSON lines)", tracing.to_jsonl(spans),
+                       file_name="spans.jsonl", mime="application/jsonl")
+with col2:
+    if st.button("Clear recorded spans"):
+        tracing.clear()
+        st.rerun()
@@ -0,0 +1,78 @@
+# results_store.py
+# Columnar (parquet) store for precomputed analysis results.
+#
+# Results live under RESULTS_DIR/<kind>/<dataset token>/..., so a new
+# version of a dataset never reads results computed from an older one.
+import json
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+RESULTS_DIR = Path(os.environ.get("IND320_RESULTS_DIR", Path(__file__).resolve().parent / "results"))
+
+
+def stl_path(token, area, group, year, period, seasonal, trend, robust, root=None):
+    name = f"{area}_{group.lower()}_{year}_p{period}_s{seasonal}_t{trend}{'_robust' if robust else ''}.parquet"
+    return Path(root or RESULTS_DIR) / "stl" / token / name
+
+
+def mstl_path(token, area, group, periods, yearly, chunk_hours, overlap_hours, root=None):
+    name = (f"{area}_{group.lower()}_all_mstl_{'-'.join(map(str, periods))}{'_yearly' if yearly else ''}"
+            f"_c{chunk_hours}_o{overlap_hours}.parquet")
+    return Path(root or RESULTS_DIR) / "stl" / token / name
+
+
+def anomalies_path(token, area, group, root=None):
+    return Path(root or RESULTS_DIR) / "anomalies" / token / f"{area}_{group.lower()}.parquet"
+
+
+def read_anomalies(token, root=None):
+    """All flagged hours stored for a dataset token (empty frame if none)."""
+    folder = Path(root or RESULTS_DIR) / "anomalies" / token
+    files = sorted(folder.glob("*.parquet")) if folder.exists() else []
+    if not files:
+        return pd.DataFrame(columns=["priceArea", "energyGroup", "time", "value", "method", "score"])
+    return pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+
+
+def forecast_path(token, area, group, root=None):
+    """Precomputed forecast of one series; its metadata sits next to it as .json."""
+    return Path(root or RESULTS_DIR) / "forecasts" / token / f"{area}_{group.lower()}.parquet"
+
+
+def tmp_path(path):
+    """Temporary name next to path, unique per process and thread, for write-then-rename."""
+    return path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+
+def write_frame(df, path):
+    """Write df to parquet atomically, readers never see a half-written file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = tmp_path(path)
+    df.to_parquet(tmp)
+    os.replace(tmp, path)
+
+
+def read_frame(path):
+    """Return the stored frame, or None if it has not been computed yet."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return pd.read_parquet(path)
+
+
+def write_meta(meta, path):
+    """Write the JSON sidecar of a stored frame (same name, .json suffix)."""
+    path = Path(path).with_suffix(".json")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = tmp_path(path)
+    tmp.write_text(json.dumps(meta, indent=2, default=str))
+    os.replace(tmp, path)
+
+
+def read_meta(path):
+    path = Path(path).with_suffix(".json")
+    return json.loads(path.read_text()) if path.exists() else None
@@ -0,0 +1,193 @@
+# tracing.py
+# Lightweight per-rerun stage timing.
+#
+# Code under test opens spans (context manager or decorator) around its
+# stages: data loads, remote calls, kernels, figure serialization. A span
+# records its duration, the row count of its result and, for cached
+# functions, whether the call was a cache hit, a miss, or coalesced (it
+# waited for another session computing the same value). Spans carry the
+# session, page and rerun set by start_rerun(), are kept in a bounded
+# process-wide buffer (shared by all sessions) and can be written out as
+# JSON lines. Streamlit-free; utils.py wires it to the script run context.
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+KEEP_SPANS = 20_000
+# When set, every finished span is also appended to this JSON lines file
+TRACE_FILE = os.environ.get("IND320_TRACE_FILE")
+
+HIT, MISS, COALESCED = "hit", "miss", "coalesced"
+
+_SPANS = deque(maxlen=KEEP_SPANS)
+_LOCK = threading.Lock()
+_FILE_LOCK = threading.Lock()
+_LOCAL = threading.local()
+_RERUNS = itertools.count(1)
+
+
+class Span:
+    """One timed stage of a rerun."""
+
+    __slots__ = ("stage", "session", "page", "rerun", "parent", "start", "seconds", "rows", "cache", "error")
+
+    def __init__(self, stage, parent=None):
+        context = getattr(_LOCAL, "context", {})
+        self.stage = stage
+        self.session = context.get("session")
+        self.page = context.get("page", "background")
+        self.rerun = context.get("rerun")
+        self.parent = parent
+        self.start = time.time()
+        self.seconds = None
+        self.rows = None
+        self.cache = None
+        self.error = None
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def start_rerun(page, session=None):
+    """Mark the start of a script run on this thread; later spans belong to it."""
+    _LOCAL.context = {"page": page, "session": session, "rerun": next(_RERUNS)}
+    _LOCAL.stack = []
+
+
+def _stack():
+    if not hasattr(_LOCAL, "stack"):
+        _LOCAL.stack = []
+    return _LOCAL.stack
+
+
+def count_rows(result):
+    """Row count of a result (DataFrame, array, list, or the first item of a tuple)."""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    if result is None or isinstance(result, (str, bytes, dict)):
+        return None
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+@contextmanager
+def span(stage, rows=None):
+    """Time the block as one stage. The yielded Span can take rows/cache set by the caller."""
+    stack = _stack()
+    current = Span(stage, parent=stack[-1].stage if stack else None)
+    current.rows = rows
+    stack.append(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.seconds = time.perf_counter() - start
+        stack.pop()
+        _record(current)
+
+
+def traced(stage, cached=False):
+    """
+    Decorator: run the function inside span(stage) and record the row count
+    of its result. With cached=True the function is a cache wrapper whose
+    body is decorated with computes(); calls that never reach the body are
+    recorded as cache hits unless coalesced() marks them.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage) as current:
+                if cached:
+                    current.cache = HIT
+                result = fn(*args, **kwargs)
+                current.rows = count_rows(result)
+                return result
+        return wrapper
+    return decorate
+
+
+def computes(fn):
+    """Decorator for the body of a cached function: marks the enclosing span as a cache miss."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        stack = _stack()
+        if stack:
+            stack[-1].cache = MISS
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def coalesced():
+    """Marks the current span as coalesced: it waited for another caller's computation."""
+    stack = _stack()
+    if stack:
+        stack[-1].cache = COALESCED
+
+
+def _record(current):
+    with _LOCK:
+        _SPANS.append(current)
+    if TRACE_FILE:
+        write_jsonl([current], TRACE_FILE, append=True)
+
+
+def spans():
+    """Snapshot of the buffered spans, oldest first."""
+    with _LOCK:
+        return list(_SPANS)
+
+
+def clear():
+    with _LOCK:
+        _SPANS.clear()
+
+
+def to_jsonl(items=None):
+    """Spans (default: the whole buffer) as a JSON lines string."""
+    return "".join(json.dumps(s.as_dict(), default=str) + "\n" for s in (spans() if items is None else items))
+
+
+def write_jsonl(items, path, append=False):
+    """Write spans to a JSON lines file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _FILE_LOCK, open(path, "a" if append else "w") as f:
+        f.write(to_jsonl(items))
+
+
+def stage_summary(items=None):
+    """
+    Per (page, stage) statistics over spans: calls, mean/p95/max/total
+    seconds, mean rows, cache hit rate (among calls with a cache state;
+    coalesced calls waited for a computation and are not hits) and the
+    number of coalesced calls, slowest p95 first.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame([s.as_dict() for s in (spans() if items is None else items)])
+    if df.empty:
+        return df
+    df["hit"] = df["cache"].map({HIT: 1.0, MISS: 0.0, COALESCED: 0.0})
+    df["coalesced"] = df["cache"] == COALESCED
+    table = df.groupby(["page", "stage"]).agg(
+        calls=("seconds", "size"),
+        mean_s=("seconds", "mean"),
+        p95_s=("seconds", lambda x: x.quantile(0.95)),
+        max_s=("seconds", "max"),
+        total_s=("seconds", "sum"),
+        mean_rows=("rows", "mean"),
+        hit_rate=("hit", "mean"),
+        coalesced=("coalesced", "sum"),
+    )
+    return table.sort_values("p95_s", ascending=False).reset_index()
@@ -1,13 +1,59 @@
 # components.py
+import os
 import streamlit as st
-from pymongo import MongoClient
 import pandas as pd
-import requests
+import cache
+import jobs
+import tracing
+import datasets as ds
+from datasets import normalize_columns  # re-exported, also used by the batch jobs
+
+# Open-Meteo archive endpoint; point it at a local stand-in for offline runs and load tests
+OPEN_METEO_URL = os.environ.get("IND320_OPEN_METEO_URL", "https://archive-api.open-meteo.com/v1/archive")
+# Seconds to wait for an Open-Meteo response (one calendar year at most)
+OPEN_METEO_TIMEOUT = 60
+
+
+# -----------------------------
+# Stage tracing (tracing.py)
+# -----------------------------
+def current_page():
+    """(session id, page name) of the running script, or (None, "app") outside a page run."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None, "app"
+    page = ctx.pages_manager.get_pages().get(ctx.page_script_hash, {})
+    return ctx.session_id, page.get("page_name") or "app"
+
+
+def cached(stage, namespace="default"):
+    """Memoize in a bounded cache namespace (cache.py); calls are traced as stage, with cache hit/miss/coalesced."""
+    def decorate(fn):
+        cached_fn = cache.memoize(namespace, on_coalesced=tracing.coalesced)(tracing.computes(fn))
+        traced_fn = tracing.traced(stage, cached=True)(cached_fn)
+        traced_fn.clear = cached_fn.clear
+        return traced_fn
+    return decorate
+
+
+def plotly_chart(fig, **kwargs):
+    """st.plotly_chart, traced (figure serialization is a stage of its own)."""
+    with tracing.span("plotly chart"):
+        return st.plotly_chart(fig, **kwargs)
 
 
 # CSS Helper
-@st.cache_data(show_spinner=False)
 def apply_styles():
+    """Called first by every page: starts the rerun's trace and injects the CSS."""
+    session, page = current_page()
+    tracing.start_rerun(page, session)
+    _inject_styles()
+
+
+@st.cache_data(show_spinner=False)
+def _inject_styles():
 
     css = f"""
     <style>
@@ -95,28 +141,14 @@ def get_mongo_uri():
 # -----------------------------
 @st.cache_resource
 def get_mongo_client(uri):
-    return MongoClient(uri)
+    from pymongo import MongoClient  # imported on first use, keeps page start-up fast
 
-# --- Normalize columns function
-# -------------------------------
-def normalize_columns(df):
-    """Normalize columns for production and consumption datasets."""
-    df.columns = [c.lower() for c in df.columns]
-
-    rename_map = {
-        "productiongroup": "energyGroup",
-        "consumptiongroup": "energyGroup",
-        "starttime": "startTime",
-        "pricearea": "priceArea",
-        "quantitykwh": "quantityKwh"
-    }
-    df = df.rename(columns=rename_map)
-    return df
+    return MongoClient(uri)
 
 # -----------------------------
 # Load Data from MongoDB
 # -----------------------------
-@st.cache_data(show_spinner=False)
+@tracing.traced("mongo load")
 def load_data_from_mongo(db_name="indra", collection_name="production_per_group"):
     uri = get_mongo_uri()
     client = get_mongo_client(uri)
@@ -129,10 +161,36 @@ def load_data_from_mongo(db_name="indra", collection_name="production_per_group"
         df["quantityKwh"] = pd.to_numeric(df["quantityKwh"], errors="coerce")
     return df
 
+# -----------------------------
+# Load an energy dataset (production / consumption)
+# -----------------------------
+@cached("energy load", "mongo")
+def load_energy_data(dataset_type):
+    """Load one energy dataset from MongoDB with normalized columns and dtypes.
+    Shared by the Map page and the batch jobs so both see the same frame (and token).
+    Only this normalized frame is cached (the raw Mongo frame is not kept), and
+    the dataset registry shares its column buffers, so a process holds one copy."""
+    df = normalize_columns(load_data_from_mongo(db_name="indra", collection_name=f"{dataset_type}_per_group"))
+    if len(df) > 0:
+        df["quantityKwh"] = pd.to_numeric(df["quantityKwh"], errors="coerce")
+        df["startTime"] = pd.to_datetime(df["startTime"], utc=True)
+    return df
+
+def session_dataset(**spec):
+    """
+    The energy dataset this session selected on the Map page, optionally
+    filtered (see datasets.view), or an empty frame if none is loaded.
+    The session stores only the dataset token, never the frame.
+    """
+    token = st.session_state.get("dataset_token")
+    if token is None or not ds.is_registered(token):
+        return pd.DataFrame()
+    return ds.view(token, **spec)
+
 # -----------------------------
 # Load CSV
 # -----------------------------
-@st.cache_data(show_spinner=False)
+@cached("csv load", "mongo")
 def load_data_from_csv(file_path="No_sync/P_Energy.csv"):
     df = pd.read_csv(file_path)
     if "startTime" in df.columns:
@@ -141,38 +199,104 @@ def load_data_from_csv(file_path="No_sync/P_Energy.csv"):
         df["quantityKwh"] = pd.to_numeric(df["quantityKwh"], errors="coerce")
     return df
 
-@st.cache_data(show_spinner=False)
+def year_ranges(start_date, end_date):
+    """Split [start_date, end_date] into (start, end) date strings, one per calendar year."""
+    start, end = pd.Timestamp(str(start_date)).normalize(), pd.Timestamp(str(end_date)).normalize()
+    ranges = []
+    while start <= end:
+        year_end = min(end, pd.Timestamp(year=start.year, month=12, day=31))
+        ranges.append((start.strftime("%Y-%m-%d"), year_end.strftime("%Y-%m-%d")))
+        start = year_end + pd.Timedelta(days=1)
+    return ranges
+
+
 def get_weather_data(lat, lon, start_date, end_date):
+    """
+    Hourly Open-Meteo weather for [start_date, end_date]. Multi-year ranges are
+    fetched one calendar year per request, each cached on its own, so a wide
+    year selection neither sends one huge request nor refetches the years
+    already loaded. A failed request raises (and is shared with coalesced
+    callers); pages use weather_or_stop() to show it.
+    """
+    frames = [_weather_request(lat, lon, start, end) for start, end in year_ranges(start_date, end_date)]
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def weather_or_stop(lat, lon, start_date, end_date):
+    """get_weather_data() for a page run: on a failed request show the error and stop the page."""
     try:
-        url = "https://archive-api.open-meteo.com/v1/archive"
-        params = {
-            "latitude": lat,
-            "longitude": lon,
-            "start_date": start_date,
-            "end_date": end_date,
-            "hourly": [
-                "temperature_2m",
-                "precipitation",
-                "windspeed_10m",
-                "wind_gusts_10m",
-                "wind_direction_10m"
-            ],
-            "timezone": "Europe/Oslo"
-        }
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        df = pd.DataFrame(data["hourly"])
-        df = df.rename(columns={
-            'temperature_2m': 'temperature_2m (°C)',
-            'windspeed_10m': 'wind_speed_10m (m/s)',
-            'precipitation': 'precipitation (mm)',
-            'wind_gusts_10m': 'wind_gusts_10m (m/s)',
-            'wind_direction_10m': 'wind_direction_10m (°)'
-        })
-        df["time"] = pd.to_datetime(df["time"], format="%Y-%m-%dT%H:%M")
-        return df
-    
+        return get_weather_data(lat, lon, start_date, end_date)
     except Exception as e:
         st.error(f"Error fetching weather data: {e}")
+        st.stop()
+
+
+@cached("open-meteo", "weather")
+def _weather_request(lat, lon, start_date, end_date):
+    url = OPEN_METEO_URL
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "start_date": start_date,
+        "end_date": end_date,
+        "hourly": [
+            "temperature_2m",
+            "precipitation",
+            "windspeed_10m",
+            "wind_gusts_10m",
+            "wind_direction_10m"
+        ],
+        "timezone": "Europe/Oslo"
+    }
+    import requests
+
+    response = requests.get(url, params=params, timeout=OPEN_METEO_TIMEOUT)
+    response.raise_for_status()
+    data = response.json()
+    df = pd.DataFrame(data["hourly"])
+    df = df.rename(columns={
+        'temperature_2m': 'temperature_2m (°C)',
+        'windspeed_10m': 'wind_speed_10m (m/s)',
+        'precipitation': 'precipitation (mm)',
+        'wind_gusts_10m': 'wind_gusts_10m (m/s)',
+        'wind_direction_10m': 'wind_direction_10m (°)'
+    })
+    df["time"] = pd.to_datetime(df["time"], format="%Y-%m-%dT%H:%M")
+    return df
+
+
+# -----------------------------
+# Background job status (jobs.py)
+# -----------------------------
+def show_job(job, text="Computing in the background"):
+    """
+    Progress bar and cancel button for a running job. Polls every second
+    without rerunning the page, and reruns the page once the job has finished.
+    """
+    @st.fragment(run_every=1.0)
+    def poll():
+        if job.done:
+            st.rerun()
+        detail = f" · {job.message}" if job.message else ""
+        st.progress(job.progress, text=f"{text}{detail} ({job.seconds:.0f} s)")
+        # Keyed on the job key: two jobs can share a label
+        if st.button("Cancel", key=f"cancel_{job.key!r}"):
+            job.cancel()
+            st.rerun()
+
+    poll()
+
+
+def job_result(job, text="Computing in the background"):
+    """Result of a finished job, or None while it runs (progress shown), failed or was cancelled."""
+    if job is None:
         return None
+    if job.status == jobs.DONE:
+        return job.result
+    if job.status == jobs.FAILED:
+        st.error(f"{job.label} failed: {job.error}")
+    elif job.status == jobs.CANCELLED:
+        st.info(f"{job.label} was cancelled.")
+    else:
+        show_job(job, text)
+    return None